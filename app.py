@@ -1,7 +1,12 @@
 # C:\Ariel Portnik\RealEstate_app\app.py
 
 import os
+import shutil
+import threading
+import time
+import uuid
 from datetime import datetime
+from typing import Dict, Optional
 
 from flask import (
     Flask,
@@ -11,6 +16,7 @@ from flask import (
     url_for,
     send_from_directory,
     flash,
+    jsonify,
 )
 from werkzeug.utils import secure_filename
 import pandas as pd
@@ -18,6 +24,10 @@ import pandas as pd
 from core.prepare_yzer import run_yzer_preparation
 from core.tax_gap_checker import run_tax_gap_check
 from core.duplicates_checker import run_duplicates_check
+from core.dup_index import DuplicateIndex
+from core.frame_cache import FrameCache
+from core.jobs import JOB_DONE, JOB_ERROR, JobQueue, new_job_id
+from core.result_writer import check_output_format, mimetype_for
 
 # ------------------------------------------------------------------
 # Paths & config
@@ -26,6 +36,9 @@ from core.duplicates_checker import run_duplicates_check
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
 OUTPUT_FOLDER = os.path.join(BASE_DIR, "outputs")
+SCAN_CACHE_FOLDER = os.path.join(BASE_DIR, "cache", "scans")
+RAMI_CACHE_FOLDER = os.path.join(BASE_DIR, "cache", "rami")
+DUP_INDEX_FOLDER = os.path.join(BASE_DIR, "cache", "dup_index")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 ALLOWED_EXTENSIONS = {".csv", ".xls", ".xlsx", ".xlsm"}
@@ -41,6 +54,56 @@ app.config["SECRET_KEY"] = os.environ.get(
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["OUTPUT_FOLDER"] = OUTPUT_FOLDER
 
+# Rows per chunk when reading CSV scan files (peak memory scales with it)
+app.config["SCAN_CHUNK_ROWS"] = int(os.environ.get("SCAN_CHUNK_ROWS", "200000"))
+
+# Scan files larger than this (MB) are checked for duplicates out of core:
+# rows are spilled to temporary files (in SPILL_FOLDER) instead of held in RAM
+app.config["DUPLICATES_EXTERNAL_MB"] = int(os.environ.get("DUPLICATES_EXTERNAL_MB", "1024"))
+app.config["SPILL_FOLDER"] = os.environ.get("SPILL_FOLDER") or None
+
+# CSV scans larger than this (MB) are prepared for YZER chunk by chunk,
+# streaming the cleaned rows to the output file
+app.config["YZER_STREAMING_MB"] = int(os.environ.get("YZER_STREAMING_MB", "1024"))
+
+# Worker processes for the files of a RAMI ZIP (1 = serial, 0 = one per CPU)
+app.config["TAX_GAP_WORKERS"] = int(os.environ.get("TAX_GAP_WORKERS", "1"))
+
+# Parsed scan files, keyed by content hash (size limit in MB, LRU eviction)
+app.config["SCAN_CACHE_MAX_MB"] = int(os.environ.get("SCAN_CACHE_MAX_MB", "2048"))
+scan_cache = FrameCache(
+    SCAN_CACHE_FOLDER,
+    max_bytes=app.config["SCAN_CACHE_MAX_MB"] * 1024 * 1024,
+)
+
+# Normalized RAMI files (re-uploaded in later ZIPs), same policy
+app.config["RAMI_CACHE_MAX_MB"] = int(os.environ.get("RAMI_CACHE_MAX_MB", "512"))
+rami_cache = FrameCache(
+    RAMI_CACHE_FOLDER,
+    max_bytes=app.config["RAMI_CACHE_MAX_MB"] * 1024 * 1024,
+)
+
+# Key hashes of earlier scan dates for the incremental duplicates check,
+# one index per dataset name (see _dup_index_for). Daily scans carry dated
+# file names, so runs without a dataset name all share DEFAULT_DUP_DATASET.
+DEFAULT_DUP_DATASET = "scans"
+_dup_indexes: Dict[str, DuplicateIndex] = {}
+_dup_indexes_lock = threading.Lock()
+# Held from the "is the dataset in use?" check of a reset to its submit
+_dup_submit_lock = threading.Lock()
+
+# Background jobs: the tools run on a local thread pool, the views only
+# enqueue them and poll for the status (see core/jobs.py). Job state lives
+# in this process, so the Procfile runs a single gunicorn worker (with
+# WEB_THREADS threads); more workers would answer "Job not found".
+# A job's output folder is deleted together with its record (after the job
+# TTL); folders left behind by an earlier process are deleted at startup.
+app.config["JOB_WORKERS"] = int(os.environ.get("JOB_WORKERS", "2"))
+job_queue = JobQueue(
+    max_workers=app.config["JOB_WORKERS"],
+    on_expire=lambda job: _remove_job_output(job.job_id),
+)
+
 
 # ------------------------------------------------------------------
 # Helpers
@@ -52,6 +115,105 @@ def _allowed_file(filename: str) -> bool:
     return ext.lower() in ALLOWED_EXTENSIONS
 
 
+def _new_upload_dir() -> str:
+    """
+    Own upload folder per job, so queued / running jobs never see their
+    input overwritten by a later upload with the same file name.
+    """
+    path = os.path.join(app.config["UPLOAD_FOLDER"], uuid.uuid4().hex)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _dup_index_for(dataset: str) -> DuplicateIndex:
+    """The incremental key index of one dataset, shared by all of its jobs."""
+    with _dup_indexes_lock:
+        if dataset not in _dup_indexes:
+            _dup_indexes[dataset] = DuplicateIndex(DUP_INDEX_FOLDER, name=dataset)
+        return _dup_indexes[dataset]
+
+
+def _dataset_in_use(dataset: str, resetting_only: bool = False) -> bool:
+    """
+    A queued or running duplicates job uses the dataset's index (with
+    resetting_only: one that resets it).
+    """
+    return any(
+        job.meta.get("dataset") == dataset and (job.meta.get("reset") or not resetting_only)
+        for job in job_queue.active("duplicates")
+    )
+
+
+def _resetting_index(func, dup_index: DuplicateIndex):
+    """
+    func wrapped for the job queue: the index is reset when the job starts,
+    not in the request, so jobs queued before it still see the old index.
+    """
+    def run(*args, **kwargs):
+        dup_index.reset()
+        return func(*args, **kwargs)
+    return run
+
+
+def _job_output_dir(job_id: str) -> str:
+    """
+    Own output folder per job: result file names only carry the input name
+    and the date, so jobs running side by side must not share a folder.
+    Results are downloaded as <job_id>/<file name>.
+    """
+    return os.path.join(app.config["OUTPUT_FOLDER"], job_id)
+
+
+def _remove_job_output(job_id: str) -> None:
+    shutil.rmtree(_job_output_dir(job_id), ignore_errors=True)
+
+
+def _is_job_id(name: str) -> bool:
+    """Folder names from new_job_id (32 hex digits) – other outputs stay."""
+    return len(name) == 32 and all(c in "0123456789abcdef" for c in name)
+
+
+def _prune_stale_outputs() -> None:
+    """
+    Delete job output folders older than the job TTL whose job record is
+    gone, e.g. those of a previous process (records live in memory only).
+    """
+    cutoff = time.time() - job_queue.job_ttl
+    for name in os.listdir(app.config["OUTPUT_FOLDER"]):
+        path = _job_output_dir(name)
+        if (
+            _is_job_id(name)
+            and os.path.isdir(path)
+            and job_queue.get(name) is None
+            and os.path.getmtime(path) < cutoff
+        ):
+            _remove_job_output(name)
+
+
+def _removing_uploads(func, upload_dir: str):
+    """
+    func wrapped for the job queue: the job's upload folder (scans can be
+    hundreds of MB) is deleted once func has run, whether it succeeded or not.
+    """
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+    return run
+
+
+def _requested_output_format() -> Optional[str]:
+    """Result file format chosen in the form (CSV if none); None if unsupported."""
+    try:
+        return check_output_format(request.form.get("output_format"))
+    except ValueError:
+        return None
+
+
+_prune_stale_outputs()
+
+
 # ------------------------------------------------------------------
 # Routes: Home
 # ------------------------------------------------------------------
@@ -87,23 +249,32 @@ def prepare_yzer_view():
             flash("Unsupported file type. Please upload CSV / Excel.", "error")
             return redirect(url_for("prepare_yzer_view"))
 
+        output_format = _requested_output_format()
+        if output_format is None:
+            flash("Unsupported output format. Please choose CSV, Parquet or Feather.", "error")
+            return redirect(url_for("prepare_yzer_view"))
+
         filename = secure_filename(file.filename)
-        input_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+        upload_dir = _new_upload_dir()
+        input_path = os.path.join(upload_dir, filename)
         file.save(input_path)
 
-        try:
-            stats = run_yzer_preparation(
-                input_path,
-                app.config["OUTPUT_FOLDER"],
-            )
-
-            result = stats
-            download_filename = stats.get("output_filename")
-
-            flash("Cleaning completed successfully.", "success")
-        except Exception as e:
-            app.logger.exception("Error during YZER preparation: %s", e)
-            flash(f"Error during YZER preparation: {e}", "error")
+        streaming = os.path.getsize(input_path) > app.config["YZER_STREAMING_MB"] * 1024 * 1024
+
+        job_id = new_job_id()
+        job_queue.submit(
+            "yzer",
+            _removing_uploads(run_yzer_preparation, upload_dir),
+            input_path,
+            _job_output_dir(job_id),
+            scan_cache=scan_cache,
+            chunk_rows=app.config["SCAN_CHUNK_ROWS"],
+            streaming=streaming,
+            output_format=output_format,
+            meta={"files": [filename]},
+            job_id=job_id,
+        )
+        return redirect(url_for("job_view", job_id=job_id))
 
     return render_template(
         "prepare_yzer.html",
@@ -120,7 +291,8 @@ def prepare_yzer_view():
 @app.route("/duplicates-check", methods=["GET", "POST"])
 def duplicates_view():
     """
-    Upload a scan file and run duplicates detection.
+    Upload a scan file and run duplicates detection as a background job
+    (results are shown by job_view).
     Expects core.duplicates_checker.run_duplicates_check to return:
       results, sample_rows
     where:
@@ -142,22 +314,82 @@ def duplicates_view():
             flash("Unsupported file type. Please upload CSV / Excel.", "error")
             return redirect(url_for("duplicates_view"))
 
+        output_format = _requested_output_format()
+        if output_format is None:
+            flash("Unsupported output format. Please choose CSV, Parquet or Feather.", "error")
+            return redirect(url_for("duplicates_view"))
+
         filename = secure_filename(file.filename)
-        input_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+        upload_dir = _new_upload_dir()
+        input_path = os.path.join(upload_dir, filename)
         file.save(input_path)
 
-        try:
-            # Adjust according to your actual signature if different
-            results, sample_rows = run_duplicates_check(
-                input_path,
-                app.config["OUTPUT_FOLDER"],
+        external = os.path.getsize(input_path) > app.config["DUPLICATES_EXTERNAL_MB"] * 1024 * 1024
+        incremental = bool(request.form.get("incremental"))
+        # Scans of one dataset share an index; not the file name by default –
+        # daily scans have dated names and would each get an empty index
+        dataset = secure_filename(request.form.get("dataset", "").strip()) or DEFAULT_DUP_DATASET
+        reset_index = incremental and bool(request.form.get("reset_index"))
+        near = bool(request.form.get("near"))
+
+        if near and external:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+            flash(
+                "Near-duplicate mode is not available for files larger than "
+                f"{app.config['DUPLICATES_EXTERNAL_MB']} MB.",
+                "error",
             )
+            return redirect(url_for("duplicates_view"))
 
-            download_filename = results.get("output_filename")
-            flash("Duplicates check completed successfully.", "success")
-        except Exception as e:
-            app.logger.exception("Error during duplicates check: %s", e)
-            flash(f"Error during duplicates check: {e}", "error")
+        func = run_duplicates_check
+        dup_index = None
+        if incremental:
+            dup_index = _dup_index_for(dataset)
+            if reset_index:
+                func = _resetting_index(func, dup_index)
+
+        job_id = new_job_id()
+        # A reset must not run next to another job on the same index (with
+        # JOB_WORKERS > 1 it would wipe that job's keys half-way), so neither
+        # side is accepted while the other is queued or running
+        with _dup_submit_lock:
+            if reset_index and _dataset_in_use(dataset):
+                shutil.rmtree(upload_dir, ignore_errors=True)
+                flash(
+                    f"The index of dataset '{dataset}' is in use by a running job; "
+                    "reset it once that job has finished.",
+                    "error",
+                )
+                return redirect(url_for("duplicates_view"))
+            if incremental and _dataset_in_use(dataset, resetting_only=True):
+                shutil.rmtree(upload_dir, ignore_errors=True)
+                flash(
+                    f"The index of dataset '{dataset}' is being reset by a running job; "
+                    "submit this scan once that job has finished.",
+                    "error",
+                )
+                return redirect(url_for("duplicates_view"))
+
+            job_queue.submit(
+                "duplicates",
+                _removing_uploads(func, upload_dir),
+                input_path,
+                _job_output_dir(job_id),
+                scan_cache=scan_cache,
+                chunk_rows=app.config["SCAN_CHUNK_ROWS"],
+                external=external,
+                spill_dir=app.config["SPILL_FOLDER"],
+                dup_index=dup_index,
+                near=near,
+                output_format=output_format,
+                meta={
+                    "files": [filename],
+                    "dataset": dataset if incremental else None,
+                    "reset": reset_index,
+                },
+                job_id=job_id,
+            )
+        return redirect(url_for("job_view", job_id=job_id))
 
     return render_template(
         "duplicates.html",
@@ -207,26 +439,39 @@ def tax_gap_view():
             )
             return redirect(url_for("tax_gap_view"))
 
+        output_format = _requested_output_format()
+        if output_format is None:
+            flash("Unsupported output format. Please choose CSV, Parquet or Feather.", "error")
+            return redirect(url_for("tax_gap_view"))
+
         scan_name = secure_filename(scan_file.filename)
         rami_name = secure_filename(rami_file.filename)
 
-        scan_path = os.path.join(app.config["UPLOAD_FOLDER"], scan_name)
-        rami_path = os.path.join(app.config["UPLOAD_FOLDER"], rami_name)
+        upload_dir = _new_upload_dir()
+        scan_path = os.path.join(upload_dir, scan_name)
+        rami_path = os.path.join(upload_dir, rami_name)
 
         scan_file.save(scan_path)
         rami_file.save(rami_path)
 
-        try:
-            results, sample_rows = run_tax_gap_check(
-                scan_path,
-                rami_path,
-                app.config["OUTPUT_FOLDER"],
-            )
-            download_filename = results.get("output_filename")
-            flash("Tax gap analysis completed successfully.", "success")
-        except Exception as e:
-            app.logger.exception("Error during tax gap analysis: %s", e)
-            flash(f"Error during tax gap analysis: {e}", "error")
+        job_id = new_job_id()
+        job_queue.submit(
+            "tax_gap",
+            _removing_uploads(run_tax_gap_check, upload_dir),
+            scan_path,
+            rami_path,
+            _job_output_dir(job_id),
+            workers=app.config["TAX_GAP_WORKERS"],
+            scan_cache=scan_cache,
+            rami_cache=rami_cache,
+            chunk_rows=app.config["SCAN_CHUNK_ROWS"],
+            near_match=bool(request.form.get("near_match")),
+            output_format=output_format,
+            meta={"files": [scan_name, rami_name]},
+            track_progress=True,
+            job_id=job_id,
+        )
+        return redirect(url_for("job_view", job_id=job_id))
 
     return render_template(
         "tax_gap.html",
@@ -237,17 +482,108 @@ def tax_gap_view():
     )
 
 
+# ------------------------------------------------------------------
+# Routes: Background jobs (status polling & result pages)
+# ------------------------------------------------------------------
+
+def _yzer_context(stats):
+    return {"result": stats, "download_filename": stats.get("output_filename")}
+
+
+def _tool_results_context(result):
+    # run_duplicates_check / run_tax_gap_check return (results, sample_rows)
+    results, sample_rows = result
+    return {
+        "results": results,
+        "sample_rows": sample_rows,
+        "download_filename": results.get("output_filename"),
+    }
+
+
+# job kind -> template, sidebar tool, success message, error label, result -> context
+JOB_VIEWS = {
+    "yzer": (
+        "prepare_yzer.html",
+        "yzer",
+        "Cleaning completed successfully.",
+        "YZER preparation",
+        _yzer_context,
+    ),
+    "duplicates": (
+        "duplicates.html",
+        "duplicates",
+        "Duplicates check completed successfully.",
+        "duplicates check",
+        _tool_results_context,
+    ),
+    "tax_gap": (
+        "tax_gap.html",
+        "tax_gap",
+        "Tax gap analysis completed successfully.",
+        "tax gap analysis",
+        _tool_results_context,
+    ),
+}
+
+
+@app.route("/jobs/<job_id>")
+def job_view(job_id):
+    """
+    Tool page for one job: while it is queued / running the results card
+    polls the status endpoint; once done it shows the usual results.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        flash("Job not found (it may have expired). Please run the tool again.", "error")
+        return redirect(url_for("home"))
+
+    template, active_tool, done_message, label, to_context = JOB_VIEWS[job.kind]
+    context = {}
+
+    # The outcome is rendered with the page, not flashed: a flash would be
+    # queued again on every reload / back-navigation of the job link
+    if job.status == JOB_DONE:
+        context = to_context(job.result)
+        context["job_message"] = ("success", done_message)
+    elif job.status == JOB_ERROR:
+        app.logger.error("Error during %s (job %s):\n%s", label, job.job_id, job.error_traceback)
+        context["job_message"] = ("error", f"Error during {label}: {job.error}")
+
+    return render_template(
+        template,
+        active_tool=active_tool,
+        job=job,
+        **context,
+    )
+
+
+@app.route("/jobs/<job_id>/status")
+def job_status(job_id):
+    """
+    JSON status of a job, polled by the result pages.
+    ?since=<n> returns only the progress events after the first n.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"job_id": job_id, "status": "unknown"}), 404
+    since = request.args.get("since", default=0, type=int)
+    return jsonify(job.to_dict(progress_since=since))
+
+
 # ------------------------------------------------------------------
 # File download route (for outputs)
 # ------------------------------------------------------------------
 
 @app.route("/download/<path:filename>")
 def download_file(filename):
+    # <job_id>/<result file>; CSV / Parquet / Feather (Flask would guess
+    # octet-stream for the latter two)
     return send_from_directory(
         app.config["OUTPUT_FOLDER"],
         filename,
         as_attachment=True,
-        download_name=filename,
+        download_name=os.path.basename(filename),
+        mimetype=mimetype_for(filename),
     )
 
 
@@ -0,0 +1,86 @@
+# benchmarks/bench_anti_join.py
+"""
+Micro-benchmark: hash anti-join vs merge(indicator=True) for missing-deal
+detection on synthetic scans.
+
+Usage:
+    python benchmarks/bench_anti_join.py [--scan-rows N] [--rami-rows M] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from core.anti_join import anti_join  # noqa: E402
+from core.tax_gap_checker import KEY_COLUMNS  # noqa: E402
+
+
+def _synthetic_scan(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    blocks = rng.integers(1000, 40000, rows)
+    return pd.DataFrame({
+        "block_lot": [f"{b:06d}-{p:04d}-001-00" for b, p in zip(blocks, rng.integers(1, 500, rows))],
+        "sale_day": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 600, rows), unit="D"),
+        "declared_profit": rng.integers(500_000, 5_000_000, rows).astype(float),
+        "sale_profit": rng.integers(500_000, 5_000_000, rows).astype(float),
+        "sold_part": rng.choice([1.0, 0.5, 0.25], rows),
+        "build_year": rng.integers(1950, 2025, rows),
+        "building_mr": rng.integers(30, 250, rows).astype(float),
+        "rooms_number": rng.choice([2.0, 3.0, 3.5, 4.0, 5.0, np.nan], rows),
+        "city": rng.choice(["ירושלים", "חיפה", "תל אביב -יפו", "אופקים"], rows),
+    })
+
+
+def _merge_anti_join(rami: pd.DataFrame, scan: pd.DataFrame) -> pd.DataFrame:
+    # Previous implementation in _gap_for_one_rami
+    scan_keys = scan[KEY_COLUMNS].drop_duplicates()
+    merged = rami.merge(scan_keys, on=KEY_COLUMNS, how="left", indicator=True)
+    return merged[merged["_merge"] == "left_only"].drop(columns=["_merge"])
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scan-rows", type=int, default=1_000_000)
+    parser.add_argument("--rami-rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    scan = _synthetic_scan(args.scan_rows, rng)
+
+    # RAMI: 95% of rows taken from the scan, 5% new deals
+    present = scan.sample(n=int(args.rami_rows * 0.95), random_state=1)
+    absent = _synthetic_scan(args.rami_rows - len(present), rng)
+    rami = pd.concat([present, absent], ignore_index=True)
+
+    merge_s, expected = _best_of(lambda: _merge_anti_join(rami, scan), args.repeat)
+    hash_s, got = _best_of(lambda: anti_join(rami, scan, on=KEY_COLUMNS), args.repeat)
+
+    pd.testing.assert_frame_equal(
+        expected.reset_index(drop=True),
+        got.reset_index(drop=True),
+    )
+
+    print(f"scan {len(scan):,} rows, RAMI {len(rami):,} rows, missing {len(got):,}")
+    print(f"merge + indicator  {merge_s:8.3f} s")
+    print(f"hash anti-join     {hash_s:8.3f} s   ({merge_s / hash_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
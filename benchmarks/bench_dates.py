@@ -0,0 +1,73 @@
+# benchmarks/bench_dates.py
+"""
+Micro-benchmark: core.dates.parse_dates (format detected on a sample,
+each distinct value parsed once) vs pd.to_datetime(dayfirst=True) on a
+sale_day-like column.
+
+Usage:
+    python benchmarks/bench_dates.py [--rows 100000,1000000,5000000] [--days D] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from core.dates import parse_dates  # noqa: E402
+
+
+def _synthetic_dates(rows: int, days: int, rng: np.random.Generator) -> pd.Series:
+    """dd/mm/yyyy text over `days` distinct dates, a few blanks and typos."""
+    values = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    text = pd.Series(values.strftime("%d/%m/%Y"))
+    noise = rng.random(rows)
+    text[noise < 0.01] = None
+    text[(noise >= 0.01) & (noise < 0.011)] = "לא ידוע"
+    return text
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="100000,1000000,5000000")
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for rows in (int(r) for r in args.rows.split(",")):
+        column = _synthetic_dates(rows, args.days, rng)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # "Could not infer format" on the typos
+            infer_s, expected = _best_of(
+                lambda: pd.to_datetime(column, dayfirst=True, errors="coerce"), args.repeat
+            )
+        stats = {}
+        parse_s, got = _best_of(lambda: parse_dates(column, stats), args.repeat)
+
+        pd.testing.assert_series_equal(expected, got)
+
+        print(f"{rows:,} rows, {column.nunique():,} distinct values, paths: {stats}")
+        print(f"  pd.to_datetime     {infer_s:8.3f} s")
+        print(f"  parse_dates        {parse_s:8.3f} s   ({infer_s / parse_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
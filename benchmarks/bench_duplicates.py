@@ -0,0 +1,118 @@
+# benchmarks/bench_duplicates.py
+"""
+Micro-benchmark: single-pass duplicate tagging (row hash + ngroup) vs
+groupby → filter → merge back, on synthetic filtered scans.
+
+Usage:
+    python benchmarks/bench_duplicates.py [--rows 100000,1000000,5000000] [--dup-share F] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from core.duplicates_checker import DUP_KEY_COLUMNS, SCAN_COLUMNS, _tag_duplicates  # noqa: E402
+from core.scan_reader import ROW_COLUMN  # noqa: E402
+
+
+def _synthetic_scan(rows: int, dup_share: float, rng: np.random.Generator) -> pd.DataFrame:
+    """Rows as they look after filtering (latest scan_date, sold_part = 1)."""
+    unique = max(int(rows * (1 - dup_share)), 1)
+    blocks = rng.integers(1000, 40000, unique)
+    base = pd.DataFrame({
+        "block_lot": [f"{b:06d}-{p:04d}-001-00" for b, p in zip(blocks, rng.integers(1, 500, unique))],
+        "sale_day": (
+            pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 600, unique), unit="D")
+        ).strftime("%d/%m/%Y"),
+        "declared_profit": rng.integers(500_000, 5_000_000, unique).astype(float),
+        "sold_part": np.ones(unique),
+        "city": rng.choice(["ירושלים", "חיפה", "תל אביב -יפו", "אופקים"], unique),
+        "build_year": rng.integers(1950, 2025, unique).astype(float),
+        "building_mr": rng.choice([np.nan, 80.0, 95.5, 120.0], unique),
+        "rooms_number": rng.choice([2.0, 3.0, 3.5, 4.0, 5.0, np.nan], unique),
+        "scan_date": "01/10/2025",
+    })
+    # Duplicates: copies of random rows (some copied more than once)
+    extra = base.iloc[rng.integers(0, unique, rows - unique)]
+    df = pd.concat([base, extra], ignore_index=True)
+    df = df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+    df[ROW_COLUMN] = np.arange(len(df), dtype=np.int64)
+    return SCAN_COLUMNS.apply_dtypes(df)
+
+
+def _groupby_merge(df: pd.DataFrame) -> pd.DataFrame:
+    # Previous implementation in run_duplicates_check (steps 5-6)
+    dup_groups = (
+        df.groupby(DUP_KEY_COLUMNS, dropna=False, observed=True)
+        .size()
+        .reset_index(name="dup_count")
+    )
+    dup_groups = dup_groups[dup_groups["dup_count"] > 1].reset_index(drop=True)
+    dup_groups["dup_group_id"] = dup_groups.index + 1
+    dup_rows = df.merge(
+        dup_groups[DUP_KEY_COLUMNS + ["dup_count", "dup_group_id"]],
+        on=DUP_KEY_COLUMNS,
+        how="inner",
+    )
+    dup_rows = dup_rows.sort_values(
+        by=["dup_group_id", "dup_count"],
+        ascending=[True, False],
+        kind="stable",
+    )
+    return dup_rows[[ROW_COLUMN, "dup_count", "dup_group_id"]]
+
+
+def _single_pass(df: pd.DataFrame) -> pd.DataFrame:
+    rows, group_ids, counts = _tag_duplicates(df)
+    return pd.DataFrame({
+        ROW_COLUMN: df[ROW_COLUMN].to_numpy()[rows],
+        "dup_count": counts,
+        "dup_group_id": group_ids,
+    })
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="100000,1000000,5000000")
+    parser.add_argument("--dup-share", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    for rows in (int(r) for r in args.rows.split(",")):
+        df = _synthetic_scan(rows, args.dup_share, rng)
+
+        merge_s, expected = _best_of(lambda: _groupby_merge(df), args.repeat)
+        tag_s, got = _best_of(lambda: _single_pass(df), args.repeat)
+
+        # Same rows, same group ids / counts, same order
+        pd.testing.assert_frame_equal(
+            expected.reset_index(drop=True).astype("int64"),
+            got.astype("int64"),
+        )
+
+        groups = int(got["dup_group_id"].max()) if len(got) else 0
+        print(f"{len(df):,} rows, {groups:,} duplicate groups, {len(got):,} duplicate rows")
+        print(f"  groupby + merge    {merge_s:8.3f} s")
+        print(f"  hash + ngroup      {tag_s:8.3f} s   ({merge_s / tag_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
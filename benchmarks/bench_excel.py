@@ -0,0 +1,255 @@
+# benchmarks/bench_excel.py
+"""
+Micro-benchmark: reading an .xlsx scan through read_scan_table (streamed
+row by row – by calamine when python-calamine is installed, otherwise by
+a read-only openpyxl workbook – with only the selected columns converted,
+in chunks) vs the previous single pd.read_excel call,
+for a few selected columns (as the tax gap / duplicates checks read) and
+for every column (as YZER reads).
+
+Time is the best of --repeat runs; peak memory is the RSS growth during
+one read in a fresh subprocess per engine. Linux only.
+
+Usage:
+    python benchmarks/bench_excel.py [--rows 100000] [--repeat R]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from core import scan_reader  # noqa: E402
+from core.scan_reader import read_scan_table  # noqa: E402
+
+SELECTED = ["block_lot", "sale_day", "declared_profit", "city", "sold_part", "scan_date"]
+
+# The parts of a minimal workbook as Excel saves it: shared strings, a
+# <dimension>, and dates as serial numbers in a date-formatted style
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="scan" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        "</styleSheet>"
+    ),
+}
+_EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+
+def _write_scan(path: str, rows: int, rng: np.random.Generator) -> int:
+    """A synthetic scan sheet (numbers, dates, Hebrew text, blanks); returns its width."""
+    days = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D")
+    columns = {
+        "block_lot": [f"{b:06d}-{p:04d}-001-00" for b, p in zip(
+            rng.integers(1000, 40000, rows), rng.integers(1, 500, rows))],
+        "sale_day": list(days),
+        "deal_date": days.strftime("%d/%m/%Y").tolist(),
+        "declared_profit": rng.integers(300_000, 9_000_000, rows).tolist(),
+        "sale_profit": rng.choice(["1,250,000", "980,000", "--"], rows).tolist(),
+        "full_price": (rng.random(rows) * 5e6).round(2).tolist(),
+        "rooms_number": rng.choice([3, 3.5, 4, 5], rows).tolist(),
+        "city": rng.choice(["ירושלים", "חיפה", "תל אביב -יפו", "אופקים"], rows).tolist(),
+        "street": rng.choice(["הרצל 12, דירה 4", "ביאליק 3", None], rows).tolist(),
+        "property_type": rng.choice(["דירה", "דירת גן", "פנטהאוז"], rows).tolist(),
+        "floor": rng.choice(["1", "2", "קרקע", None], rows).tolist(),
+        "build_year": rng.integers(1950, 2024, rows).tolist(),
+        "building_mr": (rng.random(rows) * 150).round(1).tolist(),
+        "sold_part": rng.choice([1, 0.5], rows).tolist(),
+        "seller": rng.choice(["פרטי", "חברה", None], rows).tolist(),
+        "buyer": rng.choice(["פרטי", "חברה", None], rows).tolist(),
+        "gush": rng.integers(1000, 40000, rows).tolist(),
+        "helka": rng.integers(1, 500, rows).tolist(),
+        "notes": rng.choice(["", "בדיקה", None], rows).tolist(),
+        "scan_date": ["01/10/2025"] * rows,
+    }
+    _write_xlsx(path, columns)
+    return len(columns)
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        letters = chr(ord("A") + rest) + letters
+    return letters
+
+
+def _write_xlsx(path: str, columns: dict) -> None:
+    strings: dict = {}
+    letters = [_column_letter(i) for i in range(len(columns))]
+
+    def cell(ref: str, value) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, str):
+            return f'<c r="{ref}" t="s"><v>{strings.setdefault(value, len(strings))}</v></c>'
+        if isinstance(value, pd.Timestamp):
+            return f'<c r="{ref}" s="1"><v>{(value - _EXCEL_EPOCH).days}</v></c>'
+        return f'<c r="{ref}"><v>{value}</v></c>'
+
+    header = list(columns)
+    rows = [header] + [list(row) for row in zip(*columns.values())]
+    sheet = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        f'<dimension ref="A1:{letters[-1]}{len(rows)}"/><sheetData>'
+    ]
+    for r, row in enumerate(rows, start=1):
+        cells = "".join(cell(f"{letters[c]}{r}", v) for c, v in enumerate(row))
+        sheet.append(f'<row r="{r}">{cells}</row>')
+    sheet.append("</sheetData></worksheet>")
+    shared = "".join(f"<si><t>{escape(text)}</t></si>" for text in strings)
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, xml in _XLSX_PARTS.items():
+            z.writestr(name, xml)
+        z.writestr("xl/worksheets/sheet1.xml", "".join(sheet))
+        z.writestr(
+            "xl/sharedStrings.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{len(strings)}" '
+            f'uniqueCount="{len(strings)}">{shared}</sst>',
+        )
+
+
+def _legacy(path: str, usecols):
+    # Previous Excel branch of read_scan_table
+    return pd.read_excel(path, usecols=usecols, dtype=str)
+
+
+def _streamed(path: str, usecols):
+    return read_scan_table(path, usecols=usecols, dtype=str)[0]
+
+
+ENGINES = {"legacy": _legacy, "streamed": _streamed}
+SELECTIONS = {"selected": SELECTED, "all": None}
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _peak_rss_mb(engine: str, selection: str, path: str) -> float:
+    """Run one read in a fresh interpreter; peak RSS growth in MB."""
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", engine, "--select", selection, "--scan", path],
+        check=True, capture_output=True, text=True,
+    )
+    return float(out.stdout.strip())
+
+
+def _child(engine: str, selection: str, path: str) -> None:
+    baseline = _rss_mb()
+    peak = [baseline]
+    done = threading.Event()
+
+    def poll():
+        while not done.is_set():
+            peak[0] = max(peak[0], _rss_mb())
+            time.sleep(0.002)
+
+    watcher = threading.Thread(target=poll, daemon=True)
+    watcher.start()
+    ENGINES[engine](path, SELECTIONS[selection])
+    done.set()
+    watcher.join()
+    print(peak[0] - baseline)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--child", choices=sorted(ENGINES), help=argparse.SUPPRESS)
+    parser.add_argument("--select", choices=sorted(SELECTIONS), help=argparse.SUPPRESS)
+    parser.add_argument("--scan", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.select, args.scan)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.xlsx")
+        width = _write_scan(path, args.rows, np.random.default_rng(42))
+        engine = "calamine" if scan_reader.python_calamine is not None else "openpyxl"
+        print(f"{args.rows:,} rows x {width} columns ({os.path.getsize(path) / 1e6:.1f} MB .xlsx), {engine}")
+
+        for selection, usecols in SELECTIONS.items():
+            legacy_s, expected = _best_of(lambda: _legacy(path, usecols), args.repeat)
+            streamed_s, got = _best_of(lambda: _streamed(path, usecols), args.repeat)
+            pd.testing.assert_frame_equal(expected, got)
+
+            legacy_mb = _peak_rss_mb("legacy", selection, path)
+            streamed_mb = _peak_rss_mb("streamed", selection, path)
+
+            print(f"  {selection} columns ({len(got.columns)}):")
+            print(f"    pd.read_excel   {legacy_s:8.3f} s   peak +{legacy_mb:8.1f} MB")
+            print(
+                f"    streamed        {streamed_s:8.3f} s   peak +{streamed_mb:8.1f} MB"
+                f"   ({legacy_s / streamed_s:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
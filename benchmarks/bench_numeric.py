@@ -0,0 +1,108 @@
+# benchmarks/bench_numeric.py
+"""
+Micro-benchmark: one-pass numeric cleaning (core.numeric.to_number) vs the
+previous chained .str.replace calls, per million cells, for Arrow-backed
+and object text columns. Reports best time and the peak of Python / numpy
+allocations (tracemalloc, measured in a separate untimed run).
+
+Usage:
+    python benchmarks/bench_numeric.py [--cells 1000000] [--repeat R]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from core.numeric import to_number  # noqa: E402
+
+
+def _synthetic_column(cells: int, rng: np.random.Generator) -> pd.Series:
+    """declared_profit-like text: thousands separators, RTL marks, blanks."""
+    values = rng.integers(100_000, 9_000_000, cells)
+    text = pd.Series([f"{v:,}" for v in values])
+    marks = rng.random(cells)
+    text[marks < 0.05] = "\u200f" + text[marks < 0.05]
+    text[(marks >= 0.05) & (marks < 0.08)] = ""
+    text[(marks >= 0.08) & (marks < 0.10)] = np.nan
+    return text
+
+
+def _chained(series: pd.Series) -> pd.Series:
+    # Previous implementation in tax_gap_checker._clean_numeric_and_dates
+    series = series.astype(str)
+    series = (
+        series.str.replace(",", "", regex=False)
+        .str.replace(" ", "", regex=False)
+        .str.replace("\u200f", "", regex=False)
+        .str.replace("\u200e", "", regex=False)
+    )
+    return pd.to_numeric(series, errors="coerce")
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _peak_mb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cells", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    raw = _synthetic_column(args.cells, rng)
+    per_million = 1_000_000 / args.cells
+
+    for label, dtype in (("arrow", "str"), ("object", object)):
+        try:
+            column = raw.astype(dtype)
+        except (ImportError, TypeError):
+            print(f"{label}: not available with this pandas")
+            continue
+
+        chained_s, expected = _best_of(lambda: _chained(column), args.repeat)
+        one_pass_s, got = _best_of(lambda: to_number(column), args.repeat)
+        pd.testing.assert_series_equal(expected, got)
+
+        chained_mb = _peak_mb(lambda: _chained(column))
+        one_pass_mb = _peak_mb(lambda: to_number(column))
+
+        print(f"{label} text ({column.dtype}), per 1M cells:")
+        print(f"  chained replace  {chained_s * per_million:8.3f} s   peak {chained_mb * per_million:8.1f} MB")
+        print(
+            f"  one pass         {one_pass_s * per_million:8.3f} s   peak {one_pass_mb * per_million:8.1f} MB"
+            f"   ({chained_s / one_pass_s:.1f}x)"
+        )
+
+    numeric = pd.Series(rng.random(args.cells) * 1e6)
+    skip_s, _ = _best_of(lambda: to_number(numeric), args.repeat)
+    chained_s, _ = _best_of(lambda: _chained(numeric), args.repeat)
+    print("already numeric (float64), per 1M cells:")
+    print(f"  chained replace  {chained_s * per_million:8.3f} s")
+    print(f"  one pass (skip)  {skip_s * per_million:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_rami_html.py
+"""
+Compare the streaming lxml RAMI parser with the pandas.read_html path
+(read_html + column renaming/typing, which the streaming parser does inline).
+
+Usage:
+    python benchmarks/bench_rami_html.py [RAMI_DIR] [--repeat N] [--scale K]
+
+RAMI_DIR defaults to outputs/_rami_zip_tmp. --scale K repeats each file's
+table rows K times to simulate the bigger exports (tens of thousands of deals).
+"""
+
+import argparse
+import glob
+import io
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from core.rami_html_parser import parse_rami_html_table  # noqa: E402
+from core.tax_gap_checker import _clean_numeric_and_dates, _normalize_columns  # noqa: E402
+
+
+def _scaled(raw: bytes, scale: int) -> bytes:
+    if scale <= 1:
+        return raw
+    text = raw.decode("utf-8-sig")
+    rows = re.findall(r"<tr>\s*<td.*?</tr>", text, flags=re.DOTALL)
+    if not rows:
+        return raw
+    body = "".join(rows)
+    return text.replace(body, body * scale, 1).encode("utf-8")
+
+
+def _read_html(raw: bytes) -> pd.DataFrame:
+    # Previous path: read_html, then rename + type the columns afterwards
+    df = pd.read_html(io.StringIO(raw.decode("utf-8-sig")))[0]
+    return _clean_numeric_and_dates(_normalize_columns(df))
+
+
+def _streaming(raw: bytes) -> pd.DataFrame:
+    return parse_rami_html_table(io.BytesIO(raw), encoding="utf-8")
+
+
+def _measure(fn, payloads, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for raw in payloads:
+            fn(raw)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    for raw in payloads:
+        fn(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("rami_dir", nargs="?", default=os.path.join(ROOT, "outputs", "_rami_zip_tmp"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.rami_dir, "*.xls")))
+    if not paths:
+        sys.exit(f"No .xls files found in {args.rami_dir}")
+
+    payloads = []
+    for path in paths:
+        with open(path, "rb") as f:
+            payloads.append(_scaled(f.read(), args.scale))
+
+    rows = sum(len(_streaming(raw)) for raw in payloads)
+    print(f"{len(payloads)} files, {rows} deals (scale x{args.scale})")
+
+    for label, fn in (("pandas.read_html", _read_html), ("lxml iterparse", _streaming)):
+        seconds, peak = _measure(fn, payloads, args.repeat)
+        print(f"{label:18s} {seconds:8.3f} s   peak {peak / 1e6:8.1f} MB   {rows / seconds:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
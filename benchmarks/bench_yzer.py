@@ -0,0 +1,178 @@
+# benchmarks/bench_yzer.py
+"""
+Micro-benchmark: YZER steps 1.5 – 6 column by column (_prepare_columns) vs
+the previous whole-frame passes (df == "--", df.replace, per-step loops,
+global placeholder replace), on synthetic scans read as text.
+
+Time is the best of --repeat runs in this process; peak memory is the
+RSS growth over the loaded scan during one run (polled every 2 ms) in a
+fresh subprocess per engine, output CSV included. Linux only.
+
+Usage:
+    python benchmarks/bench_yzer.py [--rows 100000,1000000] [--repeat R]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from core import prepare_yzer  # noqa: E402
+from core.prepare_yzer import DATE_TARGETS, NUMERIC_TARGETS  # noqa: E402
+
+PLACEHOLDERS = [np.nan, "nan", "NaN", "NAN", "None", "NaT", "nat", "NAT"]
+
+
+def _synthetic_scan(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """A scan as read for YZER: every column text, with '--', blanks and commas."""
+    def pick(values, blanks=0.02):
+        col = pd.Series(rng.choice(values, rows), dtype="str")
+        col[rng.random(rows) < blanks] = np.nan
+        return col
+
+    days = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D")
+    profits = rng.integers(300_000, 9_000_000, rows)
+    return pd.DataFrame({
+        "block_lot": pd.Series([f"{b:06d}-{p:04d}-001-00" for b, p in zip(
+            rng.integers(1000, 40000, rows), rng.integers(1, 500, rows))], dtype="str"),
+        "sale_day": pd.Series(days.strftime("%d/%m/%Y"), dtype="str"),
+        "deal_date": pd.Series(days.strftime("%d/%m/%Y"), dtype="str"),
+        "declared_profit": pd.Series([f"{p:,}" for p in profits], dtype="str"),
+        "sale_profit": pick(["1,250,000", "980,000", "--", "2,400,000 ₪"]),
+        "full_price": pick(["1250000", "980000", "--"]),
+        "rooms_number": pick(["3", "3.5", "4", "--"]),
+        "city": pick(["ירושלים", "חיפה", "תל אביב -יפו", "אופקים"]),
+        "street": pick(["הרצל 12, דירה 4", "ביאליק 3", "--", "None"]),
+        "property_type": pick(["דירה", "דירת גן", "פנטהאוז"]),
+        "floor": pick(["1", "2", "קרקע", "--"], blanks=0.2),
+        "build_year": pick(["1970", "1995", "2012", "nan"]),
+        "building_mr": pick(["80", "95.5", "120"], blanks=0.3),
+        "sold_part": pick(["1", "0.5"]),
+        "scan_date": pd.Series(["01/10/2025"] * rows, dtype="str"),
+    })
+
+
+def _legacy(df: pd.DataFrame) -> pd.DataFrame:
+    # Previous implementation in run_yzer_preparation (steps 1.5 – 6). Text
+    # columns are tested as in _prepare_columns (object *or* str dtype), so
+    # both engines apply the same rules under pandas 3.
+    dash_mask = df == "--"
+    dash_count = int(dash_mask.sum().sum())
+    if dash_count:
+        df = df.replace("--", 0)
+
+    ci_map = {col.lower(): col for col in df.columns}
+    for target in NUMERIC_TARGETS:
+        if target in ci_map:
+            df[ci_map[target]] = prepare_yzer.to_number(df[ci_map[target]], digits_only=True)
+    for target in DATE_TARGETS:
+        if target in ci_map:
+            df[ci_map[target]] = prepare_yzer.parse_dates(df[ci_map[target]])
+
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            continue
+        if prepare_yzer._is_text(series):
+            text = series.astype(str)
+            text.str.contains(",", na=False).sum()
+            df[col] = text.str.replace(",", " ", regex=False)
+
+    if "scan_date" in ci_map:
+        df = df.drop(columns=[ci_map["scan_date"]])
+    return df.replace(PLACEHOLDERS, "", regex=False)
+
+
+def _fused(df: pd.DataFrame) -> pd.DataFrame:
+    return prepare_yzer._prepare_columns(df)[0]
+
+
+ENGINES = {"legacy": _legacy, "fused": _fused}
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _peak_rss_mb(engine: str, scan_path: str) -> float:
+    """Run one engine once in a fresh interpreter; peak RSS growth in MB."""
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", engine, "--scan", scan_path],
+        check=True, capture_output=True, text=True,
+    )
+    return float(out.stdout.strip())
+
+
+def _child(engine: str, scan_path: str) -> None:
+    df = pd.read_parquet(scan_path)
+    baseline = _rss_mb()
+    peak = [baseline]
+    done = threading.Event()
+
+    def poll():
+        while not done.is_set():
+            peak[0] = max(peak[0], _rss_mb())
+            time.sleep(0.002)
+
+    watcher = threading.Thread(target=poll, daemon=True)
+    watcher.start()
+    ENGINES[engine](df).to_csv(os.devnull, index=False)
+    done.set()
+    watcher.join()
+    print(peak[0] - baseline)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", default="100000,1000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", choices=sorted(ENGINES), help=argparse.SUPPRESS)
+    parser.add_argument("--scan", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.scan)
+        return
+
+    for rows in (int(r) for r in args.rows.split(",")):
+        df = _synthetic_scan(rows, np.random.default_rng(42))
+
+        legacy_s, expected = _best_of(lambda: _legacy(df.copy()), args.repeat)
+        fused_s, got = _best_of(lambda: _fused(df.copy()), args.repeat)
+
+        # Byte-identical output file
+        assert expected.to_csv(index=False) == got.to_csv(index=False)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            scan_path = os.path.join(tmp, "scan.parquet")
+            df.to_parquet(scan_path)
+            legacy_mb = _peak_rss_mb("legacy", scan_path)
+            fused_mb = _peak_rss_mb("fused", scan_path)
+
+        print(f"{rows:,} rows x {len(df.columns)} columns")
+        print(f"  whole-frame passes  {legacy_s:8.3f} s   peak +{legacy_mb:8.1f} MB")
+        print(f"  column by column    {fused_s:8.3f} s   peak +{fused_mb:8.1f} MB   ({legacy_s / fused_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
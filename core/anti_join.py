@@ -0,0 +1,144 @@
+# core/anti_join.py
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(z: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer – spreads every input bit over the 64-bit hash."""
+    z = z ^ (z >> np.uint64(30))
+    z = z * np.uint64(0xBF58476D1CE4E5B9)
+    z = z ^ (z >> np.uint64(27))
+    z = z * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _normalized_keys(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    on: List[str],
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Bring the key columns of both sides to one 8-byte representation per
+    kind so that values merge() considers equal are also bitwise equal:
+      - numbers → float64 (int 3 vs float 3.0, -0.0 vs 0.0, one NaN payload)
+      - datetimes → int64 nanoseconds (unit differences)
+      - anything else → int64 codes from one factorization of both sides
+        (object vs string dtype; missing values share code -1)
+    """
+    left_out: Dict[str, np.ndarray] = {}
+    right_out: Dict[str, np.ndarray] = {}
+
+    for col in on:
+        l_series, r_series = left[col], right[col]
+        kinds = (_kind(l_series), _kind(r_series))
+
+        if kinds == ("date", "date"):
+            left_out[col] = l_series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+            right_out[col] = r_series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        elif kinds == ("num", "num"):
+            left_out[col] = _float_keys(l_series)
+            right_out[col] = _float_keys(r_series)
+        else:
+            values = np.concatenate([
+                l_series.to_numpy(dtype=object),
+                r_series.to_numpy(dtype=object),
+            ])
+            codes, _ = pd.factorize(values, use_na_sentinel=True)
+            left_out[col] = codes[:len(l_series)].astype(np.int64)
+            right_out[col] = codes[len(l_series):].astype(np.int64)
+
+    return left_out, right_out
+
+
+def _kind(series: pd.Series) -> str:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "date"
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return "num"
+    return "other"
+
+
+def _float_keys(series: pd.Series) -> np.ndarray:
+    values = series.to_numpy(dtype="float64", na_value=np.nan) + 0.0
+    values[np.isnan(values)] = np.nan
+    return values
+
+
+def row_hashes(keys: Dict[str, np.ndarray]) -> np.ndarray:
+    """One combined 64-bit hash per row of a normalized key set (8-byte columns)."""
+    h = None
+    for values in keys.values():
+        col = _mix(values.view(np.uint64))
+        if h is None:
+            h = col
+        else:
+            h = _mix(h ^ (col + _GOLDEN + (h << np.uint64(6)) + (h >> np.uint64(2))))
+    return h
+
+
+def _rows_equal(left: Dict[str, np.ndarray], right: Dict[str, np.ndarray]) -> np.ndarray:
+    """Row-wise equality of aligned key sets (NaN equal to NaN, as in merge)."""
+    equal = None
+    for col, a in left.items():
+        b = right[col]
+        same = a == b
+        if a.dtype.kind == "f":
+            same |= np.isnan(a) & np.isnan(b)
+        equal = same if equal is None else equal & same
+    return equal
+
+
+def _take(keys: Dict[str, np.ndarray], rows: np.ndarray) -> Dict[str, np.ndarray]:
+    return {col: values[rows] for col, values in keys.items()}
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def anti_join(left: pd.DataFrame, right: pd.DataFrame, on: List[str]) -> pd.DataFrame:
+    """
+    Rows of `left` whose `on` key tuple does not appear in `right` – the same
+    rows as merge(how="left", indicator=True) filtered to "left_only", but
+    without materializing the merged frame.
+
+    Each row's key tuple is hashed once into a 64-bit value; a hash hit is
+    confirmed by comparing the actual key values, and the rare unconfirmed
+    hits (hash collisions) are settled with an exact merge on just those rows.
+    """
+    if left.empty or right.empty:
+        return left.copy()
+
+    left_keys, right_keys = _normalized_keys(left, right, on)
+
+    right_hashes, first = np.unique(row_hashes(right_keys), return_index=True)
+    left_hashes = row_hashes(left_keys)
+
+    pos = np.searchsorted(right_hashes, left_hashes)
+    pos[pos == len(right_hashes)] = 0
+    hit = np.flatnonzero(right_hashes[pos] == left_hashes)
+
+    missing = np.ones(len(left), dtype=bool)
+    if len(hit):
+        candidates = first[pos[hit]]
+        confirmed = _rows_equal(_take(left_keys, hit), _take(right_keys, candidates))
+        missing[hit[confirmed]] = False
+
+        suspects = hit[~confirmed]
+        if len(suspects):
+            probe = pd.DataFrame(_take(left_keys, suspects))
+            pool = pd.DataFrame(right_keys).drop_duplicates()
+            merged = probe.merge(pool, on=on, how="left", indicator=True)
+            missing[suspects] = (merged["_merge"] == "left_only").to_numpy()
+
+    return left.iloc[np.flatnonzero(missing)]
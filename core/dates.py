@@ -0,0 +1,136 @@
+# core/dates.py
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------
+# Configuration
+# --------------------------------------
+
+# Formats tried on a sample, day first (the files are Israeli); the one that
+# parses the most sampled values is used for the whole column
+DATE_FORMATS: List[str] = [
+    "%d/%m/%Y",
+    "%d.%m.%Y",
+    "%d-%m-%Y",
+    "%d/%m/%y",
+    "%d.%m.%y",
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+]
+
+DEFAULT_SAMPLE_SIZE = 1000
+
+# Resolution pd.to_datetime gives parsed text (ns on pandas 2, us on 3)
+_DATETIME_DTYPE = pd.to_datetime(pd.Series(["2000-01-01"])).dtype
+_NAT = np.datetime64("NaT")
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+def detect_format(values: Sequence[str], formats: Sequence[str] = DATE_FORMATS) -> Optional[str]:
+    """The format parsing the most of `values` (ties: earliest in formats); None if none fits."""
+    sample = pd.Series(list(values), dtype=object)
+    best, best_hits = None, 0
+    for fmt in formats:
+        hits = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+    return best
+
+
+def _parse_unique(
+    values: np.ndarray,
+    formats: Sequence[str],
+    sample_size: int,
+) -> Dict[str, Any]:
+    """
+    Parse distinct values: the detected format, then the other known
+    formats, and per-value inference only for what none of them fits.
+    """
+    is_text = np.array([isinstance(v, str) for v in values], dtype=bool)
+    is_date = np.array([isinstance(v, (date, np.datetime64)) for v in values], dtype=bool)
+    parsed = np.full(len(values), _NAT, dtype=_DATETIME_DTYPE)
+    inferred = np.zeros(len(values), dtype=bool)
+
+    # Values that are dates already (e.g. cells of an Excel sheet); other
+    # non-text values (numbers) are no dates
+    if is_date.any():
+        native = pd.to_datetime(pd.Series(values[is_date], dtype=object), errors="coerce")
+        parsed[is_date] = native.to_numpy(dtype=_DATETIME_DTYPE)
+
+    text = pd.Series(values[is_text], dtype=object).str.strip()
+    fmt = detect_format(text.iloc[:sample_size], formats) if len(text) else None
+    fixed = pd.Series(_NAT, index=text.index, dtype=_DATETIME_DTYPE)
+    residue = text != ""
+
+    # Detected format on everything, then the other formats on what is left
+    ordered = ([fmt] if fmt else []) + [f for f in formats if f != fmt]
+    for candidate in ordered:
+        if not residue.any():
+            break
+        got = pd.to_datetime(text[residue], format=candidate, errors="coerce")
+        fixed[got.index] = got
+        residue &= fixed.isna()
+
+    if residue.any():
+        fixed[residue] = pd.to_datetime(text[residue], format="mixed", dayfirst=True, errors="coerce")
+    parsed[is_text] = fixed.to_numpy(dtype=_DATETIME_DTYPE)
+    inferred[np.flatnonzero(is_text)[residue.to_numpy()]] = True
+
+    return {"parsed": parsed, "inferred": inferred, "format": fmt}
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def parse_dates(
+    series: pd.Series,
+    stats: Optional[Dict[str, Any]] = None,
+    formats: Sequence[str] = DATE_FORMATS,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+) -> pd.Series:
+    """
+    Day-first date parsing of a column, unparsable values → NaT (what
+    pd.to_datetime(dayfirst=True, errors="coerce") is used for elsewhere).
+
+    Every distinct value is parsed once; the dominant format is detected on
+    a sample of them and applied vectorized (ISO dates are read as ISO, not
+    day first), and only values no known format fits are inferred one by
+    one. If `stats` is given it is filled with the detected format and the
+    number of values that took each path:
+      fixed (a known format, or already a date), inferred, invalid, missing.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if stats is not None:
+            missing = int(series.isna().sum())
+            stats.update(format=None, fixed=int(len(series) - missing), inferred=0, invalid=0, missing=missing)
+        return series
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    values = np.asarray(uniques, dtype=object)
+    result = _parse_unique(values, formats, sample_size)
+
+    parsed_unique = np.append(result["parsed"], _NAT)  # code -1 → NaT
+    parsed = pd.Series(parsed_unique[codes], index=series.index, name=series.name)
+
+    if stats is not None:
+        counts = np.bincount(codes + 1, minlength=len(values) + 1)
+        missing, per_value = int(counts[0]), counts[1:]
+        ok = ~np.isnat(result["parsed"])
+        stats.update(
+            format=result["format"],
+            fixed=int(per_value[ok & ~result["inferred"]].sum()),
+            inferred=int(per_value[ok & result["inferred"]].sum()),
+            invalid=int(per_value[~ok].sum()),
+            missing=missing,
+        )
+    return parsed
@@ -0,0 +1,175 @@
+# core/dup_index.py
+
+import json
+import os
+import tempfile
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# --------------------------------------
+# Configuration
+# --------------------------------------
+
+# Stands in for a missing key value, so all missing values hash alike
+_MISSING = "\x00"
+
+_NOT_SEEN = np.datetime64("NaT", "D")
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+def key_hashes(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """
+    Stable 64-bit hash of each row's key tuple – the same in every run and
+    process (unlike factorize codes), so it can be kept on disk.
+
+    Values are compared as text, except numbers: "3", "3.0" and 3.0 hash
+    alike, whether a column was read as text or inferred as numeric.
+    """
+    canon = pd.DataFrame(index=df.index)
+    for col in columns:
+        text = df[col].astype(object)
+        numbers = pd.to_numeric(text, errors="coerce").astype("float64")
+        canon[col] = text.where(numbers.isna(), numbers.astype(str)).fillna(_MISSING)
+    return pd.util.hash_pandas_object(canon, index=False).to_numpy()
+
+
+# --------------------------------------
+# Index
+# --------------------------------------
+
+class DuplicateIndex:
+    """
+    Persistent index of the key hashes seen in earlier scans, with the first
+    scan_date each key appeared on. A new scan is checked against the whole
+    history by hashing only its own rows.
+
+    Stored as <index_dir>/<name>.npz (sorted hashes + first scan dates) and
+    <name>.json (rows indexed per scan date); one index per dataset `name`,
+    so unrelated scans (other regions / sources) never match each other.
+    State is shared by the jobs of one process; the index is not meant to
+    be written by several processes.
+    """
+
+    def __init__(self, index_dir: str, name: str = "scans"):
+        self.index_dir = index_dir
+        self.name = name
+        os.makedirs(index_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._hashes: np.ndarray = np.empty(0, dtype=np.uint64)
+        self._first_seen: np.ndarray = np.empty(0, dtype="datetime64[D]")
+        self._scan_dates: Dict[str, int] = {}
+        self._load()
+
+    @property
+    def _data_path(self) -> str:
+        return os.path.join(self.index_dir, self.name + ".npz")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, self.name + ".json")
+
+    def __len__(self) -> int:
+        return int(len(self._hashes))
+
+    def scan_dates(self) -> List[str]:
+        """Scan dates (ISO) whose rows have been added, oldest first."""
+        with self._lock:
+            return sorted(self._scan_dates)
+
+    def reset(self) -> None:
+        """Forget every key and scan date (the files on disk are removed)."""
+        with self._lock:
+            self._hashes = np.empty(0, dtype=np.uint64)
+            self._first_seen = np.empty(0, dtype="datetime64[D]")
+            self._scan_dates = {}
+            for path in (self._data_path, self._meta_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def lookup(self, hashes: np.ndarray) -> np.ndarray:
+        """First scan date (datetime64[D]) of each hash; NaT if never seen."""
+        with self._lock:
+            known, first_seen = self._hashes, self._first_seen
+        result = np.full(len(hashes), _NOT_SEEN)
+        if len(known) == 0 or len(hashes) == 0:
+            return result
+        pos = np.searchsorted(known, hashes)
+        pos[pos == len(known)] = 0
+        hit = known[pos] == hashes
+        result[hit] = first_seen[pos[hit]]
+        return result
+
+    def add(self, hashes: np.ndarray, scan_date: date) -> int:
+        """
+        Record the rows of one scan date. Keys already known keep the
+        earliest date they were seen on. Returns the number of new keys.
+        """
+        day = np.datetime64(scan_date, "D")
+        incoming = np.unique(hashes.astype(np.uint64))
+
+        with self._lock:
+            known, first_seen = self._hashes, self._first_seen.copy()
+
+            pos = np.searchsorted(known, incoming)
+            pos[pos == len(known)] = 0
+            found = (known[pos] == incoming) if len(known) else np.zeros(len(incoming), dtype=bool)
+            first_seen[pos[found]] = np.minimum(first_seen[pos[found]], day)
+
+            fresh = incoming[~found]
+            merged = np.concatenate([known, fresh])
+            merged_first = np.concatenate([first_seen, np.full(len(fresh), day)])
+            order = np.argsort(merged, kind="stable")
+
+            self._hashes = merged[order]
+            self._first_seen = merged_first[order]
+            self._scan_dates[day.astype(str)] = int(len(hashes))
+            self._save()
+
+        return int(len(fresh))
+
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with np.load(self._data_path) as data:
+                hashes = data["hashes"]
+                first_seen = data["first_seen"]
+        except Exception:
+            # Unreadable index – start over rather than fail every run
+            return
+        self._hashes = hashes.astype(np.uint64)
+        self._first_seen = first_seen.astype("datetime64[D]")
+        self._scan_dates = dict(meta.get("scan_dates", {}))
+
+    def _save(self) -> None:
+        self._atomic_write(
+            self._data_path,
+            lambda f: np.savez(f, hashes=self._hashes, first_seen=self._first_seen),
+        )
+        meta: Dict[str, Any] = {"keys": len(self._hashes), "scan_dates": self._scan_dates}
+        payload = json.dumps(meta, indent=2).encode("utf-8")
+        self._atomic_write(self._meta_path, lambda f: f.write(payload))
+
+    def _atomic_write(self, path: str, write: Callable[[Any], None]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
@@ -1,11 +1,36 @@
 # core/duplicates_checker.py
 
 import os
+import pickle
+import tempfile
 from datetime import date
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Callable, Dict, Any, List, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 
+from core.anti_join import row_hashes
+from core.dates import parse_dates
+from core.dup_index import DuplicateIndex, key_hashes
+from core.frame_cache import CACHE_MISS, CACHE_OFF, FrameCache, cached_read
+from core.near_match import LEFT_ROW, RIGHT_ROW, SCORE, NearMatchRules, near_pairs
+from core.result_writer import (
+    CSV,
+    DEFAULT_OUTPUT_FORMAT,
+    ResultWriter,
+    check_output_format,
+    result_filename,
+    write_result,
+)
+from core.scan_reader import (
+    DEFAULT_CHUNK_ROWS,
+    ROW_COLUMN,
+    ScanColumns,
+    read_scan_rows,
+    read_scan_table,
+    with_row_positions,
+)
+
 
 # ----------------------------------------------------------------------
 # Configuration
@@ -24,27 +49,231 @@ DUP_KEY_COLUMNS: List[str] = [
     "scan_date",
 ]
 
+# מפתח ההשוואה מול סריקות קודמות (מצב incremental) – אותו מפתח בלי scan_date
+CROSS_DATE_KEY_COLUMNS: List[str] = [c for c in DUP_KEY_COLUMNS if c != "scan_date"]
+
+# מצב near-duplicates: שורות שכמעט זהות – אותו גוש-חלקה (מנורמל), sale_day
+# בהפרש של עד יום, building_mr / declared_profit בהפרש עיגול, ושאר המפתח זהה
+DUP_NEAR_RULES = NearMatchRules(
+    block_column="block_lot",
+    date_column="sale_day",
+    date_tolerance_days=1,
+    numeric_tolerances={"building_mr": 1.0, "declared_profit": 1.0},
+    exact=["sold_part", "city", "build_year", "rooms_number", "scan_date"],
+)
+
+# מספר קבצי ה-spill במצב external (חלוקה לפי hash של מפתח הכפילות)
+DEFAULT_SPILL_PARTITIONS = 64
+
+# עמודות שנכתבות כתאריכים בקבצי Parquet / Feather (ב-CSV – הטקסט המקורי)
+OUTPUT_DATE_COLUMNS = {"sale_day", "scan_date", "first_scan_date"}
+
+# רק עמודות המפתח נטענות לזיכרון, בטיפוסים חסכוניים. sale_day נשמר כטקסט
+# (category) ולא כתאריך – כפילות נקבעת לפי הערך המקורי בקובץ.
+SCAN_COLUMNS = ScanColumns(
+    required=DUP_KEY_COLUMNS,
+    dtypes={
+        "city": "category",
+        "sale_day": "category",
+        "scan_date": "category",
+        "sold_part": "float32",
+        "build_year": "float32",
+        "rooms_number": "float32",
+    },
+)
+
 
 # ----------------------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------------------
 
-def _read_scan_file(scan_path: str) -> pd.DataFrame:
+def _parse_scan_dates(series: pd.Series) -> pd.Series:
+    return parse_dates(series)
+
+
+def _infer_dtypes(df: pd.DataFrame) -> pd.DataFrame:
     """
-    קורא את קובץ הסריקה (CSV / Excel) ומחזיר DataFrame.
-    אין כאן ניקוי או המרה – רק טעינה.
+    השורות נקראות כטקסט (כדי שכל chunk יקבל אותם טיפוסים) – כאן מסיקים
+    טיפוסים מחדש, רק על השורות שנשארו אחרי הסינון: עמודה שכל ערכיה (שאינם
+    חסרים) מספריים הופכת למספרים, כמו ב-read_csv. אחר כך ממירים לטיפוסים
+    שהוגדרו ב-SCAN_COLUMNS.
     """
-    ext = os.path.splitext(scan_path)[1].lower()
+    for col in df.columns:
+        values = df[col]
+        if not pd.api.types.is_string_dtype(values):
+            continue
+        numbers = pd.to_numeric(values, errors="coerce")
+        if (numbers.notna() | values.isna()).all():
+            df[col] = numbers
+    return SCAN_COLUMNS.apply_dtypes(df)
 
-    if ext == ".csv":
-        # לא מכריח dtype=str – נותן לפנדהס לנחש, אנחנו נטפל בעמודות החשובות ידנית
-        df = pd.read_csv(scan_path)
-    elif ext in (".xls", ".xlsx", ".xlsm"):
-        df = pd.read_excel(scan_path)
-    else:
+
+def _latest_scan_date(
+    scan_path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Tuple[pd.Timestamp, Dict[str, Any]]:
+    """
+    מעבר 1 על הקובץ: רק עמודות המפתח – בדיקת עמודות ומציאת ה-scan_date
+    האחרון. מחזיר (latest_scan_ts, info של הקריאה); info['scan_dates'] –
+    כל הימים (ISO) שמופיעים בקובץ.
+    """
+    ext = os.path.splitext(scan_path)[1].lower()
+    if ext not in (".csv", ".xls", ".xlsx", ".xlsm"):
         raise ValueError(f"Unsupported file type for duplicates check: {ext}")
 
-    return df
+    def _scan_dates(chunk: pd.DataFrame) -> pd.DataFrame:
+        _ensure_required_columns(chunk)
+        parsed = _parse_scan_dates(chunk["scan_date"]).dropna()
+        return pd.DataFrame({"scan_date": parsed.unique()})
+
+    dates, info = read_scan_table(
+        scan_path,
+        process=_scan_dates,
+        usecols=SCAN_COLUMNS.usecols(),
+        dtype=str,
+        chunk_rows=chunk_rows,
+    )
+    if info["rows_read"] == 0:
+        _ensure_required_columns(pd.DataFrame(columns=info["column_names"]))
+    if dates.empty:
+        raise ValueError("Could not parse any valid dates in 'scan_date' column.")
+
+    info["scan_dates"] = sorted({ts.date().isoformat() for ts in dates["scan_date"]})
+    return dates["scan_date"].max(), info
+
+
+def _latest_rows(chunk: pd.DataFrame, latest_scan_ts: pd.Timestamp) -> pd.DataFrame:
+    """השורות של ה-scan_date האחרון עם sold_part == 1 (+ ROW_COLUMN)."""
+    sold_numeric = pd.to_numeric(chunk["sold_part"], errors="coerce")
+    mask = (_parse_scan_dates(chunk["scan_date"]) == latest_scan_ts) & (sold_numeric == 1)
+    return with_row_positions(chunk.loc[mask])
+
+
+def _read_latest_scan_rows(
+    scan_path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    קורא את קובץ הסריקה (CSV / Excel) ב-chunks ומחזיר רק את השורות
+    הרלוונטיות לבדיקה: scan_date == התאריך האחרון ו-sold_part == 1.
+    נטענות רק עמודות המפתח + ROW_COLUMN (מיקום השורה בקובץ), כדי שאפשר
+    יהיה לשלוף אחר כך את השורה המלאה לייצוא.
+
+      מעבר 1: בדיקת עמודות ומציאת ה-scan_date האחרון.
+      מעבר 2: סינון כל chunk, כך שבזיכרון נשמרות רק השורות שעברו.
+
+    מחזיר (df_filtered, info) עם rows_before, latest_scan_date ו-encoding.
+    """
+    latest_scan_ts, info = _latest_scan_date(scan_path, chunk_rows)
+
+    df_filtered, _ = read_scan_table(
+        scan_path,
+        process=lambda chunk: _latest_rows(chunk, latest_scan_ts),
+        usecols=SCAN_COLUMNS.usecols(),
+        dtype=str,
+        chunk_rows=chunk_rows,
+        encodings=[info["encoding"]],
+    )
+    if len(df_filtered):
+        df_filtered = _infer_dtypes(df_filtered)
+
+    return df_filtered, {
+        "rows_before": int(info["rows_read"]),
+        "latest_scan_date": latest_scan_ts.date().isoformat(),
+        "scan_dates": info["scan_dates"],
+        "encoding": info["encoding"],
+    }
+
+
+class _ScanSource:
+    """
+    קובץ הסריקה שמאחורי השורות המסוננות, למה שעוד נקרא ממנו: השורות המלאות
+    (כל העמודות, כטקסט) לייצוא – rows_at – והמפתחות של ה-scan_date-ים
+    המוקדמים למצב incremental – earlier_keys.
+
+    עם scan_cache כל אחד מהם נקרא מהקובץ פעם אחת – כל השורות המסוננות / כל
+    הימים המוקדמים – ונשמר ליד השורות המסוננות (אותו hash תוכן, namespace
+    "duplicates_scan_rows" / "duplicates_scan_earlier"), כך שהרצה חוזרת על
+    קובץ זהה לא פותחת אותו שוב. בלי cache – נקרא רק מה שמתבקש.
+
+    status: hit / miss / off – miss אם הקובץ נקרא בהרצה הזו.
+    """
+
+    def __init__(
+        self,
+        scan_path: str,
+        latest_scan_date: date,
+        encoding: Optional[str],
+        chunk_rows: int,
+        positions: Optional[np.ndarray] = None,
+        scan_cache: Optional[FrameCache] = None,
+        status: str = CACHE_OFF,
+    ):
+        self.scan_path = scan_path
+        self.latest_scan_date = latest_scan_date
+        self.status = status
+        self._encoding = encoding
+        self._chunk_rows = chunk_rows
+        self._positions = positions
+        self._cache = scan_cache
+        self._rows: Optional[pd.DataFrame] = None
+        self._earlier: Optional[pd.DataFrame] = None
+
+    def _cached(self, namespace: str, reader: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        df, _, status = cached_read(self.scan_path, namespace, lambda p: (reader(p), {}), self._cache)
+        if status == CACHE_MISS:
+            self.status = CACHE_MISS
+        return df
+
+    def _read_rows(self, path: str) -> pd.DataFrame:
+        rows = read_scan_rows(path, self._positions, encoding=self._encoding, chunk_rows=self._chunk_rows)
+        rows[ROW_COLUMN] = self._positions
+        return rows
+
+    def _read_earlier_keys(self, path: str) -> pd.DataFrame:
+        latest = pd.Timestamp(self.latest_scan_date)
+
+        def _earlier(chunk: pd.DataFrame) -> Optional[pd.DataFrame]:
+            sold_numeric = pd.to_numeric(chunk["sold_part"], errors="coerce")
+            days = _parse_scan_dates(chunk["scan_date"]).dt.normalize()
+            mask = ((days < latest) & (sold_numeric == 1)).to_numpy()
+            if not mask.any():
+                return None
+            return pd.DataFrame({
+                "hash": key_hashes(chunk.loc[mask], CROSS_DATE_KEY_COLUMNS),
+                "day": days[mask].to_numpy(),
+            })
+
+        keys, _ = read_scan_table(
+            path,
+            process=_earlier,
+            usecols=SCAN_COLUMNS.usecols(),
+            dtype=str,
+            chunk_rows=self._chunk_rows,
+            encodings=[self._encoding] if self._encoding and self._encoding != "excel" else None,
+        )
+        if "hash" not in keys.columns:
+            # אין שורות מוקדמות
+            keys = pd.DataFrame({"hash": np.empty(0, dtype=np.uint64), "day": pd.to_datetime([])})
+        return keys
+
+    def rows_at(self, positions: np.ndarray) -> pd.DataFrame:
+        """השורות המלאות שבמיקומים positions בקובץ, בסדר של positions."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if self._cache is None:
+            return read_scan_rows(self.scan_path, positions, encoding=self._encoding, chunk_rows=self._chunk_rows)
+        if self._rows is None:
+            self._rows = self._cached("duplicates_scan_rows", self._read_rows).set_index(ROW_COLUMN, drop=True)
+        return self._rows.loc[positions].reset_index(drop=True)
+
+    def earlier_keys(self) -> pd.DataFrame:
+        """
+        hash של CROSS_DATE_KEY_COLUMNS ('hash') ו-scan_date ('day') של כל
+        השורות עם sold_part == 1 מימים מוקדמים מה-scan_date האחרון.
+        """
+        if self._earlier is None:
+            self._earlier = self._cached("duplicates_scan_earlier", self._read_earlier_keys)
+        return self._earlier
 
 
 def _ensure_required_columns(df: pd.DataFrame) -> None:
@@ -57,6 +286,517 @@ def _ensure_required_columns(df: pd.DataFrame) -> None:
         )
 
 
+def _hash_keys(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    עמודות המפתח כמערכים של 8 בתים ל-row_hashes, כך שערכים ש-groupby
+    מחשיב כשווים (כולל חסר = חסר) שווים גם כאן:
+      - category → קודי הקטגוריה
+      - מספרים → float64 (‎-0.0 = 0.0)
+      - תאריכים → int64
+      - אחר → קודים מ-factorize
+    """
+    keys: Dict[str, np.ndarray] = {}
+    for col in DUP_KEY_COLUMNS:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            keys[col] = series.cat.codes.to_numpy().astype(np.int64)
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            keys[col] = series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            keys[col] = series.to_numpy(dtype="float64", na_value=np.nan) + 0.0
+        else:
+            codes, _ = pd.factorize(series)
+            keys[col] = codes.astype(np.int64)
+    return keys
+
+
+def _tag_duplicates(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    מעבר אחד על עמודות המפתח במקום groupby על כל השורות ואחריו merge:
+      1. hash של 64 ביט לכל שורה; duplicated(keep=False) על ה-hash מסמן
+         את השורות שיש להן hash זהה (מועמדות).
+      2. רק על המועמדות: groupby על ערכי המפתח עצמם (ngroup + size) –
+         מסנן התנגשויות hash ונותן את המספור הממוין של groupby.
+
+    מחזיר (rows, dup_group_id, dup_count): מיקומי השורות הכפולות ב-df,
+    ממוינות לפי dup_group_id ובתוך קבוצה לפי הסדר ב-df.
+    """
+    empty = np.empty(0, dtype=np.int64)
+    hashes = pd.Series(row_hashes(_hash_keys(df)))
+    candidates = np.flatnonzero(hashes.duplicated(keep=False).to_numpy())
+    if len(candidates) == 0:
+        return empty, empty, empty
+
+    grouped = df.iloc[candidates].groupby(
+        DUP_KEY_COLUMNS, dropna=False, observed=True, sort=True
+    )
+    sizes = grouped[DUP_KEY_COLUMNS[0]].transform("size").to_numpy()
+    group_no = grouped.ngroup().to_numpy()
+
+    is_dup = sizes > 1
+    if not is_dup.any():
+        return empty, empty, empty
+
+    rows = candidates[is_dup]
+    _, group_ids = np.unique(group_no[is_dup], return_inverse=True)
+    group_ids = group_ids.astype(np.int64) + 1  # 1..N, בסדר הממוין
+    order = np.argsort(group_ids, kind="stable")
+    return rows[order], group_ids[order], sizes[is_dup][order].astype(np.int64)
+
+
+def _output_filename(
+    scan_path: str,
+    prefix: str = "duplicates",
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+) -> str:
+    base_name = os.path.splitext(os.path.basename(scan_path))[0]
+    today_str = date.today().strftime("%Y%m%d")
+    return result_filename(f"{prefix}_{base_name}_{today_str}", output_format)
+
+
+def _track_numeric(numeric_cols: Dict[str, bool], rows: pd.DataFrame) -> None:
+    """מעדכן לכל עמודת טקסט אם כל ערכיה (שאינם חסרים) עד כה מספריים."""
+    for col in rows.columns:
+        values = rows[col]
+        if numeric_cols.get(col, True) and pd.api.types.is_string_dtype(values):
+            numbers = pd.to_numeric(values, errors="coerce")
+            numeric_cols[col] = bool((numbers.notna() | values.isna()).all())
+
+
+def _typed_rows(
+    rows: pd.DataFrame,
+    output_format: str,
+    numeric_cols: Optional[Dict[str, bool]] = None,
+) -> pd.DataFrame:
+    """
+    השורות המלאות נשלפות מהקובץ כטקסט. ל-CSV הן נכתבות כמו שהן; ל-Parquet /
+    Feather עמודות OUTPUT_DATE_COLUMNS הופכות לתאריכים ועמודות שכל ערכיהן
+    מספריים – למספרים, כדי שהטיפוסים יישמרו בקובץ.
+
+    numeric_cols: ההחלטה לכל עמודה מראש (מצב external – כל החלקים נכתבים
+      באותם טיפוסים, מספרים כ-float64); בלי – לפי השורות עצמן, כמו read_csv.
+    """
+    if output_format == CSV:
+        return rows
+    rows = rows.copy(deep=False)
+    for col in rows.columns:
+        values = rows[col]
+        if not pd.api.types.is_string_dtype(values):
+            continue
+        if col in OUTPUT_DATE_COLUMNS:
+            rows[col] = parse_dates(values)
+            continue
+        numbers = pd.to_numeric(values, errors="coerce")
+        if numeric_cols is None:
+            if (numbers.notna() | values.isna()).all():
+                rows[col] = numbers
+        elif numeric_cols.get(col, False):
+            rows[col] = numbers.astype("float64")
+    return rows
+
+
+# ----------------------------------------------------------------------
+# Incremental mode (earlier scan dates)
+# ----------------------------------------------------------------------
+
+def _seed_index(
+    source: _ScanSource,
+    dup_index: DuplicateIndex,
+    scan_dates: Optional[List[str]],
+) -> List[str]:
+    """
+    ימים מוקדמים מה-scan_date האחרון שמופיעים בקובץ אבל עדיין לא באינדקס
+    (למשל בהרצה הראשונה על קובץ עם כמה סריקות): השורות שלהם (sold_part == 1)
+    נוספות לאינדקס, כל יום בתאריך שלו, לפני בדיקת השורות האחרונות – כך
+    שכפילויות בין תאריכים באותו קובץ מדווחות כבר בהרצה הראשונה.
+
+    scan_dates: הימים (ISO) שבקובץ – כשכולם כבר באינדקס הקובץ לא נקרא;
+      None – לפי המפתחות המוקדמים עצמם.
+    מחזיר את הימים שנוספו.
+    """
+    indexed = set(dup_index.scan_dates())
+    latest = source.latest_scan_date.isoformat()
+    if scan_dates is not None and all(d >= latest or d in indexed for d in scan_dates):
+        return []
+
+    seeded: List[str] = []
+    for day, group in source.earlier_keys().groupby("day", sort=True):
+        if day.date().isoformat() in indexed:
+            continue
+        dup_index.add(group["hash"].to_numpy(dtype=np.uint64), day.date())
+        seeded.append(day.date().isoformat())
+    return seeded
+
+
+def _check_against_index(
+    source: _ScanSource,
+    output_dir: str,
+    hashes: np.ndarray,
+    positions: np.ndarray,
+    dup_index: DuplicateIndex,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+    scan_dates: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    בודק את שורות הסריקה האחרונה (hash של CROSS_DATE_KEY_COLUMNS ומיקום
+    בקובץ) מול האינדקס של הסריקות הקודמות, ואז מוסיף אותן לאינדקס.
+    scan_date-ים מוקדמים שבקובץ וחסרים באינדקס נוספים אליו קודם (ראה
+    _seed_index). שורות שהמפתח שלהן הופיע ב-scan_date מוקדם יותר נכתבות
+    לקובץ נפרד (השורה המלאה + first_scan_date). מה שנקרא מהקובץ עובר דרך
+    source (ועם scan_cache – נשמר בו).
+
+    מחזיר dict עם הסטטיסטיקות לתוצאות.
+    """
+    latest_scan_date = source.latest_scan_date
+    seeded = _seed_index(source, dup_index, scan_dates)
+    first_seen = dup_index.lookup(hashes)
+    earlier = first_seen < np.datetime64(latest_scan_date, "D")
+    new_keys = dup_index.add(hashes, latest_scan_date)
+
+    results: Dict[str, Any] = {
+        "incremental": True,
+        "cross_date_rows": int(earlier.sum()),
+        "index_new_keys": new_keys,
+        "index_seeded_dates": seeded,
+        "indexed_scan_dates": len(dup_index.scan_dates()),
+        "index_dataset": dup_index.name,
+        "cross_date_output_filename": None,
+        "cross_date_output_path": None,
+    }
+    if not earlier.any():
+        return results
+
+    rows = source.rows_at(positions[earlier])
+    rows["first_scan_date"] = first_seen[earlier].astype(str)
+
+    output_filename = _output_filename(source.scan_path, "duplicates_previous", output_format)
+    output_path = os.path.join(output_dir, output_filename)
+    write_result(_typed_rows(rows, output_format), output_path, output_format)
+
+    results["cross_date_output_filename"] = output_filename
+    results["cross_date_output_path"] = output_path
+    return results
+
+
+# ----------------------------------------------------------------------
+# Near-duplicates mode
+# ----------------------------------------------------------------------
+
+def _near_duplicates(
+    scan_path: str,
+    output_dir: str,
+    df: pd.DataFrame,
+    exact_rows: np.ndarray,
+    exact_group_ids: np.ndarray,
+    rules: NearMatchRules,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+) -> Dict[str, Any]:
+    """
+    זוגות שורות שכמעט זהות לפי rules (ראה core/near_match – blocking לפי
+    גוש-חלקה + חודש, כך שההשוואות כמעט לינאריות). זוגות שכבר באותה קבוצת
+    כפילות מדויקת לא מדווחים שוב.
+
+    הפלט: שורה לכל זוג – row_a / row_b (מיקום השורה בקובץ), ערכי המפתח של
+    שתי השורות, ההפרש בכל עמודה עם סבילות ו-score, ממוין מה-score הגבוה.
+    מחזיר dict עם הסטטיסטיקות לתוצאות.
+    """
+    pairs = near_pairs(df, None, rules)
+
+    group_of = np.zeros(len(df), dtype=np.int64)
+    group_of[exact_rows] = exact_group_ids
+    ga = group_of[pairs[LEFT_ROW].to_numpy()]
+    gb = group_of[pairs[RIGHT_ROW].to_numpy()]
+    pairs = pairs[~((ga == gb) & (ga > 0))].reset_index(drop=True)
+
+    results: Dict[str, Any] = {
+        "near": True,
+        "near_pairs": int(len(pairs)),
+        "near_output_filename": None,
+        "near_output_path": None,
+    }
+    if pairs.empty:
+        return results
+
+    a = pairs[LEFT_ROW].to_numpy()
+    b = pairs[RIGHT_ROW].to_numpy()
+    positions = df[ROW_COLUMN].to_numpy()
+    keys = df[DUP_KEY_COLUMNS].reset_index(drop=True)
+
+    out = pd.concat(
+        [
+            pd.DataFrame({LEFT_ROW: positions[a], RIGHT_ROW: positions[b]}),
+            keys.iloc[a].reset_index(drop=True).add_suffix("_a"),
+            keys.iloc[b].reset_index(drop=True).add_suffix("_b"),
+            pairs.drop(columns=[LEFT_ROW, RIGHT_ROW]),
+        ],
+        axis=1,
+    )
+    out = out.sort_values([SCORE, LEFT_ROW, RIGHT_ROW], ascending=[False, True, True], kind="stable")
+
+    output_filename = _output_filename(scan_path, "duplicates_near", output_format)
+    output_path = os.path.join(output_dir, output_filename)
+    write_result(out, output_path, output_format)
+
+    results["near_output_filename"] = output_filename
+    results["near_output_path"] = output_path
+    return results
+
+
+# ----------------------------------------------------------------------
+# External-memory mode (scans larger than RAM)
+# ----------------------------------------------------------------------
+
+class _SpillFiles:
+    """
+    קבצי spill בתיקייה זמנית: כל קובץ הוא רצף של DataFrame-ים מ-pickle,
+    שנכתבים chunk אחרי chunk ונקראים חזרה כ-DataFrame אחד.
+    """
+
+    def __init__(self, directory: str, prefix: str, count: int):
+        self.paths = [os.path.join(directory, f"{prefix}_{i:04d}.pkl") for i in range(count)]
+
+    def append(self, index: int, df: pd.DataFrame) -> None:
+        with open(self.paths[index], "ab") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, index: int) -> Optional[pd.DataFrame]:
+        path = self.paths[index]
+        if not os.path.exists(path):
+            return None
+        parts = []
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    parts.append(pickle.load(f))
+                except EOFError:
+                    break
+        os.remove(path)
+        return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def _partition_of(keys: pd.DataFrame, partitions: int) -> np.ndarray:
+    """
+    מספר partition לכל שורה לפי hash של המפתח. key_hashes מנרמל ערכים
+    מספריים ("3" ו-"3.0" → אותו hash), כך ששורות שייחשבו שוות בבדיקה – בין
+    אם העמודה תזוהה כמספרית ובין אם כטקסט – תמיד יגיעו לאותו partition.
+    """
+    hashes = key_hashes(keys, DUP_KEY_COLUMNS)
+    return (hashes % np.uint64(partitions)).astype(np.int64)
+
+
+def _typed_keys(df: pd.DataFrame, numeric_cols: Dict[str, bool]) -> pd.DataFrame:
+    """
+    טיפוסי המפתח כמו במצב הרגיל (שם read_csv מסיק אותם): עמודה שכל
+    ערכיה מספריים – float64, אחרת טקסט.
+    """
+    for col in DUP_KEY_COLUMNS:
+        if numeric_cols[col]:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        else:
+            df[col] = df[col].astype(object)
+    return df
+
+
+def _run_external(
+    scan_path: str,
+    output_dir: str,
+    sample_limit: int,
+    chunk_rows: int,
+    partitions: int,
+    spill_dir: Optional[str],
+    dup_index: Optional[DuplicateIndex] = None,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    אותה בדיקה כמו run_duplicates_check, בלי להחזיק את הסריקה בזיכרון:
+
+      1. מעבר 1 – scan_date האחרון.
+      2. מעבר 2 – השורות המסוננות (עמודות מפתח + מיקום) נכתבות ל-spill
+         לפי hash של המפתח; כל הכפילויות של מפתח נמצאות באותו partition.
+      3. כל partition נטען לבד: groupby, קבוצות עם יותר משורה אחת.
+      4. מפתחות הקבוצות ממוינים יחד → dup_group_id זהה למצב הרגיל.
+      5. מעבר 3 – השורות המלאות של הכפילויות נכתבות ל-spill לפי טווח
+         dup_group_id, וכל טווח ממוין ונכתב לקובץ הפלט בסדר הסופי.
+
+    בזיכרון נשמרים רק chunk אחד, partition אחד, ומיקום + מזהה קבוצה
+    לכל שורה כפולה (ועם dup_index – hash ומיקום לכל שורה מסוננת).
+    """
+    latest_scan_ts, info = _latest_scan_date(scan_path, chunk_rows)
+    latest_scan_date = latest_scan_ts.date()
+    encoding = info["encoding"]
+
+    with tempfile.TemporaryDirectory(prefix="duplicates_", dir=spill_dir) as tmp:
+        # --- Pass 2: partition the filtered rows by key hash ---
+        key_spill = _SpillFiles(tmp, "keys", partitions)
+        numeric_cols = {col: True for col in DUP_KEY_COLUMNS}
+        rows_after_filter = 0
+        cross_hashes: List[np.ndarray] = []
+        cross_positions: List[np.ndarray] = []
+
+        def _spill_keys(chunk: pd.DataFrame) -> None:
+            nonlocal rows_after_filter
+            rows = _latest_rows(chunk, latest_scan_ts)
+            if rows.empty:
+                return None
+            rows_after_filter += len(rows)
+            for col in DUP_KEY_COLUMNS:
+                if numeric_cols[col]:
+                    values = rows[col]
+                    numbers = pd.to_numeric(values, errors="coerce")
+                    numeric_cols[col] = bool((numbers.notna() | values.isna()).all())
+            if dup_index is not None:
+                cross_hashes.append(key_hashes(rows, CROSS_DATE_KEY_COLUMNS))
+                cross_positions.append(rows[ROW_COLUMN].to_numpy(dtype=np.int64))
+            part_ids = _partition_of(rows, partitions)
+            for part in np.unique(part_ids):
+                key_spill.append(int(part), rows.loc[part_ids == part])
+            return None
+
+        read_scan_table(
+            scan_path,
+            process=_spill_keys,
+            usecols=SCAN_COLUMNS.usecols(),
+            dtype=str,
+            chunk_rows=chunk_rows,
+            encodings=[encoding],
+        )
+
+        index_results: Dict[str, Any] = {"incremental": False, "near": False}
+        if dup_index is not None:
+            empty = np.empty(0, dtype=np.int64)
+            index_results.update(_check_against_index(
+                _ScanSource(scan_path, latest_scan_date, encoding, chunk_rows),
+                output_dir,
+                np.concatenate(cross_hashes) if cross_hashes else empty.astype(np.uint64),
+                np.concatenate(cross_positions) if cross_positions else empty,
+                dup_index,
+                output_format,
+                info["scan_dates"],
+            ))
+            del cross_hashes, cross_positions
+
+        # --- Per partition: duplicate groups (keys + count) and their rows ---
+        group_frames: List[pd.DataFrame] = []
+        dup_positions: List[np.ndarray] = []
+        dup_local_ids: List[np.ndarray] = []
+        next_local_id = 0
+
+        for part in range(partitions):
+            rows = key_spill.load(part)
+            if rows is None:
+                continue
+            rows = _typed_keys(rows, numeric_cols)
+            grouped = rows.groupby(DUP_KEY_COLUMNS, dropna=False, sort=False)
+            sizes = grouped[ROW_COLUMN].transform("size").to_numpy()
+            is_dup = sizes > 1
+            if not is_dup.any():
+                continue
+            # מזהים רציפים (0..) לקבוצות הכפולות בלבד, המשך ל-partition הקודם
+            codes, _ = pd.factorize(grouped.ngroup().to_numpy()[is_dup])
+            local_ids = codes + next_local_id
+            dups = rows.loc[is_dup, DUP_KEY_COLUMNS]
+            first = ~pd.Series(local_ids).duplicated().to_numpy()
+            groups = dups.loc[first].reset_index(drop=True)
+            groups["dup_count"] = sizes[is_dup][first]
+            groups["_local_id"] = local_ids[first]
+            group_frames.append(groups)
+            dup_positions.append(rows.loc[is_dup, ROW_COLUMN].to_numpy(dtype=np.int64))
+            dup_local_ids.append(local_ids)
+            next_local_id = int(local_ids.max()) + 1
+
+        base_results: Dict[str, Any] = {
+            "rows_before": int(info["rows_read"]),
+            "rows_after_filter": int(rows_after_filter),
+            "latest_scan_date": latest_scan_date.isoformat(),
+            "duplicate_groups": 0,
+            "duplicate_rows": 0,
+            "key_columns": DUP_KEY_COLUMNS,
+            "scan_cache": CACHE_OFF,
+            "output_filename": None,
+            "output_path": None,
+            "output_format": output_format,
+            **index_results,
+        }
+        if not group_frames:
+            return base_results, []
+
+        # --- Global dup_group_id: groups in sorted key order (as groupby) ---
+        groups = pd.concat(group_frames, ignore_index=True)
+        groups = groups.sort_values(DUP_KEY_COLUMNS, na_position="last", kind="stable")
+        global_id = np.empty(len(groups), dtype=np.int64)
+        global_id[groups["_local_id"].to_numpy()] = np.arange(1, len(groups) + 1)
+        group_count = np.empty(len(groups), dtype=np.int64)
+        group_count[groups["_local_id"].to_numpy()] = groups["dup_count"].to_numpy()
+        del groups, group_frames
+
+        positions = np.concatenate(dup_positions)
+        local_ids = np.concatenate(dup_local_ids)
+        order = np.argsort(positions)
+        positions = positions[order]
+        row_group_ids = global_id[local_ids[order]]
+        row_counts = group_count[local_ids[order]]
+        del dup_positions, dup_local_ids, local_ids, order
+
+        duplicate_groups = int(len(global_id))
+        duplicate_rows = int(len(positions))
+
+        # --- Pass 3: full rows, spilled by dup_group_id range ---
+        buckets = max(1, min(partitions, duplicate_groups))
+        row_spill = _SpillFiles(tmp, "rows", buckets)
+        row_numeric_cols: Dict[str, bool] = {}
+
+        def _spill_rows(chunk: pd.DataFrame) -> None:
+            rows = chunk.index.to_numpy(dtype=np.int64)
+            hit = np.isin(rows, positions)
+            if not hit.any():
+                return None
+            picked = with_row_positions(chunk.loc[hit])
+            _track_numeric(row_numeric_cols, picked)
+            idx = np.searchsorted(positions, picked[ROW_COLUMN].to_numpy())
+            picked["dup_count"] = row_counts[idx]
+            picked["dup_group_id"] = row_group_ids[idx]
+            bucket_of = (row_group_ids[idx] - 1) * buckets // duplicate_groups
+            for bucket in np.unique(bucket_of):
+                row_spill.append(int(bucket), picked.loc[bucket_of == bucket])
+            return None
+
+        read_scan_table(
+            scan_path,
+            process=_spill_rows,
+            dtype=str,
+            chunk_rows=chunk_rows,
+            encodings=[encoding],
+        )
+
+        # --- Stream the buckets to the output file in dup_group_id order ---
+        output_filename = _output_filename(scan_path, output_format=output_format)
+        output_path = os.path.join(output_dir, output_filename)
+        sample_parts: List[pd.DataFrame] = []
+        sample_size = 0
+
+        with ResultWriter(output_path, output_format) as out:
+            for bucket in range(buckets):
+                rows = row_spill.load(bucket)
+                if rows is None:
+                    continue
+                rows = rows.sort_values(["dup_group_id", ROW_COLUMN], kind="stable")
+                rows = rows.drop(columns=[ROW_COLUMN])
+                out.write(_typed_rows(rows, output_format, row_numeric_cols))
+                if sample_size < sample_limit:
+                    sample_parts.append(rows.head(sample_limit - sample_size))
+                    sample_size += len(sample_parts[-1])
+
+    results = dict(base_results)
+    results.update({
+        "duplicate_groups": duplicate_groups,
+        "duplicate_rows": duplicate_rows,
+        "output_filename": output_filename,
+        "output_path": output_path,
+    })
+    sample_rows: List[Dict[str, Any]] = pd.concat(sample_parts).to_dict(orient="records")
+    return results, sample_rows
+
+
 # ----------------------------------------------------------------------
 # Public API
 # ----------------------------------------------------------------------
@@ -65,79 +805,125 @@ def run_duplicates_check(
     scan_path: str,
     output_dir: str,
     sample_limit: int = 100,
+    scan_cache: Optional[FrameCache] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    external: bool = False,
+    spill_partitions: int = DEFAULT_SPILL_PARTITIONS,
+    spill_dir: Optional[str] = None,
+    dup_index: Optional[DuplicateIndex] = None,
+    near: bool = False,
+    near_rules: Optional[NearMatchRules] = None,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
 ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """
     מריץ את תהליך איתור הכפילויות על קובץ סריקה אחד.
 
     לוגיקה:
-      1. קריאת הקובץ.
+      1. קריאת הקובץ ב-chunks (chunk_rows שורות בכל פעם).
       2. מציאת תאריך ה-scan האחרון בעמודה scan_date.
-      3. סינון לשורות:
+      3. סינון לשורות (כבר בזמן הקריאה, chunk אחרי chunk):
            - scan_date == latest_scan_date
            - sold_part == 1
-      4. GROUP BY על כל עמודות המפתח (כולל scan_date) וספירת שורות.
-      5. שמירת קבוצות עם dup_count > 1 בלבד.
-      6. Merge חזרה ל-DataFrame לקבלת כל השורות הכפולות בפועל.
-      7. שמירת קובץ CSV עם כל הכפילויות והחזרת סטטיסטיקות + sample rows.
+      4. סימון השורות הכפולות לפי כל עמודות המפתח (כולל scan_date)
+         במעבר אחד – hash לשורה + ngroup (ראה _tag_duplicates).
+      5. קבוצות עם dup_count > 1 בלבד, dup_group_id בסדר הממוין של המפתח.
+      6. השורות הכפולות בפועל, בלי merge חוזר על 9 עמודות.
+      7. שמירת קובץ (CSV / Parquet / Feather) עם כל הכפילויות והחזרת
+         סטטיסטיקות + sample rows.
+
+    scan_cache: FrameCache אופציונלי – קובץ זהה שכבר נקרא נטען ממנו
+      (השורות המסוננות, השורות המלאות לייצוא ומפתחות הימים המוקדמים – ראה
+      _ScanSource) בלי לפרסר
+      שוב. results['scan_cache']: hit (הקובץ לא נפתח בכלל) / miss / off.
+    external: מצב external-memory לסריקות גדולות מה-RAM – השורות מחולקות
+      ל-spill_partitions קבצים זמניים (ב-spill_dir) לפי hash של המפתח,
+      והפלט נכתב ב-stream. אותם dup_group_id וסטטיסטיקות כמו במצב הרגיל;
+      ה-scan_cache לא בשימוש.
+    dup_index: מצב incremental – DuplicateIndex של הסריקות הקודמות. שורות
+      הסריקה האחרונה נבדקות מולו לפי CROSS_DATE_KEY_COLUMNS (בלי scan_date)
+      ומתווספות אליו; שורות שהופיעו ב-scan_date מוקדם יותר נכתבות לקובץ
+      נפרד (results['cross_date_output_filename']). scan_date-ים מוקדמים
+      שבקובץ עצמו וחסרים באינדקס נוספים אליו לפני הבדיקה
+      (results['index_seeded_dates']). הכפילויות בתוך אותו יום מחושבות כרגיל.
+    near: מצב near-duplicates – בנוסף לכפילויות המדויקות, זוגות שורות שכמעט
+      זהות לפי near_rules (ברירת מחדל DUP_NEAR_RULES) עם score לכל זוג,
+      בקובץ נפרד (results['near_output_filename']). לא זמין במצב external.
+    output_format: פורמט קבצי הפלט – "csv" (ברירת מחדל), "parquet" או
+      "feather" (שומרים את סוגי העמודות, ראה core/result_writer).
 
     מחזיר:
       results: dict עם נתונים לסיכום במסך.
       sample_rows: רשימת dict-ים לתצוגה בטבלה (עד sample_limit שורות).
     """
+    output_format = check_output_format(output_format)
     os.makedirs(output_dir, exist_ok=True)
 
-    # --- Step 1: Read file ---
-    df = _read_scan_file(scan_path)
-    rows_before = int(len(df))
-
-    # --- Step 2: Ensure required columns exist ---
-    _ensure_required_columns(df)
-
-    # --- Step 3: Parse latest scan_date ---
-    # שומר גם את ערך המחרוזת המקורי וגם את ה-parsed
-    scan_parsed = pd.to_datetime(df["scan_date"], errors="coerce", dayfirst=True)
-    if scan_parsed.isna().all():
-        raise ValueError("Could not parse any valid dates in 'scan_date' column.")
-
-    latest_scan_ts = scan_parsed.max()
-    latest_scan_date = latest_scan_ts.date()  # לשימוש בסיכום / תצוגה
-
-    # --- Step 4: Filter to latest scan_date & sold_part = 1 ---
-    sold_numeric = pd.to_numeric(df["sold_part"], errors="coerce")
-    mask = (scan_parsed == latest_scan_ts) & (sold_numeric == 1)
+    if external:
+        if near:
+            raise ValueError("Near-duplicate mode is not available for external-memory runs.")
+        return _run_external(
+            scan_path,
+            output_dir,
+            sample_limit,
+            chunk_rows,
+            max(1, int(spill_partitions)),
+            spill_dir,
+            dup_index,
+            output_format,
+        )
 
-    df_filtered = df.loc[mask].copy()
+    # --- Steps 1-4: Read file chunk by chunk, keeping only the rows of the
+    #     latest scan_date with sold_part = 1 (or take them from the cache) ---
+    df_filtered, scan_info, scan_cache_status = cached_read(
+        scan_path,
+        "duplicates_scan",
+        lambda p: _read_latest_scan_rows(p, chunk_rows),
+        scan_cache,
+    )
+    rows_before = int(scan_info["rows_before"])
+    latest_scan_date = date.fromisoformat(scan_info["latest_scan_date"])
     rows_after_filter = int(len(df_filtered))
-
-    if rows_after_filter == 0:
-        # אין שורות לסרוק – מחזירים סטטיסטיקות בלבד, ללא כפילויות
-        results = {
-            "rows_before": rows_before,
-            "rows_after_filter": rows_after_filter,
-            "latest_scan_date": latest_scan_date.isoformat(),
-            "duplicate_groups": 0,
-            "duplicate_rows": 0,
-            "key_columns": DUP_KEY_COLUMNS,
-            "output_filename": None,
-            "output_path": None,
-        }
-        return results, []
-
-    # --- Step 5: Group by key columns and count ---
-    group_cols = DUP_KEY_COLUMNS
-
-    dup_groups = (
-        df_filtered
-        .groupby(group_cols, dropna=False)
-        .size()
-        .reset_index(name="dup_count")
+    source = _ScanSource(
+        scan_path,
+        latest_scan_date,
+        scan_info.get("encoding"),
+        chunk_rows,
+        df_filtered[ROW_COLUMN].to_numpy(dtype=np.int64),
+        scan_cache,
+        scan_cache_status,
     )
 
-    # HAVING count(*) > 1
-    dup_groups = dup_groups[dup_groups["dup_count"] > 1]
-
-    if dup_groups.empty:
-        # יש שורות אחרונות, אבל אין כפילויות
+    # --- Incremental: check the new rows against earlier scan dates ---
+    extra_results: Dict[str, Any] = {"incremental": False, "near": False}
+    if dup_index is not None:
+        extra_results.update(_check_against_index(
+            source,
+            output_dir,
+            key_hashes(df_filtered, CROSS_DATE_KEY_COLUMNS),
+            df_filtered[ROW_COLUMN].to_numpy(dtype=np.int64),
+            dup_index,
+            output_format,
+            scan_info.get("scan_dates"),
+        ))
+
+    # --- Steps 5-6: Tag duplicate rows with their group id and count in
+    #     one pass (row hash + ngroup on the candidates, no merge) ---
+    rows, group_ids, counts = _tag_duplicates(df_filtered)
+
+    # --- Near duplicates: row pairs within the tolerances of near_rules ---
+    if near:
+        extra_results.update(_near_duplicates(
+            scan_path,
+            output_dir,
+            df_filtered,
+            rows,
+            group_ids,
+            near_rules or DUP_NEAR_RULES,
+            output_format,
+        ))
+
+    if len(rows) == 0:
+        # אין שורות אחרונות, או שאין ביניהן כפילויות
         results = {
             "rows_before": rows_before,
             "rows_after_filter": rows_after_filter,
@@ -145,37 +931,34 @@ def run_duplicates_check(
             "duplicate_groups": 0,
             "duplicate_rows": 0,
             "key_columns": DUP_KEY_COLUMNS,
+            "scan_cache": source.status,
             "output_filename": None,
             "output_path": None,
+            "output_format": output_format,
+            **extra_results,
         }
         return results, []
 
-    # --- Step 6: Assign group IDs and merge back to actual rows ---
-    dup_groups = dup_groups.reset_index(drop=True)
-    dup_groups["dup_group_id"] = dup_groups.index + 1  # 1..N
+    # ממוין לפי dup_group_id, ובתוך קבוצה לפי סדר הקובץ
+    dup_rows = df_filtered.iloc[rows].reset_index(drop=True)
+    dup_rows["dup_count"] = counts
+    dup_rows["dup_group_id"] = group_ids
 
-    dup_rows = df_filtered.merge(
-        dup_groups[group_cols + ["dup_count", "dup_group_id"]],
-        on=group_cols,
-        how="inner",
-    )
-
-    # קצת סדר: למיין לפי dup_group_id ואז dup_count (ירידה)
-    dup_rows = dup_rows.sort_values(
-        by=["dup_group_id", "dup_count"],
-        ascending=[True, False],
-    )
-
-    duplicate_groups = int(dup_groups["dup_group_id"].nunique())
+    duplicate_groups = int(group_ids[-1])
     duplicate_rows = int(len(dup_rows))
 
-    # --- Step 7: Export CSV with all duplicate rows ---
-    base_name = os.path.splitext(os.path.basename(scan_path))[0]
-    today_str = date.today().strftime("%Y%m%d")
-    output_filename = f"duplicates_{base_name}_{today_str}.csv"
+    # --- Step 6.5: Pull the full original rows (all columns) of the
+    #     duplicates, by their row position (from the file or the cache) ---
+    full_rows = source.rows_at(dup_rows[ROW_COLUMN].to_numpy())
+    full_rows["dup_count"] = dup_rows["dup_count"].to_numpy()
+    full_rows["dup_group_id"] = dup_rows["dup_group_id"].to_numpy()
+    dup_rows = full_rows
+
+    # --- Step 7: Export all duplicate rows (CSV / Parquet / Feather) ---
+    output_filename = _output_filename(scan_path, output_format=output_format)
     output_path = os.path.join(output_dir, output_filename)
 
-    dup_rows.to_csv(output_path, index=False, encoding="utf-8-sig")
+    write_result(_typed_rows(dup_rows, output_format), output_path, output_format)
 
     # --- Build results dict ---
     results: Dict[str, Any] = {
@@ -185,8 +968,11 @@ def run_duplicates_check(
         "duplicate_groups": duplicate_groups,
         "duplicate_rows": duplicate_rows,
         "key_columns": DUP_KEY_COLUMNS,
+        "scan_cache": source.status,
         "output_filename": output_filename,
         "output_path": output_path,
+        "output_format": output_format,
+        **extra_results,
     }
 
     # sample rows לתצוגה
@@ -0,0 +1,240 @@
+# core/frame_cache.py
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (parquet engine used by DataFrame.to_parquet)
+except ImportError:  # pragma: no cover - pyarrow is listed in requirements.txt
+    pyarrow = None
+
+HAS_PYARROW = pyarrow is not None
+
+# --------------------------------------
+# Configuration
+# --------------------------------------
+
+# Bump when the normalization of cached frames changes, so old entries miss
+CACHE_VERSION = "5"
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GB
+
+# Status values reported in the tools' results dicts
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_OFF = "off"
+
+_HASH_CHUNK = 1024 * 1024
+
+# A file on disk or an open binary buffer (e.g. a ZIP member read in memory)
+CacheSource = Union[str, BinaryIO]
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+def _hash_stream(f: BinaryIO) -> str:
+    h = hashlib.sha256()
+    for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def file_digest(source: CacheSource) -> str:
+    """
+    SHA-256 of a file's content (hex). A buffer is hashed from its start
+    and rewound afterwards, so it can be parsed right away.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return _hash_stream(f)
+    source.seek(0)
+    digest = _hash_stream(source)
+    source.seek(0)
+    return digest
+
+
+def _json_default(value: Any) -> Any:
+    if value is pd.NaT:
+        return {"__timestamp__": None}
+    if isinstance(value, pd.Timestamp):
+        return {"__timestamp__": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in cache metadata")
+
+
+def _json_hook(obj: Dict[str, Any]) -> Any:
+    if set(obj) == {"__timestamp__"}:
+        value = obj["__timestamp__"]
+        return pd.NaT if value is None else pd.Timestamp(value)
+    return obj
+
+
+class FrameCache:
+    """
+    Content-addressed on-disk cache of parsed DataFrames.
+
+    Each entry is a Parquet file (pickle when pyarrow is missing or the frame
+    has columns Parquet cannot store) plus a small JSON metadata file.
+    Entries are evicted least-recently-used first once the directory grows
+    beyond `max_bytes`; a hit refreshes the entry's modification time.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key_for(self, source: CacheSource, namespace: str) -> str:
+        """Cache key of a file for one tool's normalization (`namespace`)."""
+        return f"{namespace}-v{CACHE_VERSION}-{file_digest(source)}"
+
+    def _paths(self, key: str) -> Dict[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return {
+            "parquet": base + ".parquet",
+            "pickle": base + ".pkl",
+            "meta": base + ".json",
+        }
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        paths = self._paths(key)
+        if not os.path.exists(paths["meta"]):
+            return None
+
+        try:
+            with open(paths["meta"], "r", encoding="utf-8") as f:
+                meta = json.load(f, object_hook=_json_hook)
+
+            if meta.get("format") == "parquet":
+                data_path = paths["parquet"]
+                df = pd.read_parquet(data_path)
+            else:
+                data_path = paths["pickle"]
+                with open(data_path, "rb") as f:
+                    df = pickle.load(f)
+        except Exception:
+            # Unreadable / half-written entry – drop it and treat as a miss
+            self._remove(key)
+            return None
+
+        # LRU: a hit makes the entry the most recently used one
+        for p in (paths["meta"], data_path):
+            try:
+                os.utime(p, None)
+            except OSError:
+                # Evicted meanwhile by another process – the frame is loaded
+                pass
+        return df, meta.get("extra", {})
+
+    def put(self, key: str, df: pd.DataFrame, extra: Optional[Dict[str, Any]] = None) -> None:
+        paths = self._paths(key)
+        meta: Dict[str, Any] = {"extra": extra or {}}
+
+        # Per-run attrs (e.g. parsed RAMI metadata) belong in `extra`
+        if df.attrs:
+            df = df.copy(deep=False)
+            df.attrs = {}
+
+        if HAS_PYARROW:
+            try:
+                self._atomic_write(paths["parquet"], lambda f: df.to_parquet(f, index=False))
+                meta["format"] = "parquet"
+            except Exception:
+                meta["format"] = "pickle"
+        else:
+            meta["format"] = "pickle"
+
+        if meta["format"] == "pickle":
+            self._atomic_write(
+                paths["pickle"],
+                lambda f: pickle.dump(df.reset_index(drop=True), f, protocol=pickle.HIGHEST_PROTOCOL),
+            )
+
+        # Metadata last: an entry only counts once its JSON exists
+        payload = json.dumps(meta, default=_json_default, ensure_ascii=False).encode("utf-8")
+        self._atomic_write(paths["meta"], lambda f: f.write(payload))
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits max_bytes."""
+        entries: Dict[str, Dict[str, Any]] = {}
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext not in (".parquet", ".pkl", ".json"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entry = entries.setdefault(key, {"size": 0, "mtime": 0.0})
+            entry["size"] += st.st_size
+            entry["mtime"] = max(entry["mtime"], st.st_mtime)
+
+        total = sum(e["size"] for e in entries.values())
+        for key, entry in sorted(entries.items(), key=lambda kv: kv[1]["mtime"]):
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= entry["size"]
+
+    def _remove(self, key: str) -> None:
+        for p in self._paths(key).values():
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+
+    def _atomic_write(self, path: str, write: Callable[[Any], None]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def cached_read(
+    source: CacheSource,
+    namespace: str,
+    reader: Callable[[CacheSource], Tuple[pd.DataFrame, Dict[str, Any]]],
+    cache: Optional[FrameCache] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Any], str]:
+    """
+    Return reader(source) from the cache when an identical file was parsed
+    before under the same namespace; otherwise parse and store it.
+    `source` is a path or a seekable binary buffer.
+    Returns (df, extra_info, status) with status hit / miss / off.
+    """
+    if cache is None:
+        df, extra = reader(source)
+        return df, extra, CACHE_OFF
+
+    key = cache.key_for(source, namespace)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached[0], cached[1], CACHE_HIT
+
+    df, extra = reader(source)
+    try:
+        cache.put(key, df, extra)
+    except Exception:
+        # A full disk or unwritable cache must never fail the tool itself
+        pass
+    return df, extra, CACHE_MISS
@@ -0,0 +1,194 @@
+# core/jobs.py
+
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# --------------------------------------
+# Configuration
+# --------------------------------------
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_ERROR = "error"
+
+JOB_FINISHED = (JOB_DONE, JOB_ERROR)
+
+# Finished jobs (and their results) are forgotten after this many seconds
+DEFAULT_JOB_TTL = 6 * 60 * 60
+
+
+# --------------------------------------
+# Job record
+# --------------------------------------
+
+def new_job_id() -> str:
+    """A fresh job id (also usable as a folder name)."""
+    return uuid.uuid4().hex
+
+
+@dataclass
+class Job:
+    """One background run of a tool; `result` is whatever the tool returned."""
+    job_id: str
+    kind: str
+    status: str = JOB_QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    error_traceback: Optional[str] = None
+    # Free-form context for the views (e.g. uploaded file names)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    # Events reported by the tool while it runs (see report_progress)
+    progress: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JOB_FINISHED
+
+    def elapsed(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return round(end - self.started_at, 1)
+
+    def report_progress(self, event: Dict[str, Any]) -> None:
+        """Progress callback handed to the tool (called from the job thread)."""
+        self.progress.append(event)
+
+    def to_dict(self, progress_since: int = 0) -> Dict[str, Any]:
+        """
+        JSON-safe status (without the result or traceback). Only progress
+        events from index `progress_since` on are included, so a poller can
+        fetch just the new ones; progress_count is the total so far.
+        """
+        total = len(self.progress)
+        events = self.progress[max(progress_since, 0):total]
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": self.elapsed(),
+            "error": self.error,
+            "meta": self.meta,
+            "progress": events,
+            "progress_count": total,
+        }
+
+
+# --------------------------------------
+# Queue
+# --------------------------------------
+
+class JobQueue:
+    """
+    In-process job queue: jobs run on a local thread pool, so no external
+    broker is needed. The heavy tools still use their own process pools
+    (e.g. the RAMI workers of run_tax_gap_check).
+
+    Job state lives in this process only – the web server must route status
+    requests to the same process (one gunicorn worker, several threads).
+
+    on_expire(job) is called for every finished job dropped after job_ttl,
+    e.g. to delete the files it wrote.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        job_ttl: float = DEFAULT_JOB_TTL,
+        on_expire: Optional[Callable[[Job], None]] = None,
+    ):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="job",
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.job_ttl = job_ttl
+        self.on_expire = on_expire
+
+    def submit(
+        self,
+        kind: str,
+        func: Callable[..., Any],
+        *args: Any,
+        meta: Optional[Dict[str, Any]] = None,
+        track_progress: bool = False,
+        job_id: Optional[str] = None,
+        **kwargs: Any,
+    ) -> str:
+        """
+        Enqueue func(*args, **kwargs) and return the new job id.
+        With track_progress, func also gets progress=<callback> and the
+        events it reports appear in the job status. job_id: an id picked
+        by the caller beforehand (see new_job_id), e.g. to name the job's
+        output folder; a new one by default.
+        """
+        job = Job(job_id=job_id or new_job_id(), kind=kind, meta=dict(meta or {}))
+        if track_progress:
+            kwargs["progress"] = job.report_progress
+        with self._lock:
+            expired = self._prune()
+            self._jobs[job.job_id] = job
+        if self.on_expire is not None:
+            for old in expired:  # outside the lock – may touch the disk
+                self.on_expire(old)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self, kind: Optional[str] = None) -> List[Job]:
+        """Queued and running jobs (of one kind, if given)."""
+        with self._lock:
+            return [
+                job for job in self._jobs.values()
+                if not job.finished and (kind is None or job.kind == kind)
+            ]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        job.started_at = time.time()
+        job.status = JOB_RUNNING
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            job.error = str(e) or e.__class__.__name__
+            job.error_traceback = traceback.format_exc()
+            job.finished_at = time.time()
+            job.status = JOB_ERROR
+            return
+
+        # Status last: a poller that sees "done" always finds the result
+        job.result = result
+        job.finished_at = time.time()
+        job.status = JOB_DONE
+
+    def _prune(self) -> List[Job]:
+        """
+        Drop finished jobs older than job_ttl and return them (caller holds
+        the lock).
+        """
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job for job in self._jobs.values()
+            if job.finished and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job in expired:
+            del self._jobs[job.job_id]
+        return expired
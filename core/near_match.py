@@ -0,0 +1,204 @@
+# core/near_match.py
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.dates import parse_dates
+from core.numeric import to_number
+
+# --------------------------------------
+# Configuration
+# --------------------------------------
+
+# Output columns of near_pairs (besides <col>_diff per compared column)
+LEFT_ROW = "row_a"
+RIGHT_ROW = "row_b"
+SCORE = "score"
+
+
+@dataclass
+class NearMatchRules:
+    """
+    When two rows count as near matches:
+      - block_column: equal after normalization (leading zeros per part);
+        rows are only compared inside one block and sale month
+      - date_column: at most date_tolerance_days apart
+      - numeric_tolerances: |a - b| <= tolerance per column (two empty
+        cells are equal; a non-empty cell that does not parse never matches)
+      - exact: equal (missing equals missing)
+    Rows without a block or a date are never matched.
+    """
+    block_column: str
+    date_column: str
+    date_tolerance_days: int = 0
+    numeric_tolerances: Dict[str, float] = field(default_factory=dict)
+    exact: List[str] = field(default_factory=list)
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.block_column, self.date_column] + list(self.numeric_tolerances) + self.exact
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+def normalize_block(series: pd.Series) -> pd.Series:
+    """'001234-0012-001' → '1234-12-1' (whitespace and leading zeros dropped)."""
+    text = series.astype("string").str.strip().str.replace(" ", "", regex=False)
+    return text.str.replace(r"(^|-)0+(\d)", r"\1\2", regex=True)
+
+
+def _days(series: pd.Series) -> np.ndarray:
+    """Dates as float days since epoch (NaN when missing / unparsable)."""
+    series = parse_dates(series)
+    ns = series.to_numpy(dtype="datetime64[ns]")
+    days = ns.astype("datetime64[D]").astype(np.int64).astype("float64")
+    days[np.isnat(ns)] = np.nan
+    return days
+
+
+def _numbers(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Numeric text ("1,000,000", "1 234 ₪") as floats, and a mask of the
+    cells that are truly empty. Non-empty cells that do not parse are NaN
+    but not empty.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        return values, np.isnan(values)
+    values = pd.Series(to_number(series), dtype="float64").to_numpy(dtype="float64", na_value=np.nan)
+    text = series.astype("string").str.strip()
+    empty = (text.isna() | (text == "")).to_numpy(dtype=bool, na_value=True)
+    return values, empty
+
+
+def _codes(left: pd.Series, right: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """One factorization of both sides, so equal values get equal codes."""
+    if left is right:
+        codes, _ = pd.factorize(left, use_na_sentinel=True)
+        return codes, codes
+    codes, _ = pd.factorize(pd.concat([left, right], ignore_index=True), use_na_sentinel=True)
+    return codes[:len(left)], codes[len(left):]
+
+
+def _block_codes(left: pd.Series, right: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Codes of the normalized blocks – each distinct raw value is normalized once."""
+    raw_left, raw_right = _codes(left, right)
+    values = left if left is right else pd.concat([left, right], ignore_index=True)
+    _, raw_uniques = pd.factorize(values, use_na_sentinel=True)
+    if len(raw_uniques) == 0:
+        return raw_left, raw_right
+
+    norm_codes, _ = pd.factorize(normalize_block(pd.Series(raw_uniques)), use_na_sentinel=True)
+    norm_codes = np.append(norm_codes, -1)  # raw code -1 (missing) stays missing
+    return norm_codes[raw_left], norm_codes[raw_right]
+
+
+def _month(days: np.ndarray) -> np.ndarray:
+    return days.astype(np.int64).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def _candidates(
+    left_block: np.ndarray,
+    left_days: np.ndarray,
+    right_block: np.ndarray,
+    right_days: np.ndarray,
+    tolerance_days: int,
+) -> pd.DataFrame:
+    """
+    Blocking: every right row is indexed under (block, month of its date);
+    every left row probes the months its tolerance window touches (its own
+    month, plus the adjacent one near a month boundary). Only rows sharing
+    a block are ever paired, so the work grows with the block sizes, not
+    with len(left) * len(right).
+    """
+    lvalid = np.flatnonzero((left_block >= 0) & ~np.isnan(left_days))
+    rvalid = np.flatnonzero((right_block >= 0) & ~np.isnan(right_days))
+
+    lo = _month(left_days[lvalid] - tolerance_days)
+    hi = _month(left_days[lvalid] + tolerance_days)
+    spans = hi - lo + 1
+    probe_rows = np.repeat(lvalid, spans)
+    offsets = np.arange(len(probe_rows)) - np.repeat(np.cumsum(spans) - spans, spans)
+
+    probe = pd.DataFrame({
+        "block": left_block[probe_rows],
+        "month": np.repeat(lo, spans) + offsets,
+        LEFT_ROW: probe_rows,
+    })
+    index = pd.DataFrame({
+        "block": right_block[rvalid],
+        "month": _month(right_days[rvalid]),
+        RIGHT_ROW: rvalid,
+    })
+    pairs = probe.merge(index, on=["block", "month"], how="inner")
+    return pairs[[LEFT_ROW, RIGHT_ROW]]
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def near_pairs(
+    left: pd.DataFrame,
+    right: Optional[pd.DataFrame],
+    rules: NearMatchRules,
+) -> pd.DataFrame:
+    """
+    Pairs of rows (left, right) that match under `rules`; with right=None
+    the rows of `left` are paired with each other (each pair once, a < b).
+
+    Returns a DataFrame with row_a / row_b (positions in left / right),
+    <col>_diff (absolute difference; days for the date column) for the
+    date and numeric columns, and score: 1.0 for identical values, down to
+    0.5 at the edge of every tolerance (mean over the compared columns).
+    """
+    self_join = right is None
+    if self_join:
+        right = left
+
+    lblock, rblock = _block_codes(left[rules.block_column], right[rules.block_column])
+    ldays, rdays = _days(left[rules.date_column]), _days(right[rules.date_column])
+
+    pairs = _candidates(lblock, ldays, rblock, rdays, rules.date_tolerance_days)
+    a = pairs[LEFT_ROW].to_numpy()
+    b = pairs[RIGHT_ROW].to_numpy()
+
+    keep = a < b if self_join else np.ones(len(a), dtype=bool)
+
+    for col in rules.exact:
+        lcodes, rcodes = _codes(left[col], right[col])
+        keep &= lcodes[a] == rcodes[b]
+
+    tolerances = {rules.date_column: float(rules.date_tolerance_days)}
+    tolerances.update({col: float(tol) for col, tol in rules.numeric_tolerances.items()})
+
+    diffs: Dict[str, np.ndarray] = {}
+    for col, tol in tolerances.items():
+        if col == rules.date_column:
+            lvals, rvals = ldays, rdays
+            lempty, rempty = np.isnan(ldays), np.isnan(rdays)
+        else:
+            lvals, lempty = _numbers(left[col])
+            rvals, rempty = (lvals, lempty) if self_join else _numbers(right[col])
+        la, rb = lvals[a], rvals[b]
+        both_missing = lempty[a] & rempty[b]
+        diff = np.where(both_missing, 0.0, np.abs(la - rb))
+        keep &= diff <= tol  # NaN (one side missing or unparsable) fails
+        diffs[col] = diff
+
+    a, b = a[keep], b[keep]
+    result = pd.DataFrame({LEFT_ROW: a, RIGHT_ROW: b})
+
+    similarity = np.zeros(len(a))
+    for col, tol in tolerances.items():
+        diff = diffs[col][keep]
+        result[f"{col}_diff"] = diff
+        similarity += 1.0 - diff / (2 * tol) if tol > 0 else 1.0
+    result[SCORE] = np.round(similarity / len(tolerances), 4)
+
+    return result.sort_values([LEFT_ROW, RIGHT_ROW], kind="stable").reset_index(drop=True)
@@ -0,0 +1,136 @@
+# core/numeric.py
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # object strings only
+    pa = None
+    pc = None
+
+# --------------------------------------
+# Configuration
+# --------------------------------------
+
+# Removed from numeric text before parsing: thousands separators, spaces
+# (incl. NBSP / thin spaces), RTL / LTR marks and embeddings, currency signs
+STRIP_CHARS = (
+    ",'\u2019 \t\r\n"
+    "\u00a0\u2009\u202f"
+    "\u200e\u200f\u202a\u202b\u202c\u202d\u202e\u2066\u2067\u2068\u2069"
+    "\u20aa$\u20ac\u00a3"
+)
+
+_STRIP_TABLE = str.maketrans("", "", STRIP_CHARS)
+
+# digits_only: everything but digits, '.' and '-' goes
+_NON_DIGITS_PATTERN = r"[^0-9.\-]"
+
+# Parsed by the Arrow cast: plain decimals of at most 15 characters (so at
+# most 15 significant digits) – for these the cast and pd.to_numeric give
+# the very same double. Anything else goes to pd.to_numeric.
+_PLAIN_NUMBER = r"^-?[0-9]+(\.[0-9]+)?$"
+_CAST_MAX_CHARS = 15
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+def _present_chars(arr: "pa.Array") -> List[str]:
+    """
+    STRIP_CHARS that may occur in `arr`: those whose UTF-8 bytes all occur
+    in its data buffer (one byte count instead of a scan per character).
+    """
+    data = arr.buffers()[2]
+    if data is None:
+        return []
+    seen = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256) > 0
+    return [c for c in STRIP_CHARS if seen[list(c.encode("utf-8"))].all()]
+
+
+def _arrow_strip(arr: "pa.Array", digits_only: bool) -> "pa.Array":
+    for char in _present_chars(arr):
+        arr = pc.replace_substring(arr, char, "")
+    if digits_only:
+        # Regex replace only on the rows that still need it
+        dirty = pc.fill_null(pc.match_substring_regex(arr, _NON_DIGITS_PATTERN), False)
+        if pc.any(dirty).as_py():
+            cleaned = pc.replace_substring_regex(pc.filter(arr, dirty), _NON_DIGITS_PATTERN, "")
+            arr = pc.replace_with_mask(arr, dirty, cleaned)
+    return arr
+
+
+def _arrow_parse(arr: "pa.Array", text: pd.Series) -> pd.Series:
+    """pd.to_numeric(text, errors="coerce") – same dtype, same values."""
+    missing = pc.fill_null(pc.equal(arr, ""), True).to_numpy(zero_copy_only=False)
+    plain = pc.and_(
+        pc.match_substring_regex(arr, _PLAIN_NUMBER),
+        pc.less_equal(pc.utf8_length(arr), _CAST_MAX_CHARS),
+    )
+    plain = pc.fill_null(plain, False).to_numpy(zero_copy_only=False)
+    other = ~(missing | plain)
+
+    if plain.all():
+        has_dot = pc.any(pc.match_substring(arr, ".")).as_py()
+        target = pa.float64() if has_dot else pa.int64()  # as pd.to_numeric
+        return pd.Series(pc.cast(arr, target).to_numpy(), index=text.index, name=text.name)
+
+    values = np.full(len(arr), np.nan)
+    if other.any():
+        rest = pd.to_numeric(text[other], errors="coerce")
+        if rest.dtype != np.float64:
+            # Integers only – leave the dtype of the whole column to pandas
+            return pd.to_numeric(text, errors="coerce")
+        values[other] = rest.to_numpy()
+    values[plain] = pc.cast(pc.filter(arr, pa.array(plain)), pa.float64()).to_numpy()
+    return pd.Series(values, index=text.index, name=text.name)
+
+
+def _arrow_array(text: pd.Series) -> Optional["pa.Array"]:
+    if pa is None or getattr(text.dtype, "storage", None) != "pyarrow" or len(text) == 0:
+        return None
+    arr = pa.array(text)
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    return arr
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def is_numeric_column(series: pd.Series) -> bool:
+    """Already numeric (bool excluded – "True" is not a number here)."""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def to_number(series: pd.Series, digits_only: bool = False) -> pd.Series:
+    """
+    Parse a column of numeric text ("1,234", "1 234 ₪") into numbers, as
+    pd.to_numeric(errors="coerce") after removing STRIP_CHARS – or, with
+    digits_only, every character except digits, '.' and '-'. Columns that
+    are already numeric are returned as they are.
+
+    Arrow-backed text is cleaned by literal replaces of just the characters
+    present and parsed natively where that gives the same result; object
+    text goes through a single str.translate.
+    """
+    if is_numeric_column(series):
+        return series
+
+    text = series.astype(str)
+    arr = _arrow_array(text)
+    if arr is not None:
+        arr = _arrow_strip(arr, digits_only)
+        cleaned = pd.Series(pd.array(arr, dtype=text.dtype), index=text.index, name=text.name)
+        return _arrow_parse(arr, cleaned)
+
+    text = text.str.translate(_STRIP_TABLE)
+    if digits_only:
+        text = text.str.replace(_NON_DIGITS_PATTERN, "", regex=True)
+    return pd.to_numeric(text, errors="coerce")
@@ -2,10 +2,27 @@
 
 import os
 from datetime import date
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Optional
 
 import pandas as pd
-import numpy as np
+
+from core.dates import parse_dates
+from core.frame_cache import CACHE_OFF, FrameCache, cached_read
+from core.numeric import to_number
+from core.result_writer import (
+    DEFAULT_OUTPUT_FORMAT,
+    ResultWriter,
+    check_output_format,
+    result_filename,
+    write_result,
+)
+from core.scan_reader import (
+    CSV_ENCODINGS,
+    DEFAULT_CHUNK_ROWS,
+    detect_encoding,
+    iter_csv_chunks,
+    read_scan_table,
+)
 
 
 # ---------------------------------------------------------
@@ -32,42 +49,38 @@ DATE_TARGETS = {
     "sale_day",
 }
 
+# Text written as an empty cell in the output (as are missing values)
+TEXT_PLACEHOLDERS = ["nan", "NaN", "NAN", "None", "NaT", "nat", "NAT"]
+
 
 # ---------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------
 
-def _read_scan_file(scan_path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+def _read_scan_file(
+    scan_path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     """
     Step 1 – Read scan file (CSV / Excel) as text first.
+    CSV is read in chunks of `chunk_rows` rows, in the encoding detected
+    from its bytes (utf-8, cp1255 or latin1).
     Returns (df, info).
     """
     ext = os.path.splitext(scan_path)[1].lower()
-    info: Dict[str, Any] = {"extension": ext}
-
-    if ext == ".csv":
-        # Try a couple of encodings – start with utf-8, then cp1255, then latin1
-        last_error = None
-        for enc in ["utf-8", "cp1255", "latin1"]:
-            try:
-                df = pd.read_csv(scan_path, dtype=str, encoding=enc)
-                info["encoding"] = enc
-                break
-            except Exception as e:
-                last_error = e
-        else:
-            raise ValueError(
-                f"Could not read CSV file with common encodings. Last error: {last_error}"
-            )
-    elif ext in (".xls", ".xlsx", ".xlsm"):
-        df = pd.read_excel(scan_path, dtype=str)
-        info["encoding"] = "excel"
-    else:
+    if ext not in (".csv", ".xls", ".xlsx", ".xlsm"):
         raise ValueError(f"Unsupported file type for YZER preparation: {ext}")
 
-    info["rows_before"] = int(len(df))
-    info["columns_before"] = int(len(df.columns))
-    info["column_names"] = list(df.columns)
+    df, read_info = read_scan_table(scan_path, dtype=str, chunk_rows=chunk_rows)
+
+    info: Dict[str, Any] = {
+        "extension": ext,
+        "encoding": read_info["encoding"],
+        "encoding_confidence": read_info.get("encoding_confidence"),
+        "rows_before": int(len(df)),
+        "columns_before": int(len(df.columns)),
+        "column_names": list(df.columns),
+    }
 
     return df, info
 
@@ -82,212 +95,303 @@ def _build_case_insensitive_map(df: pd.DataFrame) -> Dict[str, str]:
     return mapping
 
 
-def _convert_numeric_columns(
-    df: pd.DataFrame,
-) -> Tuple[pd.DataFrame, Dict[str, Dict[str, int]]]:
-    """
-    Step 2 – Convert numeric columns.
-    (The '--' -> 0 replacement is done globally before this step.)
-
-    Returns:
-        df (modified),
-        numeric_info: {col_name: {"converted": int, "invalid": int}}
-    """
-    ci_map = _build_case_insensitive_map(df)
-    numeric_info: Dict[str, Dict[str, int]] = {}
-
-    for target in NUMERIC_TARGETS:
-        if target not in ci_map:
-            continue  # column not present
-
-        col_name = ci_map[target]
-
-        # Work on a copy as strings
-        series = df[col_name].astype(str).str.strip()
-
-        # Remove inner spaces ("1 234" -> "1234")
-        series = series.str.replace(" ", "", regex=False)
+def _is_text(series: pd.Series) -> bool:
+    """Object or string columns (read as str, so str dtype on pandas 3)."""
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
 
-        # Remove thousands separators
-        series = series.str.replace(",", "", regex=False)
-        series = series.str.replace("'", "", regex=False)
 
-        # Remove any non-digit / non-dot / non-minus characters (currency etc.)
-        series = series.str.replace(r"[^0-9\.\-]", "", regex=True)
-
-        numeric_series = pd.to_numeric(series, errors="coerce")
+def _convert_numeric_column(
+    series: pd.Series,
+    as_float: bool = False,
+) -> Tuple[pd.Series, Dict[str, int]]:
+    """
+    Step 2 – digits, '.' and '-' only, then to numbers. as_float keeps
+    whole-number columns float too, so every chunk is written alike.
+    """
+    numeric_series = to_number(series, digits_only=True)
+    if as_float:
+        numeric_series = numeric_series.astype("float64")
+    converted = int(numeric_series.notna().sum())
+    return numeric_series, {
+        "converted": converted,
+        "invalid": int(len(numeric_series) - converted),
+    }
 
-        converted = int(numeric_series.notna().sum())
-        invalid = int(len(numeric_series) - converted)
 
-        df[col_name] = numeric_series
+def _convert_date_column(series: pd.Series) -> Tuple[pd.Series, Dict[str, Any]]:
+    """
+    Step 3 – To datetime (short date style). The format is detected on a
+    sample (dd/mm/yyyy, dd.mm.yy, ISO, ...); only values no known format
+    fits are inferred one by one.
+    """
+    paths: Dict[str, Any] = {}
+    parsed = parse_dates(series, paths)
+    parsed_count = int(parsed.notna().sum())
+    return parsed, {
+        "parsed": parsed_count,
+        "invalid": int(len(parsed) - parsed_count),
+        "format": paths["format"],
+        "fixed_format": paths["fixed"],
+        "inferred": paths["inferred"],
+    }
 
-        numeric_info[col_name] = {
-            "converted": converted,
-            "invalid": invalid,
-        }
 
-    return df, numeric_info
+def _replace_commas(series: pd.Series) -> Tuple[pd.Series, int]:
+    """Step 4 – ',' -> ' ' in a text column; returns the cells changed."""
+    has_comma = series.str.contains(",", regex=False, na=False)
+    cells_changed = int(has_comma.sum())
+    if not cells_changed:
+        return series, 0
+    return series.str.replace(",", " ", regex=False), cells_changed
 
 
-def _convert_date_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict[str, int]]]:
+def _prepare_columns(
+    df: pd.DataFrame,
+    numeric_as_float: bool = False,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     """
-    Step 3 – Convert deal_date, sale_day to datetime (short date style).
-    Returns:
-        df (modified),
-        date_info: {col_name: {"parsed": int, "invalid": int}}
+    Steps 1.5 – 6, one column at a time: every rule is applied to a column
+    before the next one is touched, and the raw column is released as soon
+    as its cleaned version exists – no whole-frame masks or copies.
+
+    Text stays text (Arrow strings stay Arrow): '--' becomes "0", or no
+    date in a date column. Placeholders in text columns become "";
+    missing numbers / dates stay NaN / NaT, which to_csv writes as "".
     """
     ci_map = _build_case_insensitive_map(df)
-    date_info: Dict[str, Dict[str, int]] = {}
-
-    for target in DATE_TARGETS:
-        if target not in ci_map:
+    numeric_cols = {ci_map[t] for t in NUMERIC_TARGETS if t in ci_map}
+    date_cols = {ci_map[t] for t in DATE_TARGETS if t in ci_map}
+    scan_date_col = ci_map.get("scan_date")
+
+    info: Dict[str, Any] = {
+        "numeric_info": {},
+        "date_info": {},
+        "text_commas": {"columns": 0, "cells_changed": 0},
+        "dash_to_zero": {"occurrences": 0},
+        "scan_date_removed": scan_date_col is not None,
+    }
+    columns = list(df.columns)
+    cleaned: Dict[str, pd.Series] = {}
+
+    for col in columns:
+        series = df.pop(col)
+        is_text = _is_text(series)
+
+        # Step 1.5 – '--' -> 0
+        if is_text:
+            dashes = series.eq("--").fillna(False).to_numpy(dtype=bool)
+            if dashes.any():
+                info["dash_to_zero"]["occurrences"] += int(dashes.sum())
+                series = series.mask(dashes) if col in date_cols else series.mask(dashes, "0")
+
+        # Steps 2 – 4
+        if col in numeric_cols:
+            series, info["numeric_info"][col] = _convert_numeric_column(series, numeric_as_float)
+        elif col in date_cols:
+            series, info["date_info"][col] = _convert_date_column(series)
+        elif is_text:
+            series, changed = _replace_commas(series)
+            info["text_commas"]["columns"] += 1
+            info["text_commas"]["cells_changed"] += changed
+
+        # Step 5 – scan_date is dropped (its cells still count above)
+        if col == scan_date_col:
             continue
-        col_name = ci_map[target]
-
-        raw_series = df[col_name]
-
-        # Try to parse directly; supports dd/mm/yyyy, dd.mm.yyyy, etc.
-        parsed = pd.to_datetime(raw_series, dayfirst=True, errors="coerce")
-
-        parsed_count = int(parsed.notna().sum())
-        invalid_count = int(len(parsed) - parsed_count)
 
-        df[col_name] = parsed
-
-        date_info[col_name] = {
-            "parsed": parsed_count,
-            "invalid": invalid_count,
-        }
-
-    return df, date_info
-
-
-def _replace_commas_in_text(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
+        # Step 6 – missing values / placeholders -> empty cells
+        if is_text and col not in numeric_cols and col not in date_cols:
+            series = series.mask(series.isna() | series.isin(TEXT_PLACEHOLDERS), "")
+        cleaned[col] = series
+
+    return pd.DataFrame(cleaned, columns=[c for c in columns if c in cleaned]), info
+
+
+def _add_step_info(total: Dict[str, Any], part: Dict[str, Any]) -> None:
+    """Add the counters of one chunk's step info to the running total."""
+    for section in ("numeric_info", "date_info"):
+        for col, counts in part[section].items():
+            acc = total[section].setdefault(col, {})
+            for key, value in counts.items():
+                if isinstance(value, int):
+                    acc[key] = acc.get(key, 0) + value
+                elif acc.get(key) is None:
+                    acc[key] = value  # date format: the first one detected
+    total["text_commas"]["columns"] = max(total["text_commas"]["columns"], part["text_commas"]["columns"])
+    total["text_commas"]["cells_changed"] += part["text_commas"]["cells_changed"]
+    total["dash_to_zero"]["occurrences"] += part["dash_to_zero"]["occurrences"]
+
+
+def _stream_csv(
+    scan_path: str,
+    output_path: str,
+    encoding: str,
+    chunk_rows: int,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+) -> Tuple[Dict[str, Any], Dict[str, Any], int]:
     """
-    Step 4 – Replace ',' with ' ' in all text columns (non-numeric, non-datetime).
-    Returns:
-        df (modified),
-        stats: {"columns": int, "cells_changed": int}
+    Read, clean and append one chunk at a time; only one chunk is ever in
+    memory. Returns (file_info, step_info, columns_after).
     """
-    text_cols: List[str] = []
-    cells_changed = 0
-
-    for col in df.columns:
-        # We consider datetime64 and number dtypes as non-text; everything else -> text
-        if pd.api.types.is_datetime64_any_dtype(df[col]) or pd.api.types.is_numeric_dtype(df[col]):
-            continue
-
-        if df[col].dtype == object:
-            text_cols.append(col)
-            series = df[col].astype(str)
-            # Count how many cells actually contain commas
-            has_comma = series.str.contains(",", na=False)
-            cells_changed += int(has_comma.sum())
-            df[col] = series.str.replace(",", " ", regex=False)
-
-    stats = {
-        "columns": len(text_cols),
-        "cells_changed": cells_changed,
+    step_info: Optional[Dict[str, Any]] = None
+    columns: List[str] = []
+    rows = 0
+    cols_after = 0
+
+    with ResultWriter(output_path, output_format) as out:
+        for chunk in iter_csv_chunks(scan_path, encoding, dtype=str, chunk_rows=chunk_rows):
+            if step_info is None:
+                columns = [str(c) for c in chunk.columns]
+            rows += len(chunk)
+            cleaned, chunk_info = _prepare_columns(chunk, numeric_as_float=True)
+            out.write(cleaned)
+            cols_after = len(cleaned.columns)
+            if step_info is None:
+                step_info = chunk_info
+            else:
+                _add_step_info(step_info, chunk_info)
+
+        if step_info is None:
+            # Header only – still write the (cleaned) header
+            header = pd.read_csv(scan_path, encoding=encoding, dtype=str, nrows=0)
+            columns = [str(c) for c in header.columns]
+            cleaned, step_info = _prepare_columns(header, numeric_as_float=True)
+            out.write(cleaned)
+            cols_after = len(cleaned.columns)
+
+    file_info = {
+        "extension": ".csv",
+        "encoding": encoding,
+        "rows_before": rows,
+        "columns_before": len(columns),
+        "column_names": columns,
     }
-    return df, stats
+    return file_info, step_info, cols_after
 
 
-def _drop_scan_date_column(df: pd.DataFrame) -> Tuple[pd.DataFrame, bool]:
+def _run_streaming(
+    scan_path: str,
+    output_path: str,
+    chunk_rows: int,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+) -> Tuple[Dict[str, Any], Dict[str, Any], int]:
     """
-    Step 6 – Drop 'scan_date' column if exists (case-insensitive).
-    Returns:
-        df (modified),
-        removed (bool)
+    _stream_csv in the encoding detected from the file's bytes; should that
+    one still fail to decode, the next ones are tried.
     """
-    ci_map = _build_case_insensitive_map(df)
-    if "scan_date" in ci_map:
-        real_name = ci_map["scan_date"]
-        df = df.drop(columns=[real_name])
-        return df, True
-    return df, False
+    detected, confidence = detect_encoding(scan_path)
+    encodings = [detected] + [e for e in CSV_ENCODINGS if e != detected]
+
+    last_error: Optional[Exception] = None
+    for attempt, encoding in enumerate(encodings):
+        try:
+            file_info, step_info, cols_after = _stream_csv(
+                scan_path, output_path, encoding, chunk_rows, output_format
+            )
+        except UnicodeDecodeError as e:
+            last_error = e  # the output is rewritten from the start
+            continue
+        file_info["encoding_confidence"] = confidence if attempt == 0 else 0.0
+        return file_info, step_info, cols_after
+    raise ValueError(
+        f"Could not read CSV file with common encodings. Last error: {last_error}"
+    )
 
 
 # ---------------------------------------------------------
 # Public API
 # ---------------------------------------------------------
 
-def run_yzer_preparation(scan_path: str, output_dir: str) -> Dict[str, Any]:
+def run_yzer_preparation(
+    scan_path: str,
+    output_dir: str,
+    scan_cache: Optional[FrameCache] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    streaming: bool = False,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
+) -> Dict[str, Any]:
     """
     Full pipeline for preparing a scan file for YZER:
       Step 1: read file
-      Step 1.5: '--' -> 0 (global, like df.replace("--", 0))
+      Then per column, in one pass (see _prepare_columns):
+      Step 1.5: '--' -> 0
       Step 2: numeric conversion
       Step 3: date conversion
       Step 4: commas -> spaces in text
       Step 5: drop scan_date column
-      Step 6: global NaN / placeholder cleanup
-
-    Returns a stats dict with all information required for the UI.
-    """
-    os.makedirs(output_dir, exist_ok=True)
-
-    # --- Step 1: read file ---
-    df, file_info = _read_scan_file(scan_path)
-
-    # --- Step 1.5: global '--' -> 0, exactly like your working snippet ---
-    dash_mask = df == "--"
-    dash_to_zero_count = int(dash_mask.sum().sum())
-    if dash_to_zero_count:
-        df = df.replace("--", 0)
+      Step 6: NaN / placeholder cleanup
 
-    # --- Step 2: numeric conversion ---
-    df, numeric_info = _convert_numeric_columns(df)
+    An identical scan file read before is taken from `scan_cache` (if given)
+    instead of being parsed again; see stats["scan_cache"].
 
-    # --- Step 3: date conversion ---
-    df, date_info = _convert_date_columns(df)
+    streaming: for scans too large for memory – a CSV is read, cleaned and
+    written chunk by chunk (chunk_rows rows each), so memory stays flat
+    whatever the file size; the scan cache is not used. Numeric columns are
+    then always written as floats ("3.0"), as they are in the regular mode
+    whenever a column has a missing value. Excel files are not streamed.
 
-    # --- Step 4: replace commas in text ---
-    df, text_commas_info = _replace_commas_in_text(df)
-
-    # --- Step 5: drop scan_date ---
-    df, scan_date_removed = _drop_scan_date_column(df)
-
-    # --- Step 6: global NaN / placeholder cleanup ---
-    df = df.replace(
-        [np.nan, "nan", "NaN", "NAN", "None", "NaT", "nat", "NAT"],
-        "",
-        regex=False,
-    )
+    output_format: "csv" (default), "parquet" or "feather" – the latter two
+    keep the cleaned dtypes (numbers, dates) instead of writing them as text.
 
-    # Rows/cols after all operations
-    rows_after = int(len(df))
-    cols_after = int(len(df.columns))
+    Returns a stats dict with all information required for the UI.
+    """
+    output_format = check_output_format(output_format)
+    os.makedirs(output_dir, exist_ok=True)
 
-    # --- Export cleaned file ---
     base_name = os.path.splitext(os.path.basename(scan_path))[0]
     today_str = date.today().strftime("%Y%m%d")
-    output_filename = f"yzer_ready_{base_name}_{today_str}.csv"
+    output_filename = result_filename(f"yzer_ready_{base_name}_{today_str}", output_format)
     output_path = os.path.join(output_dir, output_filename)
 
-    df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    streaming = streaming and os.path.splitext(scan_path)[1].lower() == ".csv"
+    if streaming:
+        # --- Steps 1 – 6 and export, chunk by chunk ---
+        file_info, step_info, cols_after = _run_streaming(scan_path, output_path, chunk_rows, output_format)
+        rows_after = file_info["rows_before"]
+        scan_cache_status = CACHE_OFF
+    else:
+        # --- Step 1: read file (or take it from the scan cache) ---
+        df, file_info, scan_cache_status = cached_read(
+            scan_path,
+            "yzer_scan",
+            lambda p: _read_scan_file(p, chunk_rows),
+            scan_cache,
+        )
+
+        # --- Steps 1.5 – 6, column by column ---
+        df, step_info = _prepare_columns(df)
+
+        # Rows/cols after all operations
+        rows_after = int(len(df))
+        cols_after = int(len(df.columns))
+
+        # --- Export cleaned file ---
+        write_result(df, output_path, output_format)
 
     # --- Build stats dict ---
     stats: Dict[str, Any] = {
         # General
         "extension": file_info.get("extension"),
         "encoding": file_info.get("encoding"),
+        "encoding_confidence": file_info.get("encoding_confidence"),
         "rows_before": file_info.get("rows_before"),
         "columns_before": file_info.get("columns_before"),
         "rows_after": rows_after,
         "columns_after": cols_after,
         "column_names": file_info.get("column_names", []),
+        "scan_cache": scan_cache_status,
+        "streaming": streaming,
 
         # Steps
-        "numeric_info": numeric_info,
-        "date_info": date_info,
-        "text_commas": text_commas_info,
-        "dash_to_zero": {"occurrences": dash_to_zero_count},
-        "scan_date_removed": scan_date_removed,
+        "numeric_info": step_info["numeric_info"],
+        "date_info": step_info["date_info"],
+        "text_commas": step_info["text_commas"],
+        "dash_to_zero": step_info["dash_to_zero"],
+        "scan_date_removed": step_info["scan_date_removed"],
 
         # Output
         "output_filename": output_filename,
         "output_path": output_path,
+        "output_format": output_format,
     }
 
     return stats
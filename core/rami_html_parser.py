@@ -0,0 +1,163 @@
+# core/rami_html_parser.py
+
+from typing import BinaryIO, List, Optional
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from core.numeric import to_number
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is listed in requirements.txt
+    etree = None
+
+HAS_LXML = etree is not None
+
+# --------------------------------------
+# RAMI table layout
+# --------------------------------------
+
+# Hebrew RAMI header -> canonical English column
+RAMI_HEADER_MAP = {
+    "גוש חלקה": "block_lot",
+    "יום מכירה": "sale_day",
+    'תמורה מוצהרת בש"ח': "declared_profit",
+    'שווי מכירה בש"ח': "sale_profit",
+    "מהות": "property_type",
+    "חלק נמכר": "sold_part",
+    "ישוב": "city",
+    "שנת בניה": "build_year",
+    "שטח": "building_mr",
+    "חדרים": "rooms_number",
+}
+
+_NUMERIC_FIELDS = {
+    "declared_profit",
+    "sale_profit",
+    "sold_part",
+    "build_year",
+    "building_mr",
+    "rooms_number",
+}
+
+_DATE_FIELDS = {"sale_day"}
+
+# RAMI prints sale dates as dd/mm/yyyy
+_DATE_FORMAT = "%d/%m/%Y"
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+def _cell_text(cell) -> str:
+    # RAMI cells are flat text; only walk children when there are any
+    text = "".join(cell.itertext()) if len(cell) else (cell.text or "")
+    return " ".join(text.split())
+
+
+def _header_names(texts: List[str]) -> List[str]:
+    """
+    Column names as read_html gives them (blank → "Unnamed: 3", repeats →
+    "x.1"), then known RAMI headers renamed.
+    """
+    names = TextParser([texts], header=0, skip_blank_lines=False).read().columns
+    return [RAMI_HEADER_MAP.get(name, name) for name in names]
+
+
+def _release(elem) -> None:
+    """Drop a finished row (and already processed siblings) from the tree."""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def parse_rami_html_table(source: BinaryIO, encoding: Optional[str] = None) -> pd.DataFrame:
+    """
+    Stream the first <table> of a RAMI HTML export row by row (lxml
+    iterparse over <tr>) and build the frame column-wise.
+
+    Known RAMI headers are renamed to canonical English names and typed
+    once the table is read (numeric fields through core.numeric.to_number,
+    like every other RAMI / scan path; datetime for sale_day); any other
+    column is kept as stripped text under its original header. Cells are
+    collected by position, so blank or repeated headers keep their columns.
+    """
+    if not HAS_LXML:
+        raise ImportError("lxml is required for the streaming RAMI HTML parser.")
+
+    headers: List[str] = []
+    columns: List[list] = []
+    kinds: List[str] = []
+
+    for event, elem in etree.iterparse(
+        source,
+        events=("start", "end"),
+        tag=("table", "tr"),
+        html=True,
+        encoding=encoding,
+        recover=True,
+    ):
+        if elem.tag == "table":
+            if event == "end" and headers:
+                # First table finished – the rest of the page is the disclaimer
+                break
+            continue
+
+        if event != "end":
+            continue
+
+        cells = [c for c in elem if c.tag in ("td", "th")]
+
+        if not headers:
+            texts = [_cell_text(c) for c in cells]
+            if texts:
+                headers = _header_names(texts)
+                for name in headers:
+                    columns.append([])
+                    if name in _NUMERIC_FIELDS:
+                        kinds.append("num")
+                    elif name in _DATE_FIELDS:
+                        kinds.append("date")
+                    else:
+                        kinds.append("text")
+            _release(elem)
+            continue
+
+        if not cells:
+            _release(elem)
+            continue
+
+        for idx, kind in enumerate(kinds):
+            text = _cell_text(cells[idx]) if idx < len(cells) else ""
+            columns[idx].append(text or None)
+
+        _release(elem)
+
+    if not headers:
+        raise ValueError("No tables found in RAMI HTML file.")
+
+    df = pd.DataFrame(dict(enumerate(columns)), columns=range(len(headers)))
+    for idx, kind in enumerate(kinds):
+        if kind == "num":
+            # One parse per column; whole-number columns come back int64,
+            # like pd.to_numeric
+            df[idx] = to_number(df[idx])
+            continue
+        if kind != "date":
+            continue
+        raw = df[idx]
+        parsed = pd.to_datetime(raw, format=_DATE_FORMAT, errors="coerce")
+        residue = parsed.isna() & raw.notna()
+        if residue.any():
+            parsed[residue] = pd.to_datetime(raw[residue], dayfirst=True, errors="coerce")
+        df[idx] = parsed
+    df.columns = headers
+    return df
@@ -0,0 +1,381 @@
+# core/rami_loader.py
+
+import html as html_lib
+import os
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from io import StringIO
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from core.rami_html_parser import HAS_LXML, parse_rami_html_table
+
+
+# --------------------------------------
+# Format detection
+# --------------------------------------
+
+# Which parser was used for a RAMI file (reported back to the caller)
+RAMI_FORMAT_HTML = "html"
+RAMI_FORMAT_XLS = "xls"
+RAMI_FORMAT_XLSX = "xlsx"
+
+RAMI_EXTENSIONS = (".xls", ".xlsx", ".xlsm")
+
+# A RAMI file on disk or already in memory (seekable binary buffer)
+RamiSource = Union[str, BinaryIO]
+
+# Magic bytes of real Excel workbooks
+_OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy binary .xls
+_ZIP_MAGIC = b"PK\x03\x04"                          # .xlsx / .xlsm
+
+_BOMS = (
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xff\xfe", "utf-16"),
+    (b"\xfe\xff", "utf-16"),
+)
+
+_SNIFF_BYTES = 512
+_PREAMBLE_CHUNK = 4096
+
+
+def _detect_from_head(head: bytes) -> Tuple[str, str]:
+    """
+    Classify the first bytes of a RAMI file.
+    Returns (format, text_encoding); encoding is only meaningful for HTML.
+    """
+    if head.startswith(_OLE2_MAGIC):
+        return RAMI_FORMAT_XLS, ""
+    if head.startswith(_ZIP_MAGIC):
+        return RAMI_FORMAT_XLSX, ""
+
+    encoding = "utf-8"
+    for bom, enc in _BOMS:
+        if head.startswith(bom):
+            encoding = enc
+            break
+
+    # The codec names above consume their own BOM when decoding
+    text = head.decode(encoding, errors="ignore")
+
+    # RAMI exports start with "<b><u>מערכת מידע נדלן..." – anything that opens
+    # with a tag (<b>, <html>, <table>, <!DOCTYPE ...>) is treated as HTML.
+    if text.lstrip().startswith("<"):
+        return RAMI_FORMAT_HTML, encoding
+
+    return "", encoding
+
+
+@contextmanager
+def _open_binary(source: RamiSource) -> Iterator[BinaryIO]:
+    """
+    Yield a binary stream positioned at the start of the RAMI content.
+    Paths are opened (and closed) here; caller-owned buffers are only rewound.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield f
+    else:
+        source.seek(0)
+        yield source
+
+
+def _source_name(source: RamiSource, name: Optional[str]) -> str:
+    if name:
+        return name
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", "") or ""
+
+
+def sniff_rami_format(source: RamiSource, name: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Detect whether a RAMI file is HTML saved as .xls, a binary .xls or an
+    .xlsx/.xlsm workbook, by looking at its leading bytes only.
+    `source` is a path or a seekable binary buffer (e.g. a ZIP member read
+    into memory); `name` supplies the file name for buffers.
+    Falls back to the file extension when the content is inconclusive.
+    Returns (format, text_encoding).
+    """
+    ext = os.path.splitext(_source_name(source, name))[1].lower()
+    if ext not in RAMI_EXTENSIONS:
+        raise ValueError(f"Unsupported RAMI file type: {ext}")
+
+    with _open_binary(source) as f:
+        head = f.read(_SNIFF_BYTES)
+
+    fmt, encoding = _detect_from_head(head)
+    if not fmt:
+        fmt = RAMI_FORMAT_XLS if ext == ".xls" else RAMI_FORMAT_XLSX
+    return fmt, encoding
+
+
+# --------------------------------------
+# Header metadata (property type, dates, city / block filter)
+# --------------------------------------
+
+# Labels used in the HTML preamble of RAMI exports ("<b>label:</b> value")
+LABEL_PROPERTY_TYPE = "סוג נכס"
+LABEL_DATE_FROM = "מיום מכירה"
+LABEL_DATE_TO = "עד יום מכירה"
+LABEL_CITY = "ישוב"
+LABEL_BLOCK_FROM = "מגוש"
+LABEL_BLOCK_TO = "עד גוש"
+
+# Cells that identify the header row of the deals table in a real workbook
+_TABLE_HEADER_MARKERS = {"גוש חלקה", "יום מכירה"}
+
+_DATE_RE = re.compile(r"\d{1,2}[./]\d{1,2}[./]\d{2,4}")
+_HEBREW_RE = re.compile(r"[\u0590-\u05FF]")
+
+
+@dataclass
+class RamiDocument:
+    """
+    One parsed RAMI file: the deals table plus the
+    metadata printed above it, all taken from a single read of the file.
+    """
+    table: pd.DataFrame
+    rami_format: str
+    header_lines: List[str] = field(default_factory=list)
+    header_fields: Dict[str, str] = field(default_factory=dict)
+    property_type: Optional[str] = None
+    filter_type: Optional[str] = None
+    filter_value: Optional[str] = None
+    date_from: Optional[pd.Timestamp] = None
+    date_to: Optional[pd.Timestamp] = None
+
+    @property
+    def has_context(self) -> bool:
+        """True when the header identified a city/block filter."""
+        return bool(self.filter_type and self.filter_value)
+
+    def meta(self) -> Dict[str, Any]:
+        """Header metadata without the table (what callers keep / cache)."""
+        return {
+            "rami_format": self.rami_format,
+            "property_type": self.property_type,
+            "filter_type": self.filter_type,
+            "filter_value": self.filter_value,
+            "date_from": self.date_from,
+            "date_to": self.date_to,
+        }
+
+
+def _clean_text(text: str) -> str:
+    """Strip tags / entities / RTL marks and collapse whitespace."""
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = html_lib.unescape(text)
+    text = text.replace("\u00a0", " ").replace("\u200f", "").replace("\u200e", "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _parse_date(text: Optional[str]) -> Optional[pd.Timestamp]:
+    if not text:
+        return None
+    m = _DATE_RE.search(text)
+    if not m:
+        return None
+    ts = pd.to_datetime(m.group(0), dayfirst=True, errors="coerce")
+    return None if pd.isna(ts) else ts
+
+
+def _split_html_preamble(html: str) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Take the HTML before the first <table> and return its text lines
+    (split on <br>) and the "<b>label:</b> value" fields found in it.
+    """
+    m = re.search(r"<table", html, flags=re.IGNORECASE)
+    preamble = html[:m.start()] if m else ""
+    preamble = re.sub(r"<style.*?</style>", " ", preamble, flags=re.IGNORECASE | re.DOTALL)
+
+    lines: List[str] = []
+    fields: Dict[str, str] = {}
+
+    for segment in re.split(r"<br\s*/?>", preamble, flags=re.IGNORECASE):
+        line = _clean_text(segment)
+        if line:
+            lines.append(line)
+
+        for fm in re.finditer(r"<b>\s*([^<:]+?)\s*:\s*</b>([^<]*)", segment, flags=re.IGNORECASE):
+            label = _clean_text(fm.group(1))
+            value = _clean_text(fm.group(2))
+            if label and value:
+                fields[label] = value
+
+    return lines, fields
+
+
+def _apply_fields(doc: RamiDocument) -> None:
+    """Fill document metadata from the labelled HTML header fields."""
+    fields = doc.header_fields
+
+    doc.property_type = fields.get(LABEL_PROPERTY_TYPE)
+    doc.date_from = _parse_date(fields.get(LABEL_DATE_FROM))
+    doc.date_to = _parse_date(fields.get(LABEL_DATE_TO))
+
+    block_from = re.sub(r"\D", "", fields.get(LABEL_BLOCK_FROM, ""))
+    block_to = re.sub(r"\D", "", fields.get(LABEL_BLOCK_TO, ""))
+    if block_from:
+        doc.filter_type = "block"
+        if block_to and block_to != block_from:
+            doc.filter_value = f"{block_from},{block_to}"
+        else:
+            doc.filter_value = block_from
+    elif fields.get(LABEL_CITY):
+        doc.filter_type = "city"
+        doc.filter_value = fields[LABEL_CITY]
+
+
+def _apply_cell_text(doc: RamiDocument, values: List[str]) -> None:
+    """
+    Fill document metadata from the free-text cells A2–A4 of a workbook.
+    """
+    if not values:
+        return
+
+    meta_text = " ".join(values)
+
+    # --- Detect type & filter value ---
+
+    has_hebrew = bool(_HEBREW_RE.search(meta_text))
+    digits = re.findall(r"\d+", meta_text)
+
+    filter_type: Optional[str] = None
+    filter_value: Optional[str] = None
+
+    # 1) Explicit "גוש" → block
+    if "גוש" in meta_text:
+        filter_type = "block"
+        m = re.search(r"גוש\s*([\d, ]+)", meta_text)
+        if m:
+            nums = re.findall(r"\d+", m.group(1))
+            if nums:
+                filter_value = ",".join(nums)
+        if not filter_value and digits:
+            filter_value = ",".join(digits)
+
+    # 2) No "גוש", but digits and no Hebrew → also block (e.g. "3653_")
+    elif digits and not has_hebrew:
+        filter_type = "block"
+        filter_value = ",".join(digits)
+
+    # 3) Otherwise → city, take A2 as city name
+    else:
+        filter_type = "city"
+        filter_value = values[0]
+
+    # --- Dates from A2–A4 text ---
+
+    # Allow dd.mm.yy, dd.mm.yyyy, dd/mm/yy, dd/mm/yyyy
+    date_strings = _DATE_RE.findall(meta_text)
+    if len(date_strings) >= 1:
+        doc.date_from = _parse_date(date_strings[0])
+    if len(date_strings) >= 2:
+        doc.date_to = _parse_date(date_strings[1])
+
+    doc.filter_type = filter_type
+    doc.filter_value = filter_value
+
+
+# --------------------------------------
+# Readers per format
+# --------------------------------------
+
+def _read_html_preamble(f: BinaryIO, encoding: str) -> str:
+    """Read just the HTML in front of the deals <table> (a few hundred bytes)."""
+    head = b""
+    while True:
+        chunk = f.read(_PREAMBLE_CHUNK)
+        head += chunk
+        if not chunk or re.search(rb"<table", head, flags=re.IGNORECASE):
+            break
+    return head.decode(encoding, errors="ignore")
+
+
+def _read_html_document(source: RamiSource, encoding: str) -> RamiDocument:
+    with _open_binary(source) as f:
+        preamble = _read_html_preamble(f, encoding)
+
+        if HAS_LXML:
+            f.seek(0)
+            # libxml2 picks UTF-16 up from the BOM; UTF-8 must be hinted
+            hint = None if encoding == "utf-16" else "utf-8"
+            table = parse_rami_html_table(f, encoding=hint)
+        else:
+            f.seek(0)
+            html = f.read().decode(encoding, errors="ignore")
+            tables = pd.read_html(StringIO(html))
+            if not tables:
+                raise ValueError("No tables found in RAMI HTML file.")
+            table = tables[0]
+
+    lines, fields = _split_html_preamble(preamble)
+    doc = RamiDocument(
+        table=table,
+        rami_format=RAMI_FORMAT_HTML,
+        header_lines=lines,
+        header_fields=fields,
+    )
+    _apply_fields(doc)
+    return doc
+
+
+def _find_header_row(raw: pd.DataFrame) -> int:
+    """Index of the first row that looks like the deals table header (else 0)."""
+    for idx in range(len(raw.index)):
+        cells = {str(v).strip() for v in raw.iloc[idx].tolist() if pd.notna(v)}
+        if cells & _TABLE_HEADER_MARKERS:
+            return idx
+    return 0
+
+
+def _read_excel_document(source: RamiSource, rami_format: str) -> RamiDocument:
+    engine = "xlrd" if rami_format == RAMI_FORMAT_XLS else "openpyxl"
+    with _open_binary(source) as f:
+        raw = pd.read_excel(f, engine=engine, header=None)
+
+    header_idx = _find_header_row(raw)
+    columns = [
+        str(v).strip() if pd.notna(v) else f"Unnamed: {i}"
+        for i, v in enumerate(raw.iloc[header_idx].tolist())
+    ] if len(raw.index) else []
+
+    table = raw.iloc[header_idx + 1:].reset_index(drop=True)
+    table.columns = columns
+    table = table.infer_objects()
+
+    # Metadata cells are the first-column rows above the table header;
+    # A1 is the report title, A2–A4 describe the filter and date range.
+    lines: List[str] = []
+    cell_values: List[str] = []
+    for idx in range(header_idx):
+        v = raw.iloc[idx, 0]
+        if pd.notna(v) and str(v).strip():
+            lines.append(str(v).strip())
+            if 1 <= idx <= 3:
+                cell_values.append(str(v).strip())
+
+    doc = RamiDocument(table=table, rami_format=rami_format, header_lines=lines)
+    _apply_cell_text(doc, cell_values)
+    return doc
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def read_rami_document(source: RamiSource, name: Optional[str] = None) -> RamiDocument:
+    """
+    Read a RAMI file once, with the parser matching its sniffed format,
+    and return the deals table together with the header metadata.
+    `source` is a path or a seekable binary buffer; `name` is the file
+    name to use for a buffer (extension check).
+    """
+    rami_format, encoding = sniff_rami_format(source, name)
+
+    if rami_format == RAMI_FORMAT_HTML:
+        return _read_html_document(source, encoding)
+    return _read_excel_document(source, rami_format)
@@ -2,28 +2,21 @@
 
 import os
 import re
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Optional
 
-import numpy as np
 import pandas as pd
 
+from core.dates import parse_dates
+from core.frame_cache import FrameCache, cached_read
+from core.numeric import to_number
+from core.rami_html_parser import RAMI_HEADER_MAP
+from core.rami_loader import read_rami_document
+
+
 # --------------------------------------
 # Column mapping & schema
 # --------------------------------------
 
-RAMI_HEADER_MAP = {
-    "גוש חלקה": "block_lot",
-    "יום מכירה": "sale_day",
-    'תמורה מוצהרת בש"ח': "declared_profit",
-    'שווי מכירה בש"ח': "sale_profit",
-    "מהות": "property_type",
-    "חלק נמכר": "sold_part",
-    "ישוב": "city",
-    "שנת בניה": "build_year",
-    "שטח": "building_mr",
-    "חדרים": "rooms_number",
-}
-
 NUMERIC_COLS = [
     "declared_profit",
     "sale_profit",
@@ -42,23 +35,19 @@ DATE_COLS = ["sale_day"]
 
 def _load_excel_or_html(path: str) -> pd.DataFrame:
     """
-    Try read_excel. If it fails (HTML-style .xls), fallback to read_html.
+    Read the RAMI file once (HTML-style .xls or real Excel, sniffed from its
+    content) and return the deals table. The header metadata parsed from the
+    same read is kept in df.attrs["rami_meta"].
     """
     ext = os.path.splitext(path)[1].lower()
-    if ext in [".xlsx", ".xls"]:
-        try:
-            return pd.read_excel(path)
-        except Exception:
-            # HTML-style .xls
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                html = f.read()
-            tables = pd.read_html(html)
-            if not tables:
-                raise ValueError("No tables found in RAMI HTML file.")
-            return tables[0]
-    else:
+    if ext not in [".xlsx", ".xls"]:
         raise ValueError(f"Unsupported RAMI file type: {ext}")
 
+    doc = read_rami_document(path)
+    df = doc.table
+    df.attrs["rami_meta"] = doc.meta()
+    return df
+
 
 def _normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
     new_cols = {}
@@ -72,15 +61,7 @@ def _cast_numeric(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
     for col in cols:
         if col not in df.columns:
             continue
-        df[col] = (
-            df[col]
-            .astype(str)
-            .str.replace(",", "", regex=False)
-            .str.replace(" ", "", regex=False)
-            .str.replace("\u00a0", "", regex=False)
-            .replace({"": np.nan, "nan": np.nan, "NaN": np.nan})
-        )
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+        df[col] = to_number(df[col])
     return df
 
 
@@ -88,7 +69,7 @@ def _cast_dates(df: pd.DataFrame, cols: List[str]) -> pd.DataFrame:
     for col in cols:
         if col not in df.columns:
             continue
-        df[col] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
+        df[col] = parse_dates(df[col])
     return df
 
 
@@ -115,17 +96,25 @@ def _parse_dates_from_filename(filename: str) -> Tuple[pd.Timestamp, pd.Timestam
 # Public API
 # --------------------------------------
 
-def load_and_normalize_rami(path: str) -> pd.DataFrame:
-    """
-    Load RAMI file and normalize:
-    - headers (Hebrew -> English)
-    - numeric & date columns
-    """
+def _read_and_normalize(path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     df_raw = _load_excel_or_html(path)
     df = df_raw.copy()
     df = _normalize_headers(df)
     df = _cast_numeric(df, NUMERIC_COLS)
     df = _cast_dates(df, DATE_COLS)
+    return df, df_raw.attrs.get("rami_meta", {})
+
+
+def load_and_normalize_rami(path: str, cache: Optional[FrameCache] = None) -> pd.DataFrame:
+    """
+    Load RAMI file and normalize:
+    - headers (Hebrew -> English)
+    - numeric & date columns
+    With `cache`, a file whose content was normalized before is loaded from
+    it together with its header metadata (df.attrs["rami_meta"]).
+    """
+    df, meta, _ = cached_read(path, "rami", _read_and_normalize, cache)
+    df.attrs["rami_meta"] = meta
     return df
 
 
@@ -139,15 +128,20 @@ def extract_context(path: str, df_rami: pd.DataFrame) -> Dict[str, Any]:
     """
     base = os.path.basename(path)
     base_name = os.path.splitext(base)[0].strip()
+    meta = df_rami.attrs.get("rami_meta", {})
 
-    # detect type by filename
-    if base_name.startswith("גוש"):
+    # detect type by RAMI header, fallback to filename
+    if meta.get("filter_type"):
+        file_type = meta["filter_type"]
+    elif base_name.startswith("גוש"):
         file_type = "block"
     else:
         file_type = "city"
 
-    # dates from filename, fallback to sale_day column
-    date_from, date_to = _parse_dates_from_filename(base)
+    # dates from RAMI header, then filename, fallback to sale_day column
+    date_from, date_to = meta.get("date_from"), meta.get("date_to")
+    if date_from is None or date_to is None:
+        date_from, date_to = _parse_dates_from_filename(base)
     if (date_from is None or date_to is None) and "sale_day" in df_rami.columns:
         non_null = df_rami["sale_day"].dropna()
         if not non_null.empty:
@@ -181,6 +175,7 @@ def extract_context(path: str, df_rami: pd.DataFrame) -> Dict[str, Any]:
 
     return {
         "file_type": file_type,   # 'city' or 'block'
+        "property_type": meta.get("property_type"),
         "date_from": date_from,
         "date_to": date_to,
         "cities": cities,
@@ -0,0 +1,159 @@
+# core/result_writer.py
+
+import os
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is listed in requirements.txt
+    pa = None
+    pq = None
+
+# --------------------------------------
+# Configuration
+# --------------------------------------
+
+CSV = "csv"
+PARQUET = "parquet"
+FEATHER = "feather"
+
+# Formats of the tools' result files: name -> file extension and mimetype
+OUTPUT_FORMATS: Dict[str, Dict[str, str]] = {
+    CSV: {"extension": ".csv", "mimetype": "text/csv"},
+    PARQUET: {"extension": ".parquet", "mimetype": "application/vnd.apache.parquet"},
+    FEATHER: {"extension": ".feather", "mimetype": "application/vnd.apache.arrow.file"},
+}
+
+DEFAULT_OUTPUT_FORMAT = CSV
+
+# Object columns pyarrow stores as they are; anything else (e.g. numbers
+# mixed with text) is written as text
+_ARROW_OBJECT_KINDS = {
+    "empty", "string", "bytes", "integer", "floating", "mixed-integer-float",
+    "decimal", "boolean", "datetime64", "datetime", "date", "time",
+}
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+def check_output_format(fmt: Optional[str]) -> str:
+    """The normalized format name; ValueError for an unknown one."""
+    fmt = (fmt or DEFAULT_OUTPUT_FORMAT).strip().lower()
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {fmt} (choose one of {', '.join(OUTPUT_FORMATS)}).")
+    if fmt != CSV and pa is None:
+        raise ValueError(f"The {fmt} output format requires pyarrow.")
+    return fmt
+
+
+def result_filename(stem: str, fmt: str) -> str:
+    """'duplicates_scan_20240101' + parquet → 'duplicates_scan_20240101.parquet'."""
+    return stem + OUTPUT_FORMATS[fmt]["extension"]
+
+
+def mimetype_for(filename: str) -> Optional[str]:
+    """Mimetype of a result file by its extension (None: not a result format)."""
+    ext = os.path.splitext(filename)[1].lower()
+    for spec in OUTPUT_FORMATS.values():
+        if spec["extension"] == ext:
+            return spec["mimetype"]
+    return None
+
+
+def _arrow_table(df: pd.DataFrame) -> "pa.Table":
+    """
+    The frame as an Arrow table with its dtypes (numbers, dates, Arrow
+    strings) kept. Column names become text; object columns Arrow cannot
+    type – numbers mixed with text – are written as text, missing kept.
+    """
+    df = df.copy(deep=False)
+    df.columns = [str(c) for c in df.columns]
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) not in _ARROW_OBJECT_KINDS:
+            df[col] = series.map(str, na_action="ignore").astype(object)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            # All missing: typed as text, so later chunks with values still fit
+            table = table.set_column(i, field.name, pa.nulls(len(table), pa.large_string()))
+    return table
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def write_result(df: pd.DataFrame, path: str, fmt: str = DEFAULT_OUTPUT_FORMAT) -> None:
+    """
+    Write a tool's result frame: CSV as before (UTF-8 with BOM, for Excel),
+    Parquet / Feather with the column dtypes preserved.
+    """
+    if fmt == CSV:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+        return
+    with ResultWriter(path, fmt) as writer:
+        writer.write(df)
+
+
+class ResultWriter:
+    """
+    A result file written chunk by chunk (streaming modes): CSV chunks are
+    appended under one header; Parquet / Feather chunks are cast to the
+    schema of the first one and appended as row groups / record batches.
+
+        with ResultWriter(path, fmt) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, path: str, fmt: str = DEFAULT_OUTPUT_FORMAT):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._file: Any = None
+        self._writer: Any = None
+        self._schema: Optional["pa.Schema"] = None
+        self._started = False
+        if fmt == CSV:
+            self._file = open(path, "w", encoding="utf-8-sig", newline="")
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == CSV:
+            df.to_csv(self._file, index=False, header=not self._started)
+        else:
+            table = _arrow_table(df)
+            if self._writer is None:
+                self._schema = table.schema
+                if self.fmt == PARQUET:
+                    self._writer = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, self._schema)
+            else:
+                table = table.cast(self._schema)
+            self._writer.write_table(table)
+        self._started = True
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif self.fmt != CSV and not self._started:
+            # Nothing written – still leave a valid (column-less) file behind
+            self.write(pd.DataFrame())
+            self.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,521 @@
+# core/scan_reader.py
+
+import codecs
+import os
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.api.types import union_categoricals
+from pandas.io.parsers import TextParser
+
+from core.dates import parse_dates
+
+try:
+    import python_calamine
+except ImportError:  # Excel read through openpyxl only
+    python_calamine = None
+
+# --------------------------------------
+# Configuration
+# --------------------------------------
+
+# Rows per CSV chunk – peak memory of a read scales with this, not the file
+DEFAULT_CHUNK_ROWS = 200_000
+
+# Tried in order after the detected encoding, should that one still hit a
+# decode error (the read then restarts with the next one)
+CSV_ENCODINGS = ("utf-8", "cp1255", "latin1")
+
+# Leading bytes examined by detect_encoding; plain-ASCII files are scanned
+# on in blocks of _ASCII_BLOCK_BYTES (no parsing) up to their first
+# non-ASCII byte
+ENCODING_SAMPLE_BYTES = 1024 * 1024
+_ASCII_BLOCK_BYTES = 8 * 1024 * 1024
+
+_CSV_BOMS = (
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xff\xfe", "utf-16"),
+    (b"\xfe\xff", "utf-16"),
+)
+
+# Hebrew letters (alef – tav) in cp1255
+_CP1255_LETTERS = (0xE0, 0xFA)
+
+EXCEL_EXTENSIONS = (".xls", ".xlsx", ".xlsm")
+
+# Streamed row by row (iter_xlsx_chunks); .xls is read in one piece
+STREAMED_EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+# Column selection as accepted by pandas: names or a predicate on the header
+UseCols = Union[Sequence[str], Callable[[str], bool], None]
+
+# Picks the columns to read from the header row of a sheet: their
+# positions, or None when the sheet has no header
+ColumnPicker = Callable[[List[Any]], Optional[List[int]]]
+
+# Per-chunk step: returns the (usually smaller) part of the chunk to keep
+ChunkProcessor = Callable[[pd.DataFrame], Optional[pd.DataFrame]]
+
+# Position of a row in the scan file (0 = first data row), kept next to the
+# pruned columns so the full original row can be read back later
+ROW_COLUMN = "_scan_row"
+
+
+# --------------------------------------
+# Per-tool column declarations
+# --------------------------------------
+
+@dataclass
+class ScanColumns:
+    """
+    The scan columns a tool reads and the dtype each is kept in memory as:
+      "category" – repeated labels (city, property_type, ...)
+      "float32"  – numbers, stored as float32 only where that is lossless
+      "float64"  – numbers
+      "datetime" – dates, parsed day-first
+    Columns without a dtype keep the type they were read / normalized as.
+    """
+    required: List[str]
+    optional: List[str] = field(default_factory=list)
+    dtypes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def names(self) -> List[str]:
+        return self.required + self.optional
+
+    def usecols(self, canonical: Optional[Callable[[Any], Optional[str]]] = None) -> Callable[[Any], bool]:
+        """usecols predicate for a raw header (mapped by `canonical` first)."""
+        wanted = set(self.names)
+        if canonical is None:
+            return lambda col: col in wanted
+        return lambda col: canonical(col) in wanted
+
+    def missing(self, columns: Sequence[Any]) -> List[str]:
+        present = set(columns)
+        return [c for c in self.required if c not in present]
+
+    def apply_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        for col, kind in self.dtypes.items():
+            if col in df.columns:
+                df[col] = _as_kind(df[col], kind)
+        return df
+
+
+def _as_kind(series: pd.Series, kind: str) -> pd.Series:
+    if kind == "category":
+        return series.astype("category")
+    if kind == "datetime":
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        return parse_dates(series)
+    if kind in ("float32", "float64"):
+        # Only retype columns that already hold numbers – text stays text
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            return series
+        values = series.astype("float64")
+        if kind == "float32":
+            narrow = values.astype("float32")
+            same = (narrow.to_numpy(dtype="float64") == values.to_numpy()) | values.isna().to_numpy()
+            if same.all():
+                return narrow
+        return values
+    raise ValueError(f"Unknown scan column dtype: {kind}")
+
+
+# --------------------------------------
+# Helpers
+# --------------------------------------
+
+def _non_ascii_sample(f: BinaryIO, head: bytes, sample_bytes: int) -> bytes:
+    """
+    `head` if it holds non-ASCII bytes; otherwise up to `sample_bytes` from
+    the first non-ASCII byte further on (b"" when the file is all ASCII).
+    """
+    if not head.isascii():
+        return head
+    while True:
+        block = f.read(_ASCII_BLOCK_BYTES)
+        if not block:
+            return b""
+        if block.isascii():
+            continue
+        start = int(np.argmax(np.frombuffer(block, dtype=np.uint8) >= 0x80))
+        sample = block[start:start + sample_bytes]
+        if len(sample) < sample_bytes:
+            sample += f.read(sample_bytes - len(sample))
+        return sample
+
+
+def _classify_bytes(sample: bytes) -> Tuple[str, float]:
+    try:
+        # Incremental: a character cut off at the end of the sample is fine
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8", 0.99
+    except UnicodeDecodeError:
+        pass
+
+    data = np.frombuffer(sample, dtype=np.uint8)
+    lo, hi = _CP1255_LETTERS
+    letters = (data >= lo) & (data <= hi)
+    high = int((data >= 0x80).sum())
+    hebrew_share = float(letters.sum()) / high if high else 0.0
+
+    # The same bytes are accented Latin letters (é, è, ï) in latin1 – those
+    # sit inside words of ASCII letters, Hebrew letters practically never do
+    lower = data | 0x20
+    ascii_letter = (lower >= ord("a")) & (lower <= ord("z"))
+    beside_ascii = np.zeros(len(data), dtype=bool)
+    beside_ascii[1:] |= ascii_letter[:-1]
+    beside_ascii[:-1] |= ascii_letter[1:]
+    latin_like = float((letters & beside_ascii).sum()) / max(int(letters.sum()), 1)
+    score = hebrew_share * (1.0 - latin_like)
+
+    try:
+        sample.decode("cp1255")
+    except UnicodeDecodeError:
+        score = 0.0  # bytes cp1255 does not define
+    if score >= 0.5:
+        return "cp1255", round(score, 2)
+
+    # Decodes anything – the encoding of last resort
+    return "latin1", round(max(1.0 - score, 0.5), 2)
+
+
+def iter_csv_chunks(
+    path: str,
+    encoding: str,
+    usecols: UseCols = None,
+    dtype: Any = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Yield the CSV as DataFrames of at most `chunk_rows` rows."""
+    with pd.read_csv(
+        path,
+        encoding=encoding,
+        usecols=usecols,
+        dtype=dtype,
+        chunksize=max(int(chunk_rows), 1),
+    ) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def _concat(parts: List[pd.DataFrame], empty: pd.DataFrame) -> pd.DataFrame:
+    if not parts:
+        return empty
+    if len(parts) == 1:
+        return parts[0].reset_index(drop=True)
+
+    # Chunks see different labels; give categorical columns one shared set
+    # of categories so they stay categorical after concat
+    for col in parts[0].columns:
+        if not all(isinstance(p[col].dtype, pd.CategoricalDtype) for p in parts):
+            continue
+        categories = union_categoricals([p[col] for p in parts]).categories
+        for p in parts:
+            p[col] = p[col].cat.set_categories(categories)
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def _excel_cell(value: Any) -> Any:
+    """A cell value as pandas' openpyxl / calamine readers pass it on."""
+    if value is None:
+        return ""
+    if type(value) is float and value.is_integer():
+        return int(value)
+    if type(value) is date:
+        return datetime(value.year, value.month, value.day)
+    if type(value) is str and value in ERROR_CODES:
+        return np.nan
+    return value
+
+
+def _excel_columns(header: List[Any], usecols: UseCols) -> Tuple[List[int], List[Any]]:
+    """
+    Positions and names of the selected columns, named and selected by the
+    same parser read_excel uses (so "Unnamed: 3", "price.1" and the usecols
+    semantics are unchanged).
+    """
+    names = TextParser([header], header=0, skip_blank_lines=False).read().columns
+    picked = TextParser([header], header=0, usecols=usecols, skip_blank_lines=False).read().columns
+    return [names.get_loc(name) for name in picked], list(picked)
+
+
+def _selected(rows: Iterator[Sequence[Any]], positions: List[int]) -> Iterator[Optional[List[Any]]]:
+    """
+    The values at `positions` of each row of cell values, or None for a
+    blank row.
+    """
+    for row in rows:
+        if all(v is None or v == "" for v in row):
+            yield None
+        else:
+            yield [_excel_cell(row[i]) if i < len(row) else "" for i in positions]
+
+
+def _openpyxl_rows(path: str, pick: ColumnPicker) -> Iterator[Optional[List[Any]]]:
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise ValueError(f"Could not read Excel file: {e}") from e
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        first = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        positions = pick([_excel_cell(v) for v in first])
+        if positions is None:
+            return
+        yield from _selected(sheet.iter_rows(min_row=2, values_only=True), positions)
+    finally:
+        workbook.close()
+
+
+def _calamine_rows(path: str, pick: ColumnPicker) -> Iterator[Optional[List[Any]]]:
+    try:
+        workbook = python_calamine.CalamineWorkbook.from_path(path)
+    except python_calamine.CalamineError as e:
+        raise ValueError(f"Could not read Excel file: {e}") from e
+    try:
+        sheet = workbook.get_sheet_by_index(0)
+        if sheet.start in (None, (0, 0)):
+            rows = iter(sheet.iter_rows())
+        else:
+            # Used range not starting at A1 – padded the way read_excel does
+            rows = iter(sheet.to_python(skip_empty_area=False))
+        positions = pick([_excel_cell(v) for v in next(rows, [])])
+        if positions is None:
+            return
+        yield from _selected(rows, positions)
+    finally:
+        workbook.close()
+
+
+def iter_xlsx_chunks(
+    path: str,
+    usecols: UseCols = None,
+    dtype: Any = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the first sheet of an .xlsx / .xlsm file as DataFrames of at most
+    `chunk_rows` rows, as pd.read_excel would read it. The sheet is streamed
+    row by row – by calamine when python-calamine is installed, otherwise
+    by a read-only openpyxl workbook – and only the cells of the selected
+    columns are converted. Columns right of the last header
+    cell are not read; a sheet with an empty first row reads as empty.
+    """
+    chunk_rows = max(int(chunk_rows), 1)
+    names: List[Any] = []
+
+    def _pick(header: List[Any]) -> Optional[List[int]]:
+        while header and header[-1] == "":
+            header.pop()
+        if not header:
+            return None
+        positions, picked = _excel_columns(header, usecols)
+        names.extend(picked)
+        return positions
+
+    def _frame(block: List[List[Any]], start: int) -> pd.DataFrame:
+        chunk = TextParser(block, names=names, header=None, dtype=dtype, skip_blank_lines=False).read()
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        return chunk
+
+    rows = _calamine_rows(path, _pick) if python_calamine is not None else _openpyxl_rows(path, _pick)
+    block: List[List[Any]] = []
+    blank = 0  # blank rows are kept only if data follows (as read_excel)
+    start = 0
+    for values in rows:
+        if values is None:
+            blank += 1
+            continue
+        block.extend([""] * len(names) for _ in range(blank))
+        blank = 0
+        block.append(values)
+        if len(block) >= chunk_rows:
+            yield _frame(block, start)
+            start += len(block)
+            block = []
+
+    if names and (block or start == 0):
+        yield _frame(block, start)
+
+
+def _iter_excel_chunks(
+    path: str,
+    usecols: UseCols,
+    dtype: Any,
+    chunk_rows: int,
+) -> Iterator[pd.DataFrame]:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in STREAMED_EXCEL_EXTENSIONS:
+        yield from iter_xlsx_chunks(path, usecols, dtype, chunk_rows)
+        return
+    # .xls: read in one piece (calamine when installed, else xlrd)
+    engine = "calamine" if python_calamine is not None else None
+    yield pd.read_excel(path, usecols=usecols, dtype=dtype, engine=engine)
+
+
+def _read_processed(
+    chunks: Iterator[pd.DataFrame],
+    process: Optional[ChunkProcessor],
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    parts: List[pd.DataFrame] = []
+    empty: Optional[pd.DataFrame] = None
+    rows_read = 0
+    count = 0
+    columns: List[str] = []
+
+    for chunk in chunks:
+        count += 1
+        rows_read += len(chunk)
+        if count == 1:
+            columns = [str(c) for c in chunk.columns]
+        kept = process(chunk) if process is not None else chunk
+        if kept is None:
+            continue
+        if empty is None:
+            empty = kept.iloc[:0]
+        if len(kept):
+            parts.append(kept)
+
+    if empty is None:
+        # No data rows (or every chunk dropped) – keep the header's columns
+        empty = pd.DataFrame(columns=columns)
+
+    info = {
+        "rows_read": rows_read,
+        "chunks": count,
+        "column_names": columns,
+    }
+    return _concat(parts, empty), info
+
+
+# --------------------------------------
+# Public API
+# --------------------------------------
+
+def detect_encoding(path: str, sample_bytes: int = ENCODING_SAMPLE_BYTES) -> Tuple[str, float]:
+    """
+    Encoding of a CSV file from its bytes, without parsing it, and a
+    confidence in [0, 1]:
+      - a BOM decides (1.0); a file that is all ASCII is utf-8 (1.0)
+      - valid UTF-8 with non-ASCII characters is utf-8 (0.99)
+      - cp1255 when the sample decodes as cp1255 and most of its non-ASCII
+        bytes are Hebrew letters outside ASCII words (confidence: their share)
+      - latin1 otherwise (confidence: how little it looked like cp1255)
+    Examines the first `sample_bytes` bytes, or – when those are plain
+    ASCII – as many from the first non-ASCII byte on.
+    """
+    with open(path, "rb") as f:
+        head = f.read(sample_bytes)
+        for bom, encoding in _CSV_BOMS:
+            if head.startswith(bom):
+                return encoding, 1.0
+        sample = _non_ascii_sample(f, head, sample_bytes)
+    if not sample:
+        return "utf-8", 1.0
+    return _classify_bytes(sample)
+
+
+def read_scan_table(
+    path: str,
+    process: Optional[ChunkProcessor] = None,
+    usecols: UseCols = None,
+    dtype: Any = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    encodings: Optional[Sequence[str]] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Read a scan file with only the columns in `usecols` and explicit
+    `dtype`, passing it through `process` piece by piece and concatenating
+    what `process` keeps.
+
+    CSV and .xlsx / .xlsm files are read in chunks of `chunk_rows` rows, so
+    normalization and filtering run per chunk and only their results are
+    held in memory (iter_csv_chunks / iter_xlsx_chunks). .xls files are
+    read by pd.read_excel and processed in one piece.
+
+    The CSV encoding is detected from the file's bytes (detect_encoding),
+    so normally the file is parsed exactly once; `encodings` overrides the
+    detection with a list to try in order.
+
+    Returns (df, info) with info keys: extension, encoding,
+    encoding_confidence (None unless detected), rows_read, chunks,
+    column_names (header of the selected columns).
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".csv":
+        confidence: Optional[float] = None
+        if encodings is None:
+            detected, confidence = detect_encoding(path)
+            encodings = [detected] + [e for e in CSV_ENCODINGS if e != detected]
+
+        last_error: Optional[Exception] = None
+        for attempt, encoding in enumerate(encodings):
+            try:
+                df, info = _read_processed(
+                    iter_csv_chunks(path, encoding, usecols, dtype, chunk_rows), process
+                )
+                info.update(extension=ext, encoding=encoding)
+                if attempt and confidence is not None:
+                    confidence = 0.0  # the detected encoding failed after all
+                info["encoding_confidence"] = confidence
+                return df, info
+            except UnicodeDecodeError as e:
+                last_error = e
+        raise ValueError(
+            f"Could not read CSV file with common encodings. Last error: {last_error}"
+        )
+
+    if ext in EXCEL_EXTENSIONS:
+        df, info = _read_processed(_iter_excel_chunks(path, usecols, dtype, chunk_rows), process)
+        info.update(extension=ext, encoding="excel", encoding_confidence=None)
+        return df, info
+
+    raise ValueError(f"Unsupported scan file type: {ext}")
+
+
+def with_row_positions(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    The chunk with ROW_COLUMN (the row's position in the file) added – a
+    new frame, so filtered slices (chunk.loc[mask]) can be passed as is.
+    """
+    return chunk.assign(**{ROW_COLUMN: chunk.index.to_numpy(dtype=np.int64)})
+
+
+def read_scan_rows(
+    path: str,
+    positions: Sequence[int],
+    encoding: Optional[str] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """
+    Full original rows (every column, as text) at the given file positions,
+    returned in the order of `positions` – used to export the complete rows
+    behind a result that was computed on pruned columns.
+    """
+    wanted = np.asarray(positions, dtype=np.int64)
+    lookup = np.unique(wanted)
+
+    def _keep(chunk: pd.DataFrame) -> pd.DataFrame:
+        rows = chunk.index.to_numpy(dtype=np.int64)
+        return with_row_positions(chunk.loc[np.isin(rows, lookup)])
+
+    rows, _ = read_scan_table(
+        path,
+        process=_keep,
+        dtype=str,
+        chunk_rows=chunk_rows,
+        encodings=[encoding] if encoding and encoding != "excel" else None,
+    )
+    rows = rows.set_index(ROW_COLUMN, drop=True)
+    return rows.loc[wanted].reset_index(drop=True)
@@ -1,10 +1,30 @@
+import multiprocessing
 import os
 import re
+import shutil
+import tempfile
+import time
 import zipfile
-from typing import Dict, Any, List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Tuple, Optional, BinaryIO, Callable
 
+import numpy as np
 import pandas as pd
 
+from core.anti_join import anti_join
+from core.dates import parse_dates
+from core.frame_cache import CACHE_HIT, FrameCache, cached_read
+from core.near_match import LEFT_ROW, SCORE, NearMatchRules, near_pairs
+from core.numeric import to_number
+from core.rami_loader import RamiSource, read_rami_document
+from core.result_writer import (
+    DEFAULT_OUTPUT_FORMAT,
+    check_output_format,
+    result_filename,
+    write_result,
+)
+from core.scan_reader import DEFAULT_CHUNK_ROWS, ScanColumns, read_scan_table
+
 
 # ------------------------------------------------------------------
 # Column configuration
@@ -76,6 +96,42 @@ NUMERIC_COLUMNS = [
 
 DATE_COLUMNS = ["sale_day"]
 
+# Scan columns the check uses (keys + city for the city filter) and how they
+# are kept in memory; the rest of the scan file is never loaded
+SCAN_COLUMNS = ScanColumns(
+    required=KEY_COLUMNS,
+    optional=["city"],
+    dtypes={
+        "city": "category",
+        "sale_day": "datetime",
+        "sold_part": "float32",
+        "build_year": "float32",
+        "rooms_number": "float32",
+    },
+)
+
+# Tolerant matching: a RAMI deal the exact anti-join misses still counts as
+# found ("near_match") if a scan row in the same block_lot and sale_day is
+# within formatting / rounding distance on the numeric keys
+TAX_GAP_NEAR_RULES = NearMatchRules(
+    block_column="block_lot",
+    date_column="sale_day",
+    date_tolerance_days=0,
+    numeric_tolerances={
+        "declared_profit": 1.0,
+        "sale_profit": 1.0,
+        "building_mr": 0.5,
+        "sold_part": 0.001,
+    },
+    exact=["build_year", "rooms_number"],
+)
+
+MATCH_MISSING = "missing"
+MATCH_NEAR = "near_match"
+
+# ZIP members above this size are buffered in a temp file rather than in memory
+RAMI_SPILL_BYTES = 32 * 1024 * 1024
+
 
 def _format_ts(ts: Optional[pd.Timestamp]) -> str:
     """Format a Timestamp (or None) to a yyyy-mm-dd string or 'unknown'."""
@@ -90,6 +146,18 @@ def _format_ts(ts: Optional[pd.Timestamp]) -> str:
 # Helpers: reading & normalizing data
 # ------------------------------------------------------------------
 
+def _canonical_name(col: Any) -> Optional[str]:
+    """Canonical English name of a Hebrew / English-variant header, else None."""
+    col_str = str(col).strip()
+
+    # Hebrew exact match
+    if col_str in HEBREW_TO_CANONICAL:
+        return HEBREW_TO_CANONICAL[col_str]
+
+    # English aliases (case-insensitive)
+    return ENGLISH_ALIASES.get(col_str.lower())
+
+
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
     Rename Hebrew and English-variant columns to the canonical English names.
@@ -98,17 +166,9 @@ def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     rename_map: Dict[str, str] = {}
 
     for col in df.columns:
-        col_str = str(col).strip()
-
-        # Hebrew exact match
-        if col_str in HEBREW_TO_CANONICAL:
-            rename_map[col] = HEBREW_TO_CANONICAL[col_str]
-            continue
-
-        # English aliases (case-insensitive)
-        col_lower = col_str.lower()
-        if col_lower in ENGLISH_ALIASES:
-            rename_map[col] = ENGLISH_ALIASES[col_lower]
+        canonical = _canonical_name(col)
+        if canonical is not None:
+            rename_map[col] = canonical
 
     if rename_map:
         df = df.rename(columns=rename_map)
@@ -121,151 +181,73 @@ def _clean_numeric_and_dates(df: pd.DataFrame) -> pd.DataFrame:
     # Numeric columns
     for col in NUMERIC_COLUMNS:
         if col in df.columns:
-            series = df[col].astype(str)
-            series = (
-                series.str.replace(",", "", regex=False)
-                .str.replace(" ", "", regex=False)
-                .str.replace("\u200f", "", regex=False)
-                .str.replace("\u200e", "", regex=False)
-            )
-            df[col] = pd.to_numeric(series, errors="coerce")
+            df[col] = to_number(df[col])
 
     # Date columns
     for col in DATE_COLUMNS:
         if col in df.columns:
-            df[col] = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
+            df[col] = parse_dates(df[col])
 
     return df
 
 
-def _read_scan_file(path: str) -> pd.DataFrame:
-    ext = os.path.splitext(path)[1].lower()
-    if ext == ".csv":
-        df = pd.read_csv(path)
-    elif ext in (".xls", ".xlsx", ".xlsm"):
-        df = pd.read_excel(path)
-    else:
-        raise ValueError(f"Unsupported scan file type: {ext}")
-    df = _normalize_columns(df)
-    df = _clean_numeric_and_dates(df)
-    return df
+def _normalize_scan_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    chunk = _normalize_columns(chunk)
+    chunk = _clean_numeric_and_dates(chunk)
+    return SCAN_COLUMNS.apply_dtypes(chunk)
 
 
-def _read_rami_file(path: str) -> pd.DataFrame:
+def _read_scan_file(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> pd.DataFrame:
     """
-    RAMI file can be a real Excel or an HTML-style .xls file.
-    We try Excel first; if that fails we treat it as HTML.
+    Read only the SCAN_COLUMNS of the scan (as text, so every chunk gets the
+    same types) and normalize them chunk by chunk into their declared
+    dtypes; the raw text of a chunk is dropped once that is done.
     """
-    ext = os.path.splitext(path)[1].lower()
-
-    if ext in (".xlsx", ".xlsm", ".xls"):
-        # Try as Excel first
-        try:
-            df = pd.read_excel(path)
-        except Exception:
-            # HTML-style .xls (RAMI style)
-            if ext == ".xls":
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    html = f.read()
-                tables = pd.read_html(html)
-                if not tables:
-                    raise ValueError("Failed to parse RAMI .xls file as HTML.")
-                df = tables[0]
-            else:
-                raise
-    else:
-        raise ValueError(f"Unsupported RAMI file type: {ext}")
-
-    df = _normalize_columns(df)
-    df = _clean_numeric_and_dates(df)
+    df, _ = read_scan_table(
+        path,
+        process=_normalize_scan_chunk,
+        usecols=SCAN_COLUMNS.usecols(_canonical_name),
+        dtype=str,
+        chunk_rows=chunk_rows,
+    )
     return df
 
 
-# ------------------------------------------------------------------
-# Parse filter & dates from cells A2–A4 (preferred) or filename (fallback)
-# ------------------------------------------------------------------
+def _read_rami_document(source: RamiSource, name: Optional[str]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    doc = read_rami_document(source, name)
+    df = _normalize_columns(doc.table)
+    df = _clean_numeric_and_dates(df)
+    return df, doc.meta()
+
 
-def _parse_rami_from_cells(path: str) -> Optional[Tuple[str, str, Optional[pd.Timestamp], Optional[pd.Timestamp]]]:
+def _read_rami_file(
+    source: RamiSource,
+    name: Optional[str] = None,
+    rami_cache: Optional[FrameCache] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Any], str]:
     """
-    Try to identify filter_type (city/block), filter_value and date range
-    by reading the first column cells A2–A4 (rows 2–4) from the RAMI file.
-    If parsing fails, return None and let caller fallback to filename logic.
+    RAMI file can be a real Excel or an HTML-style .xls file, given as a
+    path or as an in-memory buffer (`name` then gives its file name).
+    The file is read once (parser chosen by sniffing its leading bytes);
+    returns the normalized deals frame, the header metadata used for the
+    filter / date context (see RamiDocument.meta) and the cache status.
+    A file whose content is already in `rami_cache` is not parsed again.
     """
-    ext = os.path.splitext(path)[1].lower()
-    if ext not in (".xls", ".xlsx", ".xlsm"):
-        return None
-
-    try:
-        meta_df = pd.read_excel(path, header=None, usecols=[0], nrows=4)
-    except Exception:
-        return None
-
-    # Extract A2–A4 as strings
-    values: List[str] = []
-    for row_idx in range(1, 4):  # row indices 1,2,3 => A2,A3,A4
-        if row_idx < len(meta_df.index):
-            v = meta_df.iloc[row_idx, 0]
-            if pd.notna(v):
-                text = str(v).strip()
-                if text:
-                    values.append(text)
-
-    if not values:
-        return None
-
-    meta_text = " ".join(values)
+    return cached_read(
+        source,
+        "tax_gap_rami",
+        lambda src: _read_rami_document(src, name),
+        rami_cache,
+    )
 
-    # --- Detect type & filter value ---
-
-    has_hebrew = bool(re.search(r"[\u0590-\u05FF]", meta_text))
-    digits = re.findall(r"\d+", meta_text)
-
-    filter_type: Optional[str] = None
-    filter_value: Optional[str] = None
-
-    # 1) Explicit "גוש" → block
-    if "גוש" in meta_text:
-        filter_type = "block"
-        m = re.search(r"גוש\s*([\d, ]+)", meta_text)
-        if m:
-            nums = re.findall(r"\d+", m.group(1))
-            if nums:
-                filter_value = ",".join(nums)
-        if not filter_value and digits:
-            filter_value = ",".join(digits)
-
-    # 2) No "גוש", but digits and no Hebrew → also block (e.g. "3653_")
-    elif digits and not has_hebrew:
-        filter_type = "block"
-        filter_value = ",".join(digits)
-
-    # 3) Otherwise → city, take A2 as city name
-    else:
-        filter_type = "city"
-        filter_value = values[0]
-
-    # --- Dates from A2–A4 text ---
-
-    # Allow dd.mm.yy, dd.mm.yyyy, dd/mm/yy, dd/mm/yyyy
-    date_strings = re.findall(r"\d{1,2}[./]\d{1,2}[./]\d{2,4}", meta_text)
-    date_from: Optional[pd.Timestamp] = None
-    date_to: Optional[pd.Timestamp] = None
-
-    if len(date_strings) >= 1:
-        date_from = pd.to_datetime(date_strings[0], dayfirst=True, errors="coerce")
-    if len(date_strings) >= 2:
-        date_to = pd.to_datetime(date_strings[1], dayfirst=True, errors="coerce")
-
-    # If we couldn't get any reasonable filter info, bail out
-    if not filter_type or not filter_value:
-        return None
-
-    return filter_type, filter_value, date_from, date_to
 
+# ------------------------------------------------------------------
+# Parse filter & dates from the RAMI header (preferred) or filename (fallback)
+# ------------------------------------------------------------------
 
 def _parse_rami_from_filename(path: str) -> Tuple[str, str, Optional[pd.Timestamp], Optional[pd.Timestamp]]:
     """
-    Fallback: old behavior – use filename if we can't read A2–A4.
+    Fallback: old behavior – use filename if the RAMI header has no filter info.
     """
     base = os.path.splitext(os.path.basename(path))[0]
 
@@ -301,14 +283,31 @@ def _parse_rami_from_filename(path: str) -> Tuple[str, str, Optional[pd.Timestam
     return filter_type, filter_value, date_from, date_to
 
 
-def _parse_rami_context(path: str) -> Tuple[str, str, Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+def _parse_rami_context(
+    rami_meta: Dict[str, Any],
+    path: str,
+) -> Tuple[str, str, Optional[pd.Timestamp], Optional[pd.Timestamp]]:
     """
-    Main entry: first try A2–A4; if that fails, fallback to filename.
+    Main entry: first use the header parsed with the document (HTML preamble
+    or cells A2–A4); whatever it lacks – the filter, or either date – is
+    taken from the filename.
     """
-    meta_res = _parse_rami_from_cells(path)
-    if meta_res is not None:
-        return meta_res
-    return _parse_rami_from_filename(path)
+    name_type, name_value, name_from, name_to = _parse_rami_from_filename(path)
+
+    def _header_or_name(key: str, fallback: Optional[pd.Timestamp]) -> Optional[pd.Timestamp]:
+        value = rami_meta.get(key)
+        return fallback if value is None or pd.isna(value) else value
+
+    if rami_meta.get("filter_type") and rami_meta.get("filter_value"):
+        filter_type, filter_value = rami_meta["filter_type"], rami_meta["filter_value"]
+    else:
+        filter_type, filter_value = name_type, name_value
+    return (
+        filter_type,
+        filter_value,
+        _header_or_name("date_from", name_from),
+        _header_or_name("date_to", name_to),
+    )
 
 
 # ------------------------------------------------------------------
@@ -340,75 +339,167 @@ def _filter_rami_by_dates(
     return out
 
 
-def _filter_scan_by_context(
-    df_scan: pd.DataFrame,
-    filter_type: str,
-    filter_value: str,
-    date_from: Optional[pd.Timestamp],
-    date_to: Optional[pd.Timestamp],
-    rami_context_df: Optional[pd.DataFrame] = None,
-) -> pd.DataFrame:
+class ScanIndex:
     """
-    Apply date range + city/block filter on the internal scan file.
+    The internal scan prepared once per run for repeated per-RAMI filtering:
 
-    City:
-      - Prefer using distinct city names from RAMI
-        (`rami_context_df['city']`) and keep scan rows whose city is in that set.
-      - If not available, fall back to using filter_value as a substring on city.
+      - rows sorted by sale_day (NaT last), so a date range is a binary-search
+        slice of positions;
+      - city values and normalized block IDs stored as categorical codes, with
+        the (sorted) row positions of every code, so a city/block filter is a
+        dictionary lookup instead of a scan of all rows.
 
-    Block:
-      - Prefer using distinct block IDs from RAMI (`block_lot` → normalized),
-        and keep scan rows whose normalized block ID is in that set.
-      - If not available, fall back to using filter_value (digits only).
+    `filter` returns only the selected rows; the full scan is never copied again.
     """
-    out = df_scan.copy()
 
-    # --- Date range ---
-    if "sale_day" in out.columns and date_from is not None and date_to is not None:
-        out = out[(out["sale_day"] >= date_from) & (out["sale_day"] <= date_to)]
+    def __init__(self, df_scan: pd.DataFrame):
+        if "sale_day" in df_scan.columns:
+            days = df_scan["sale_day"]
+            order = np.lexsort((days.to_numpy(dtype="datetime64[ns]"), days.isna().to_numpy()))
+            df_scan = df_scan.iloc[order].reset_index(drop=True)
+            self._days = df_scan["sale_day"].to_numpy(dtype="datetime64[ns]")
+            self._dated = int(df_scan["sale_day"].notna().sum())
+        else:
+            df_scan = df_scan.reset_index(drop=True)
+            self._days = None
+            self._dated = 0
+
+        self.df = df_scan
 
-    if rami_context_df is None:
-        return out
-
-    # --- City context ---
-    if filter_type == "city" and "city" in out.columns:
-        if "city" in rami_context_df.columns:
-            cities = (
-                rami_context_df["city"]
-                .dropna()
-                .astype(str)
-                .unique()
+        self._city_lookup: Dict[str, int] = {}
+        self._city_positions: List[np.ndarray] = []
+        if "city" in df_scan.columns:
+            self._city_lookup, self._city_positions = self._build_postings(
+                df_scan["city"].astype(str)
             )
-            cities_set = {c for c in cities if c}
-            if cities_set:
-                out = out[out["city"].astype(str).isin(cities_set)]
-                return out
-
-        # Fallback: use filter_value from cells/filename
-        fv = str(filter_value).strip()
-        if fv:
+
+        self._block_lookup: Dict[str, int] = {}
+        self._block_positions: List[np.ndarray] = []
+        if "block_lot" in df_scan.columns:
+            self._block_lookup, self._block_positions = self._build_postings(
+                _extract_block_ids_from_series(df_scan["block_lot"])
+            )
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @staticmethod
+    def _build_postings(values: pd.Series) -> Tuple[Dict[str, int], List[np.ndarray]]:
+        """Map each distinct value to a code and each code to its row positions."""
+        codes, uniques = pd.factorize(values, sort=False)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        start = int((codes < 0).sum())  # factorize gives -1 for missing values
+        positions = np.split(order[start:], np.cumsum(counts)[:-1]) if len(uniques) else []
+        lookup = {str(v): i for i, v in enumerate(uniques)}
+        return lookup, positions
+
+    def _date_bounds(
+        self,
+        date_from: Optional[pd.Timestamp],
+        date_to: Optional[pd.Timestamp],
+    ) -> Tuple[int, int]:
+        if self._days is None or date_from is None or date_to is None:
+            return 0, len(self.df)
+        dated = self._days[:self._dated]
+        lo = int(np.searchsorted(dated, np.datetime64(date_from, "ns"), side="left"))
+        hi = int(np.searchsorted(dated, np.datetime64(date_to, "ns"), side="right"))
+        return lo, max(lo, hi)
+
+    @staticmethod
+    def _positions_for(
+        lookup: Dict[str, int],
+        postings: List[np.ndarray],
+        keys: Any,
+        lo: int,
+        hi: int,
+    ) -> np.ndarray:
+        parts = []
+        for key in keys:
+            code = lookup.get(key)
+            if code is None:
+                continue
+            rows = postings[code]
+            parts.append(rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)])
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(parts))
+
+    def filter(
+        self,
+        filter_type: str,
+        filter_value: str,
+        date_from: Optional[pd.Timestamp],
+        date_to: Optional[pd.Timestamp],
+        rami_context_df: Optional[pd.DataFrame] = None,
+    ) -> pd.DataFrame:
+        """
+        Apply date range + city/block filter on the internal scan file.
+
+        City:
+          - Prefer using distinct city names from RAMI
+            (`rami_context_df['city']`) and keep scan rows whose city is in that set.
+          - If not available, fall back to using filter_value as a substring on city.
+
+        Block:
+          - Prefer using distinct block IDs from RAMI (`block_lot` → normalized),
+            and keep scan rows whose normalized block ID is in that set.
+          - If not available, fall back to using filter_value (digits only).
+        """
+        lo, hi = self._date_bounds(date_from, date_to)
+
+        if rami_context_df is None:
+            return self.df.iloc[lo:hi]
+
+        # --- City context ---
+        if filter_type == "city" and "city" in self.df.columns:
+            if "city" in rami_context_df.columns:
+                cities = (
+                    rami_context_df["city"]
+                    .dropna()
+                    .astype(str)
+                    .unique()
+                )
+                cities_set = {c for c in cities if c}
+                if cities_set:
+                    positions = self._positions_for(
+                        self._city_lookup, self._city_positions, cities_set, lo, hi
+                    )
+                    return self.df.iloc[positions]
+
+            # Fallback: use filter_value from cells/filename, matched against
+            # the distinct city names rather than every row
+            fv = str(filter_value).strip()
+            if not fv:
+                return self.df.iloc[lo:hi]
             pattern = re.escape(fv)
-            out = out[out["city"].astype(str).str.contains(pattern, case=False, na=False)]
-        return out
-
-    # --- Block context ---
-    if filter_type == "block" and "block_lot" in out.columns:
-        if "block_lot" in rami_context_df.columns:
-            rami_blocks = _extract_block_ids_from_series(rami_context_df["block_lot"])
-            rami_blocks_set = {b for b in rami_blocks.unique() if b}
-            if rami_blocks_set:
-                scan_blocks = _extract_block_ids_from_series(out["block_lot"])
-                out = out[scan_blocks.isin(rami_blocks_set)]
-                return out
-
-        # Fallback: use filter_value digits only
-        fv_digits = re.sub(r"\D", "", str(filter_value))
-        fv_block = fv_digits.lstrip("0") or fv_digits
-        scan_blocks = _extract_block_ids_from_series(out["block_lot"])
-        out = out[scan_blocks == fv_block]
-        return out
+            names = pd.Series(list(self._city_lookup), dtype=object)
+            matched = names[names.str.contains(pattern, case=False, na=False)]
+            positions = self._positions_for(
+                self._city_lookup, self._city_positions, matched, lo, hi
+            )
+            return self.df.iloc[positions]
+
+        # --- Block context ---
+        if filter_type == "block" and "block_lot" in self.df.columns:
+            if "block_lot" in rami_context_df.columns:
+                rami_blocks = _extract_block_ids_from_series(rami_context_df["block_lot"])
+                rami_blocks_set = {b for b in rami_blocks.unique() if b}
+                if rami_blocks_set:
+                    positions = self._positions_for(
+                        self._block_lookup, self._block_positions, rami_blocks_set, lo, hi
+                    )
+                    return self.df.iloc[positions]
 
-    return out
+            # Fallback: use filter_value digits only
+            fv_digits = re.sub(r"\D", "", str(filter_value))
+            fv_block = fv_digits.lstrip("0") or fv_digits
+            positions = self._positions_for(
+                self._block_lookup, self._block_positions, [fv_block], lo, hi
+            )
+            return self.df.iloc[positions]
+
+        return self.df.iloc[lo:hi]
 
 
 def _ensure_required_columns(df: pd.DataFrame, label: str) -> None:
@@ -424,25 +515,79 @@ def _ensure_required_columns(df: pd.DataFrame, label: str) -> None:
 # Core per-RAMI-file logic
 # ------------------------------------------------------------------
 
+def _error_file_stats(file_name: str, error_message: str) -> Dict[str, Any]:
+    """Per-file stats entry for a RAMI file that could not be processed."""
+    return {
+        "rami_filename": file_name,
+        "status": "error",
+        "rami_format": None,
+        "rami_cache": None,
+        "filter_type": None,
+        "filter_value": None,
+        "date_from": None,
+        "date_to": None,
+        "rami_rows_total": 0,
+        "rami_rows_filtered": 0,
+        "scan_rows_filtered": 0,
+        "missing_count": 0,
+        "exact_missing_count": 0,
+        "near_match_count": 0,
+        "error_message": error_message,
+        "elapsed_seconds": 0.0,
+    }
+
+
+def _flag_near_matches(
+    missing_df: pd.DataFrame,
+    scan_filtered: pd.DataFrame,
+    rules: NearMatchRules,
+) -> pd.DataFrame:
+    """
+    Second stage after the exact anti-join, on the unmatched RAMI rows only:
+    a bucketed near-match search (same normalized block_lot and sale month,
+    numeric tolerances from `rules`) against the filtered scan.
+    Adds match_status ("near_match" / "missing") and near_score (best score,
+    empty for missing rows).
+    """
+    flagged = missing_df.copy()
+    best = pd.Series(np.nan, index=range(len(flagged)))
+    if len(flagged) and len(scan_filtered):
+        pairs = near_pairs(flagged, scan_filtered, rules)
+        best = best.fillna(pairs.groupby(LEFT_ROW)[SCORE].max())
+
+    flagged["match_status"] = np.where(best.notna(), MATCH_NEAR, MATCH_MISSING)
+    flagged["near_score"] = best.to_numpy()
+    return flagged
+
+
 def _gap_for_one_rami(
-    scan_df_all: pd.DataFrame,
-    rami_path: str,
+    scan_index: ScanIndex,
+    rami_source: RamiSource,
+    file_name: Optional[str] = None,
+    rami_cache: Optional[FrameCache] = None,
+    near_rules: Optional[NearMatchRules] = None,
 ) -> Tuple[Dict[str, Any], pd.DataFrame]:
     """
-    Run the gap logic for a single RAMI file (already on disk).
+    Run the gap logic for a single RAMI file (path on disk or in-memory
+    buffer; `file_name` is required for buffers).
     Returns:
       file_stats: dict describing this RAMI file
       missing_df: DataFrame of missing deals (RAMI not in scan) for this file
+    With near_rules, deals without an exact match are searched again with
+    tolerances; missing_df then also holds the near matches, flagged in
+    match_status, and missing_count counts only the deals found neither way.
     In case of error, file_stats['status'] = 'error' and missing_df is empty.
     """
-    file_name = os.path.basename(rami_path)
+    if file_name is None:
+        file_name = os.path.basename(rami_source)
 
+    started = time.perf_counter()
     try:
         # 1. Read RAMI and parse context
-        rami_df_all = _read_rami_file(rami_path)
+        rami_df_all, rami_meta, rami_cache_status = _read_rami_file(rami_source, file_name, rami_cache)
         rami_rows_total = len(rami_df_all)
 
-        filter_type, filter_value, date_from, date_to = _parse_rami_context(rami_path)
+        filter_type, filter_value, date_from, date_to = _parse_rami_context(rami_meta, file_name)
         date_from_str = _format_ts(date_from)
         date_to_str = _format_ts(date_to)
 
@@ -450,8 +595,7 @@ def _gap_for_one_rami(
         rami_filtered = _filter_rami_by_dates(rami_df_all, date_from, date_to)
 
         # 3. Filter scan by context
-        scan_filtered = _filter_scan_by_context(
-            scan_df_all,
+        scan_filtered = scan_index.filter(
             filter_type,
             filter_value,
             date_from,
@@ -461,7 +605,7 @@ def _gap_for_one_rami(
 
         # 4. Ensure required columns exist
         _ensure_required_columns(
-            scan_filtered if len(scan_filtered) > 0 else scan_df_all,
+            scan_filtered if len(scan_filtered) > 0 else scan_index.df,
             "Scan file (after filtering)",
         )
         _ensure_required_columns(
@@ -470,25 +614,24 @@ def _gap_for_one_rami(
         )
 
         # 5. Compare keys: which RAMI deals are missing in scan?
-        merge_cols = KEY_COLUMNS.copy()
-
-        scan_keys = scan_filtered[merge_cols].drop_duplicates()
-
-        merged = rami_filtered.merge(
-            scan_keys,
-            on=merge_cols,
-            how="left",
-            indicator=True,
-        )
-
-        missing_df = merged[merged["_merge"] == "left_only"].drop(columns=["_merge"])
-        missing_count = int(len(missing_df))
+        missing_df = anti_join(rami_filtered, scan_filtered, on=KEY_COLUMNS).reset_index(drop=True)
+        exact_missing_count = int(len(missing_df))
+
+        # 6. Tolerant matching, only for the rows the exact join missed
+        near_match_count = 0
+        if near_rules is not None:
+            missing_df = _flag_near_matches(missing_df, scan_filtered, near_rules)
+            near_match_count = int((missing_df["match_status"] == MATCH_NEAR).sum())
+        missing_count = exact_missing_count - near_match_count
         rami_rows_filtered = int(len(rami_filtered))
         scan_rows_filtered = int(len(scan_filtered))
 
         file_stats: Dict[str, Any] = {
             "rami_filename": file_name,
             "status": "ok",
+            "rami_format": rami_meta.get("rami_format"),
+            "rami_cache": rami_cache_status,
+            "property_type": rami_meta.get("property_type"),
             "filter_type": filter_type,
             "filter_value": filter_value,
             "date_from": date_from_str,
@@ -497,29 +640,209 @@ def _gap_for_one_rami(
             "rami_rows_filtered": rami_rows_filtered,
             "scan_rows_filtered": scan_rows_filtered,
             "missing_count": missing_count,
+            "exact_missing_count": exact_missing_count,
+            "near_match_count": near_match_count,
             "error_message": "",
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
         }
 
         return file_stats, missing_df
 
     except Exception as e:
         # In case of any error – mark this file as error but do not stop the whole process
-        file_stats = {
-            "rami_filename": file_name,
-            "status": "error",
-            "filter_type": None,
-            "filter_value": None,
-            "date_from": None,
-            "date_to": None,
-            "rami_rows_total": 0,
-            "rami_rows_filtered": 0,
-            "scan_rows_filtered": 0,
-            "missing_count": 0,
-            "error_message": str(e),
-        }
+        file_stats = _error_file_stats(file_name, str(e))
+        file_stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
         return file_stats, pd.DataFrame()
 
 
+# ------------------------------------------------------------------
+# ZIP members & parallel execution
+# ------------------------------------------------------------------
+
+# Scan index of a pool worker – set once per process by _init_worker,
+# so it is not pickled again for every RAMI member.
+_WORKER_SCAN_INDEX: Optional[ScanIndex] = None
+
+# Start method of the pool: the pool is created from a job thread of a
+# multithreaded web worker, and a forked child could inherit locks held by
+# other threads. forkserver / spawn start clean processes (the initializer
+# hands them the scan index).
+POOL_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _member_file_name(member: str) -> str:
+    """RAMI file name for a ZIP member (inner folders flattened)."""
+    return member.replace("/", "_")
+
+
+def _open_zip_member(zf: zipfile.ZipFile, member: str, spill_threshold: int) -> BinaryIO:
+    """
+    Copy one ZIP member into a seekable buffer: kept in memory up to
+    `spill_threshold` bytes, spilled to an anonymous temp file above that.
+    The buffer (and any temp file) is released when it is closed.
+    """
+    buf = tempfile.SpooledTemporaryFile(max_size=spill_threshold)
+    try:
+        with zf.open(member) as src:
+            shutil.copyfileobj(src, buf)
+        buf.seek(0)
+    except Exception:
+        buf.close()
+        raise
+    return buf
+
+
+def _gap_for_zip_member_in(
+    scan_index: ScanIndex,
+    zf: zipfile.ZipFile,
+    member: str,
+    spill_threshold: int,
+    rami_cache: Optional[FrameCache] = None,
+    near_rules: Optional[NearMatchRules] = None,
+) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """Read one RAMI member straight from the open ZIP and run the gap logic."""
+    file_name = _member_file_name(member)
+    try:
+        buf = _open_zip_member(zf, member, spill_threshold)
+    except Exception as e:
+        return _error_file_stats(file_name, str(e)), pd.DataFrame()
+
+    with buf:
+        return _gap_for_one_rami(scan_index, buf, file_name, rami_cache, near_rules)
+
+
+def _init_worker(scan_index: ScanIndex) -> None:
+    global _WORKER_SCAN_INDEX
+    _WORKER_SCAN_INDEX = scan_index
+
+
+def _gap_for_zip_member(
+    rami_zip_path: str,
+    member: str,
+    spill_threshold: int,
+    rami_cache: Optional[FrameCache] = None,
+    near_rules: Optional[NearMatchRules] = None,
+) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """Pool task: open the ZIP in the worker and process one RAMI member."""
+    with zipfile.ZipFile(rami_zip_path, "r") as zf:
+        return _gap_for_zip_member_in(
+            _WORKER_SCAN_INDEX, zf, member, spill_threshold, rami_cache, near_rules
+        )
+
+
+def _resolve_workers(workers: int, task_count: int) -> int:
+    """workers <= 0 means one per CPU; never more than there are files."""
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, task_count))
+
+
+def _run_members_in_pool(
+    scan_index: ScanIndex,
+    rami_zip_path: str,
+    members: List[str],
+    spill_threshold: int,
+    pool_size: int,
+    rami_cache: Optional[FrameCache] = None,
+    on_file_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+    near_rules: Optional[NearMatchRules] = None,
+) -> List[Tuple[Dict[str, Any], pd.DataFrame]]:
+    """
+    Run _gap_for_zip_member for every member in a process pool.
+    Results keep the ZIP member order; a task that dies in the pool is
+    reported as an error entry for that file only. `on_file_done` gets each
+    file's stats as soon as it finishes (completion order).
+    """
+    results: List[Optional[Tuple[Dict[str, Any], pd.DataFrame]]] = [None] * len(members)
+
+    with ProcessPoolExecutor(
+        max_workers=pool_size,
+        mp_context=multiprocessing.get_context(POOL_START_METHOD),
+        initializer=_init_worker,
+        initargs=(scan_index,),
+    ) as pool:
+        futures = {
+            pool.submit(
+                _gap_for_zip_member, rami_zip_path, member, spill_threshold, rami_cache, near_rules
+            ): idx
+            for idx, member in enumerate(members)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = (_error_file_stats(_member_file_name(members[idx]), str(e)), pd.DataFrame())
+            results[idx] = result
+            if on_file_done is not None:
+                on_file_done(result[0])
+
+    return results
+
+
+# ------------------------------------------------------------------
+# Progress reporting
+# ------------------------------------------------------------------
+
+# Receives one event dict per step of a run (see _RunProgress)
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class _RunProgress:
+    """
+    Builds the progress events of one run and passes them to the callback:
+      {"event": "start", "file_count_total", "scan_rows_total", "elapsed_seconds"}
+      {"event": "file", "file_index", "file_count_total", "rami_filename",
+       "status", "rows_parsed", "missing_count", "near_match_count", "file_seconds",
+       "elapsed_seconds", "rows_per_second", "error_message"}
+    Without a callback every call is a no-op.
+    """
+
+    def __init__(self, callback: Optional[ProgressCallback]):
+        self.callback = callback
+        self.started = time.perf_counter()
+        self.file_count_total = 0
+        self.files_done = 0
+        self.rows_done = 0
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self.started, 3)
+
+    def start(self, file_count_total: int, scan_rows_total: int) -> None:
+        self.file_count_total = file_count_total
+        if self.callback is None:
+            return
+        self.callback({
+            "event": "start",
+            "file_count_total": file_count_total,
+            "scan_rows_total": scan_rows_total,
+            "elapsed_seconds": self._elapsed(),
+        })
+
+    def file_done(self, file_stats: Dict[str, Any]) -> None:
+        self.files_done += 1
+        self.rows_done += int(file_stats.get("rami_rows_total", 0) or 0)
+        if self.callback is None:
+            return
+        elapsed = self._elapsed()
+        self.callback({
+            "event": "file",
+            "file_index": self.files_done,
+            "file_count_total": self.file_count_total,
+            "rami_filename": file_stats.get("rami_filename"),
+            "status": file_stats.get("status"),
+            "rows_parsed": int(file_stats.get("rami_rows_total", 0) or 0),
+            "missing_count": int(file_stats.get("missing_count", 0) or 0),
+            "near_match_count": int(file_stats.get("near_match_count", 0) or 0),
+            "file_seconds": file_stats.get("elapsed_seconds", 0.0),
+            "elapsed_seconds": elapsed,
+            "rows_per_second": round(self.rows_done / elapsed, 1) if elapsed > 0 else 0.0,
+            "error_message": file_stats.get("error_message", ""),
+        })
+
+
 # ------------------------------------------------------------------
 # Main public function – supports single RAMI or ZIP with many
 # ------------------------------------------------------------------
@@ -528,6 +851,14 @@ def run_tax_gap_check(
     scan_path: str,
     rami_path: str,
     output_dir: str,
+    workers: int = 1,
+    spill_threshold: int = RAMI_SPILL_BYTES,
+    scan_cache: Optional[FrameCache] = None,
+    rami_cache: Optional[FrameCache] = None,
+    progress: Optional[ProgressCallback] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    near_match: bool = False,
+    output_format: str = DEFAULT_OUTPUT_FORMAT,
 ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     """
     RAMI vs scan comparison.
@@ -536,15 +867,50 @@ def run_tax_gap_check(
       - Single RAMI Excel/.xls/.xlsx/.xlsm file
       - ZIP with multiple RAMI files inside
 
+    workers: number of processes used for the files of a ZIP
+      (1 = serial, 0 or less = one per CPU). The per-file results keep the
+      ZIP order whatever the worker count.
+    spill_threshold: ZIP members larger than this many bytes are buffered
+      in a temp file (removed automatically) instead of in memory.
+    scan_cache: optional FrameCache; an identical scan file uploaded before
+      is loaded from it already normalized (reported as stats['scan_cache']).
+    rami_cache: optional FrameCache for the RAMI files; a file whose content
+      was parsed before (in any ZIP) skips the HTML/Excel parse. Reported per
+      file as 'rami_cache' and counted in stats['rami_cache_hits'].
+    progress: optional callback receiving a "start" event and one "file"
+      event per finished RAMI file (name, rows parsed, missing count,
+      elapsed time, throughput) while the run proceeds.
+    chunk_rows: rows per chunk when reading a CSV scan (only the key columns
+      and city are loaded, normalized one chunk at a time).
+    near_match: tolerant matching – RAMI deals the exact comparison misses
+      are searched again per block / sale_day bucket with the numeric
+      tolerances of TAX_GAP_NEAR_RULES. Near matches stay in the output
+      (match_status = "near_match", near_score) but are not counted as
+      missing; see missing_count / exact_missing_count / near_match_count
+      per file and stats['near_match_total'].
+    output_format: file format of the missing deals – "csv" (default),
+      "parquet" or "feather" (dtypes kept, see core.result_writer).
+
     Returns:
       stats: dict with global summary and per-file details
       sample_rows: list of up to 50 dicts (preview of missing deals across all files)
     """
+    output_format = check_output_format(output_format)
     os.makedirs(output_dir, exist_ok=True)
-
-    # 1. Load scan once
-    scan_df_all = _read_scan_file(scan_path)
-    scan_rows_total = int(len(scan_df_all))
+    run_progress = _RunProgress(progress)
+    near_rules = TAX_GAP_NEAR_RULES if near_match else None
+
+    # 1. Load scan once (or from the cache) and index it for the
+    #    per-RAMI date / city / block filters
+    scan_df_all, _, scan_cache_status = cached_read(
+        scan_path,
+        "tax_gap_scan",
+        lambda p: (_read_scan_file(p, chunk_rows), {}),
+        scan_cache,
+    )
+    scan_index = ScanIndex(scan_df_all)
+    del scan_df_all
+    scan_rows_total = int(len(scan_index))
 
     rami_ext = os.path.splitext(rami_path)[1].lower()
 
@@ -563,36 +929,37 @@ def run_tax_gap_check(
 
             if not members:
                 # No usable RAMI files in zip – record one error entry
-                all_files_stats.append({
-                    "rami_filename": os.path.basename(rami_path),
-                    "status": "error",
-                    "filter_type": None,
-                    "filter_value": None,
-                    "date_from": None,
-                    "date_to": None,
-                    "rami_rows_total": 0,
-                    "rami_rows_filtered": 0,
-                    "scan_rows_filtered": 0,
-                    "missing_count": 0,
-                    "error_message": "ZIP file does not contain any .xls/.xlsx/.xlsm RAMI files.",
-                })
+                all_files_stats.append(_error_file_stats(
+                    os.path.basename(rami_path),
+                    "ZIP file does not contain any .xls/.xlsx/.xlsm RAMI files.",
+                ))
             else:
-                # Extract to a temporary subdirectory under output_dir
-                tmp_dir = os.path.join(output_dir, "_rami_zip_tmp")
-                os.makedirs(tmp_dir, exist_ok=True)
-
-                for member in members:
-                    # Flatten any inner folders
-                    safe_name = member.replace("/", "_")
-                    extracted_path = os.path.join(tmp_dir, safe_name)
-
-                    with zf.open(member) as src, open(extracted_path, "wb") as dst:
-                        dst.write(src.read())
-
-                    file_stats, missing_df = _gap_for_one_rami(
-                        scan_df_all,
-                        extracted_path,
+                # Members are read straight from the ZIP into memory –
+                # nothing is extracted under output_dir.
+                pool_size = _resolve_workers(workers, len(members))
+                run_progress.start(len(members), scan_rows_total)
+
+                if pool_size == 1:
+                    results = []
+                    for member in members:
+                        result = _gap_for_zip_member_in(
+                            scan_index, zf, member, spill_threshold, rami_cache, near_rules
+                        )
+                        run_progress.file_done(result[0])
+                        results.append(result)
+                else:
+                    results = _run_members_in_pool(
+                        scan_index,
+                        rami_path,
+                        members,
+                        spill_threshold,
+                        pool_size,
+                        rami_cache,
+                        on_file_done=run_progress.file_done,
+                        near_rules=near_rules,
                     )
+
+                for file_stats, missing_df in results:
                     all_files_stats.append(file_stats)
 
                     if file_stats.get("status") == "ok" and not missing_df.empty:
@@ -604,10 +971,14 @@ def run_tax_gap_check(
     # Case B: Single RAMI Excel / HTML style .xls
     # ------------------------------------------------------------------
     else:
+        run_progress.start(1, scan_rows_total)
         file_stats, missing_df = _gap_for_one_rami(
-            scan_df_all,
+            scan_index,
             rami_path,
+            rami_cache=rami_cache,
+            near_rules=near_rules,
         )
+        run_progress.file_done(file_stats)
         all_files_stats.append(file_stats)
 
         if file_stats.get("status") == "ok" and not missing_df.empty:
@@ -625,11 +996,14 @@ def run_tax_gap_check(
         missing_all_df = pd.DataFrame()
 
     rami_rows_total_all = int(sum(f.get("rami_rows_total", 0) for f in all_files_stats))
-    missing_total = int(len(missing_all_df))
+    # Near matches are kept in the output but are not missing deals
+    missing_total = int(sum(f.get("missing_count", 0) or 0 for f in all_files_stats))
+    near_match_total = int(sum(f.get("near_match_count", 0) or 0 for f in all_files_stats))
 
     file_count_total = len(all_files_stats)
     file_count_success = sum(1 for f in all_files_stats if f.get("status") == "ok")
     file_count_error = sum(1 for f in all_files_stats if f.get("status") == "error")
+    rami_cache_hits = sum(1 for f in all_files_stats if f.get("rami_cache") == CACHE_HIT)
 
     # Per-file percentages
     for f in all_files_stats:
@@ -654,11 +1028,11 @@ def run_tax_gap_check(
         global_missing_pct = 0.0
 
     # ------------------------------------------------------------------
-    # Write combined output CSV (if there are any missing deals)
+    # Write combined output file (if there are any missing deals)
     # ------------------------------------------------------------------
     if not missing_all_df.empty:
         if rami_ext == ".zip":
-            output_filename = "tax_gap_multi_summary.csv"
+            output_stem = "tax_gap_multi_summary"
         else:
             # Single file – re-use the first file's filter info for the name
             f0 = all_files_stats[0]
@@ -666,10 +1040,11 @@ def run_tax_gap_check(
             filter_val = str(f0.get("filter_value") or "unknown").replace(" ", "_")
             date_from_str = _format_ts(f0.get("date_from"))
             date_to_str = _format_ts(f0.get("date_to"))
-            output_filename = f"tax_gap_{filter_type}_{filter_val}_{date_from_str}_to_{date_to_str}.csv"
+            output_stem = f"tax_gap_{filter_type}_{filter_val}_{date_from_str}_to_{date_to_str}"
 
+        output_filename = result_filename(output_stem, output_format)
         output_path = os.path.join(output_dir, output_filename)
-        missing_all_df.to_csv(output_path, index=False, encoding="utf-8-sig")
+        write_result(missing_all_df, output_path, output_format)
     else:
         output_filename = None
         output_path = None
@@ -679,15 +1054,20 @@ def run_tax_gap_check(
     # ------------------------------------------------------------------
     stats: Dict[str, Any] = {
         "scan_rows_total": scan_rows_total,
+        "scan_cache": scan_cache_status,
         "rami_rows_total_all": rami_rows_total_all,
         "missing_total": missing_total,
+        "near_match": near_match,
+        "near_match_total": near_match_total,
         "global_missing_pct": global_missing_pct,
         "file_count_total": file_count_total,
         "file_count_success": file_count_success,
         "file_count_error": file_count_error,
+        "rami_cache_hits": rami_cache_hits,
         "files": all_files_stats,
         "output_filename": output_filename,
         "output_path": output_path,
+        "output_format": output_format,
     }
 
     sample_rows = missing_all_df.head(50).to_dict(orient="records")
@@ -0,0 +1,95 @@
+# tests/test_duplicates_checker.py
+
+import pandas as pd
+import pytest
+
+from core import duplicates_checker
+from core.dup_index import DuplicateIndex
+from core.duplicates_checker import run_duplicates_check
+from core.frame_cache import CACHE_HIT, CACHE_MISS, FrameCache
+
+_ROW = {
+    "block_lot": "003653-0116-004-00",
+    "sale_day": "23/02/2025",
+    "declared_profit": "1108125",
+    "sale_profit": "2216251",
+    "property_type": "דירה בבית קומות",
+    "sold_part": "1.0",
+    "city": "רחובות",
+    "build_year": "1995",
+    "building_mr": "80",
+    "rooms_number": "3.0",
+    "scan_date": "01/10/2025",
+}
+
+
+@pytest.fixture
+def scan_path(tmp_path):
+    rows = [
+        _ROW,
+        dict(_ROW, sale_profit="1"),  # same key – a duplicate of the first row
+        dict(_ROW, block_lot="011195-0085-000-00"),
+        dict(_ROW, scan_date="01/09/2025"),  # earlier scan
+    ]
+    path = tmp_path / "scan.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def _no_reads(monkeypatch):
+    def _fail(*args, **kwargs):
+        raise AssertionError("the scan file was parsed on a cache hit")
+
+    monkeypatch.setattr(duplicates_checker, "read_scan_table", _fail)
+    monkeypatch.setattr(duplicates_checker, "read_scan_rows", _fail)
+
+
+def test_cache_hit_does_not_read_the_scan(scan_path, tmp_path, monkeypatch):
+    cache = FrameCache(str(tmp_path / "cache"))
+
+    first, _ = run_duplicates_check(scan_path, str(tmp_path / "out1"), scan_cache=cache)
+    assert first["scan_cache"] == CACHE_MISS
+    assert first["duplicate_rows"] == 2
+
+    _no_reads(monkeypatch)
+    second, sample = run_duplicates_check(scan_path, str(tmp_path / "out2"), scan_cache=cache)
+    assert second["scan_cache"] == CACHE_HIT
+    assert [row["sale_profit"] for row in sample] == ["2216251", "1"]
+    with open(first["output_path"], "rb") as a, open(second["output_path"], "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_incremental_cache_hit_does_not_read_the_scan(scan_path, tmp_path, monkeypatch):
+    cache = FrameCache(str(tmp_path / "cache"))
+    dup_index = DuplicateIndex(str(tmp_path / "index"))
+
+    first, _ = run_duplicates_check(scan_path, str(tmp_path / "out1"), scan_cache=cache, dup_index=dup_index)
+    assert first["scan_cache"] == CACHE_MISS
+    assert first["index_seeded_dates"] == ["2025-09-01"]
+    assert first["cross_date_rows"] == 2
+
+    dup_index.reset()
+    _no_reads(monkeypatch)
+    second, _ = run_duplicates_check(scan_path, str(tmp_path / "out2"), scan_cache=cache, dup_index=dup_index)
+    assert second["scan_cache"] == CACHE_HIT
+    assert second["index_seeded_dates"] == ["2025-09-01"]
+    with open(first["cross_date_output_path"], "rb") as a, open(second["cross_date_output_path"], "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_near_mode_parses_comma_formatted_amounts(tmp_path):
+    rows = [
+        dict(_ROW, declared_profit="1,000,000"),
+        dict(_ROW, declared_profit="2,500,000"),  # same keys, 1.5M apart – not near
+        dict(_ROW, declared_profit="1,000,000.5"),  # within the tolerance of the first row
+        dict(_ROW, declared_profit="n/a"),  # unparsable – never near
+    ]
+    path = tmp_path / "scan.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    results, _ = run_duplicates_check(str(path), str(tmp_path / "out"), near=True)
+    assert results["near_pairs"] == 1
+
+    pairs = pd.read_csv(results["near_output_path"], dtype=str)
+    assert pairs[["declared_profit_a", "declared_profit_b"]].values.tolist() == [["1,000,000", "1,000,000.5"]]
+    assert float(pairs["declared_profit_diff"].iloc[0]) == 0.5
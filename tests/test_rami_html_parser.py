@@ -0,0 +1,43 @@
+# tests/test_rami_html_parser.py
+
+import io
+from io import StringIO
+
+import pandas as pd
+
+from core.numeric import to_number
+from core.rami_html_parser import RAMI_HEADER_MAP, parse_rami_html_table
+
+_HEADERS = ["גוש חלקה", "יום מכירה", 'תמורה מוצהרת בש"ח', 'שווי מכירה בש"ח', "שטח"]
+
+_ROWS = [
+    ["003653-0116-004-00", "23/02/2025", "₪ 1,000", "1'000'000", "80"],
+    ["011195-0085-000-00", "01/03/2025", "1_0", "inf", "nan"],
+    ["011195-0085-000-00", "02/03/2025", "2,500,000", "‏1,108,125", ""],
+]
+
+
+def _cells(tag: str, row) -> str:
+    return "".join(f"<{tag}>{text}</{tag}>" for text in row)
+
+
+def _html() -> str:
+    rows = "".join(f"<tr>{_cells('td', row)}</tr>" for row in _ROWS)
+    return f"<html><body><table><tr>{_cells('th', _HEADERS)}</tr>{rows}</table></body></html>"
+
+
+def test_numeric_cells_parse_like_read_html_and_to_number():
+    html = _html()
+    streamed = parse_rami_html_table(io.BytesIO(html.encode("utf-8")), encoding="utf-8")
+
+    expected = pd.read_html(StringIO(html))[0].rename(columns=RAMI_HEADER_MAP)
+    for col in ["declared_profit", "sale_profit", "building_mr"]:
+        pd.testing.assert_series_equal(
+            streamed[col],
+            to_number(expected[col]).astype("float64"),
+            check_dtype=False,
+        )
+
+    assert streamed["declared_profit"].tolist()[0::2] == [1000.0, 2500000.0]
+    assert streamed["sale_profit"].tolist()[0::2] == [1000000.0, 1108125.0]
+    assert pd.isna(streamed["declared_profit"].iloc[1])  # "1_0" is not a number here